@@ -19,9 +19,6 @@ import inspect
 
 from typing import Callable
 from collections import deque
-from functools import lru_cache
-
-from kale.common import utils
 
 
 def walk(node, stop_at=tuple(), ignore=tuple()):
@@ -69,7 +66,6 @@ def get_list_tuple_names(node):
     return names
 
 
-@lru_cache(maxsize=128)
 def get_marshal_candidates(code):
     """Get all the names that could be selected as objects to be marshalled.
 
@@ -101,9 +97,7 @@ def get_marshal_candidates(code):
 
     Returns (list(str)): a list of names
     """
-    names = set()
-
-    # Comment IPython magic commands.
+    # IPython magic commands are commented before parsing the code.
     # Note #1: This is needed to correctly parse the code using AST, as it does
     #  not understand IPython magic commands.
     # Note #2: This will comment out both in-line magics and cell magics. This
@@ -114,34 +108,14 @@ def get_marshal_candidates(code):
     #  will be handled case by case as specific issues arise.
     # Note #3: Magic commands are preserved in the resulting Python executable,
     #  they are commented just here in order to make AST run.
-    commented_code = utils.comment_magic_commands(code)
-    # need to exclude all the nodes that mights *define* variables in a local
-    # scope. For example, a function may define a variable x that is aliasing
-    # a global variable x, and we don't want to marshal it in that step, but
-    # from the step that defines the global x.
     # TODO: Search for all possible python nodes that define local vars.
     #  List comprehensions ([i for i in list])
     #  Dict comprehensions
     #  Exception handling?
     #  Decorators?
     #  Context manager (just the alias)
-    contexts = (ast.FunctionDef, ast.ClassDef, )
-    tree = ast.parse(commented_code)
-    for block in tree.body:
-        for node in walk(block, stop_at=contexts):
-            if isinstance(node, contexts):
-                names.add(node.name)
-            if isinstance(node, (ast.Name,)):
-                names.add(node.id)
-            if isinstance(node, (ast.Import, ast.ImportFrom,)):
-                for _n in node.names:
-                    if _n.asname is None:
-                        names.add(_n.name)
-                    else:
-                        names.add(_n.asname)
-            if isinstance(node, (ast.Tuple, ast.List)):
-                names.update(get_list_tuple_names(node))
-    return names
+    from kale.common import symbolutils
+    return set(symbolutils.analyze(code).marshal_candidates)
 
 
 def parse_functions(code):
@@ -157,16 +131,9 @@ def parse_functions(code):
 
     Returns (dict): A dictionary [fn_name] -> function_source
     """
-    fns = dict()
-    tree = ast.parse(code)
-    for block in tree.body:
-        for node in walk(block,
-                         stop_at=(ast.FunctionDef,),
-                         ignore=(ast.ClassDef,)):
-            if isinstance(node, (ast.FunctionDef,)):
-                fn_name = node.name
-                fns[fn_name] = astor.to_source(node)
-    return fns
+    from kale.common import symbolutils
+    return {fn_name: astor.to_source(node) for fn_name, node
+            in symbolutils.get_functions(symbolutils.parse(code)).items()}
 
 
 def get_function_calls(code):
@@ -193,17 +160,8 @@ def get_function_calls(code):
 
     Returns (list(str)): List of function names
     """
-    fns = set()
-    tree = ast.parse(code)
-    for block in tree.body:
-        for node in walk(block):
-            # a function call. We check the attribute func to be ast.Name
-            # because it could also be a ast.Attribute node, in case of
-            # function calls like obj.foo()
-            if (isinstance(node, (ast.Call,))
-                    and isinstance(node.func, (ast.Name,))):
-                fns.add(node.func.id)
-    return fns
+    from kale.common import symbolutils
+    return set(symbolutils.analyze(code).calls)
 
 
 def get_function_and_class_names(code):
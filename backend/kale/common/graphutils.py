@@ -14,6 +14,22 @@
 
 import networkx as nx
 
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
+from collections import deque
+
+
+class Definition(NamedTuple):
+    """The nearest ancestor of a node that defines a name.
+
+    Definitions compare in the order of `get_ordered_ancestors`: by the
+    length of the shortest path from the ancestor to the node, then by the
+    names of the nodes along that path.
+    """
+    distance: int
+    # (predecessor, (..., (ancestor, ()))), compared like a flat tuple
+    path: Tuple
+    ancestor: Any
+
 
 def get_ordered_ancestors(g: nx.DiGraph, node):
     """Get a list of ancestors ordered by DAG layers.
@@ -60,15 +76,16 @@ def get_ordered_ancestors(g: nx.DiGraph, node):
     """
     # list of ancestors, unique and ordered by layers
     ancs = list()
-    # used as queue
-    q = [node]
+    visited = set()
+    q = deque([node])
 
     while q:
-        cur = q.pop(0)
+        cur = q.popleft()
         # sort ancestors for a deterministic result
         preds = sorted(list(g.predecessors(cur)))
         for p in preds:
-            if p not in ancs:
+            if p not in visited:
+                visited.add(p)
                 ancs.append(p)
                 q.append(p)
     return ancs
@@ -86,3 +103,64 @@ def get_leaf_nodes(g: nx.DiGraph):
     Returns (list): A list of leaf nodes.
     """
     return [x for x in g.nodes() if g.out_degree(x) == 0]
+
+
+def get_reaching_definitions(g: nx.DiGraph, node,
+                             defined: Dict[Any, Iterable[str]],
+                             reaching: Dict[Any, Dict[str, Definition]]
+                             ) -> Dict[str, Definition]:
+    """Get the nearest ancestor of a node that defines each name.
+
+    This is a step of a forward dataflow pass: visiting the nodes of a DAG in
+    topological order, the definitions that reach a node are merged from the
+    ones that reach its predecessors, so the ancestors of every node are
+    never traversed. For every name, the definition is the first ancestor
+    that defines it in the order of `get_ordered_ancestors(g, node)`.
+
+    Args:
+        g (nx.DiGraph): A DAG representing a pipeline
+        node (str): The node whose predecessors have already been visited
+        defined (dict): The names defined by every visited node
+        reaching (dict): The result of this function for every visited node
+
+    Returns (dict): The definitions reaching `node`, by name
+    """
+    definitions = dict()
+    for pred in g.predecessors(node):
+        candidates = [(name, Definition(1, (pred, ()), pred))
+                      for name in defined[pred]]
+        candidates.extend(
+            (name, Definition(d.distance + 1, (pred, d.path), d.ancestor))
+            for name, d in reaching[pred].items())
+        for name, definition in candidates:
+            if name not in definitions or definition < definitions[name]:
+                definitions[name] = definition
+    return definitions
+
+
+class GraphIndex(object):
+    """Orderings of a DAG, computed once.
+
+    The topological order is computed when the index is built, and the
+    ordered ancestors of a node (see `get_ordered_ancestors`) when first
+    requested.
+
+    The index does not track changes to the DAG: `version` is the version of
+    the graph the index was built from (e.g., see `Pipeline.version`).
+    """
+
+    def __init__(self, g: nx.DiGraph, version: int = 0):
+        self.version = version
+        self._g = g
+        self.order: List[Any] = list(nx.topological_sort(g))
+        self._ordered_ancestors = dict()
+
+    def get_ordered_ancestors(self, node) -> List[Any]:
+        """Get the ancestors of a node ordered by DAG layers.
+
+        See `get_ordered_ancestors`.
+        """
+        if node not in self._ordered_ancestors:
+            self._ordered_ancestors[node] = get_ordered_ancestors(self._g,
+                                                                  node)
+        return list(self._ordered_ancestors[node])
@@ -180,14 +180,6 @@ def update_uimetadata(artifact_name,
         artifact_name: Name of the artifact
         uimetadata_path: path to mlpipeline-ui-metadata.json
     """
-    try:
-        outputs = get_current_uimetadata(uimetadata_path,
-                                         default_if_not_exist=True)
-    except json.JSONDecodeError:
-        log.error("This step will not be able to visualize artifacts in the"
-                  " KFP UI")
-        return
-
     pod_name = podutils.get_pod_name()
     namespace = podutils.get_namespace()
     workflow_name = workflowutils.get_workflow_name(pod_name, namespace)
@@ -197,7 +189,26 @@ def update_uimetadata(artifact_name,
         'source': 'minio://mlpipeline/artifacts/{}/{}/{}'.format(
             workflow_name, pod_name, artifact_name + '.tgz')
     }]
-    outputs['outputs'] += html_artifact_entry
+    append_uimetadata_outputs(html_artifact_entry, uimetadata_path)
+
+
+def append_uimetadata_outputs(entries,
+                              uimetadata_path=KFP_UI_METADATA_FILE_PATH):
+    """Append new output entries to the ui-metadata file.
+
+    Args:
+        entries: List of ui-metadata outputs (e.g., web-app, table)
+        uimetadata_path: path to mlpipeline-ui-metadata.json
+    """
+    try:
+        outputs = get_current_uimetadata(uimetadata_path,
+                                         default_if_not_exist=True)
+    except json.JSONDecodeError:
+        log.error("This step will not be able to visualize artifacts in the"
+                  " KFP UI")
+        return
+
+    outputs['outputs'] += entries
 
     try:
         utils.ensure_or_create_dir(uimetadata_path)
@@ -0,0 +1,513 @@
+# Copyright 2020 The Kale Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Symbol tables of Python code blocks, for dependency detection.
+
+`analyze` parses a code block once and answers all the queries that the
+dependency detection runs on it: the names it is missing, the names it could
+marshal, its global functions and their free variables, and the functions it
+calls. Missing names are reported by PyFlakes, running its `Checker` directly
+on the parsed tree.
+
+Symbol tables are cached in memory and, optionally, on disk (e.g., in
+`<notebook_dir>/.kale/cache`), keyed by the digest of the code, the version
+of Kale and of PyFlakes. Compiling a notebook again after editing a cell
+analyzes just the steps whose source has changed.
+"""
+
+import os
+import ast
+import json
+import hashlib
+import logging
+
+from typing import (Any, Dict, FrozenSet, Iterable, List, Optional, Set,
+                    Tuple)
+from functools import lru_cache
+
+from kale.common import astutils, utils
+
+log = logging.getLogger(__name__)
+
+# Number of code blocks whose symbol tables are kept in memory
+CACHE_SIZE = 1024
+# Number of code blocks whose syntax trees are kept in memory
+PARSE_CACHE_SIZE = 128
+# Number of symbol tables kept on disk. The least recently used are removed.
+MAX_CACHE_ENTRIES = 4096
+CACHE_DIR_NAME = os.path.join(".kale", "cache")
+# Set to "false" to disable the on-disk cache
+CACHE_ENV = "KALE_ANALYSIS_CACHE"
+# Bump when the contents of the symbol tables change
+CACHE_FORMAT_VERSION = 3
+FILENAME = "kale"
+# Builtins that never modify their arguments
+READ_ONLY_FUNCTIONS = frozenset({"print", "display", "len", "repr", "str",
+                                 "type", "isinstance", "id", "hash", "format",
+                                 "bool", "int", "float"})
+
+
+def _check(body: List[ast.stmt], builtins: Iterable[str] = None):
+    from pyflakes import checker
+    module = ast.Module(body=body, type_ignores=[])
+    return checker.Checker(module, filename=FILENAME, builtins=builtins)
+
+
+def _get_undefined_names(flakes_checker) -> Set[str]:
+    from pyflakes import messages
+    return {message.message_args[0] for message in flakes_checker.messages
+            if isinstance(message, (messages.UndefinedName,
+                                    messages.UndefinedExport))}
+
+
+def _get_module_scope(flakes_checker):
+    from pyflakes import checker
+    return next(scope for scope in flakes_checker.deadScopes
+                if isinstance(scope, checker.ModuleScope))
+
+
+class SymbolTable(object):
+    """The symbols of a Python code block.
+
+    Use `analyze` to create symbol tables, so that every code block is parsed
+    and checked only once.
+
+    Attributes:
+        undefined: Names that the code uses but does not define (e.g., the
+            variables a pipeline step needs to load)
+        defined: Names bound at the module level
+        import_starred: Whether the code contains a wildcard import
+        marshal_candidates: Names that a pipeline step could marshal for its
+            descendants (see `astutils.get_marshal_candidates`)
+        mutated: Names that the code binds or possibly modifies at the module
+            level (see `_get_mutated_names`), directly or through aliases.
+            Marshal candidates that are not mutated are only read.
+        aliases: Names mapped to the names whose objects they might refer
+            to, contain or view (see `_get_aliases`)
+        calls: Names of the functions called as `name(...)`
+        functions: Global functions, mapped to the names they use but do not
+            define (see `get_free_variables`)
+    """
+
+    def __init__(self,
+                 undefined: Iterable[str],
+                 defined: Iterable[str],
+                 import_starred: bool,
+                 marshal_candidates: Iterable[str],
+                 mutated: Iterable[str],
+                 aliases: Dict[str, Iterable[str]],
+                 calls: Iterable[str],
+                 functions: Dict[str, Iterable[str]]):
+        self.undefined: FrozenSet[str] = frozenset(undefined)
+        self.defined: FrozenSet[str] = frozenset(defined)
+        self.import_starred = import_starred
+        self.marshal_candidates: FrozenSet[str] = frozenset(
+            marshal_candidates)
+        self.mutated: FrozenSet[str] = frozenset(mutated)
+        self.aliases: Dict[str, FrozenSet[str]] = {
+            name: frozenset(names) for name, names in aliases.items()}
+        self.calls: FrozenSet[str] = frozenset(calls)
+        self.functions: Dict[str, FrozenSet[str]] = {
+            name: frozenset(names) for name, names in functions.items()}
+
+    @classmethod
+    def from_code(cls, code: str) -> "SymbolTable":
+        """Parse and check a code block.
+
+        IPython magic commands are commented, so that the code can be parsed
+        (see `astutils.get_marshal_candidates`).
+        """
+        tree = parse(code)
+        flakes_checker = _check(tree.body)
+        module_scope = _get_module_scope(flakes_checker)
+        # PyFlakes does not report missing names after a wildcard import
+        import_starred = getattr(module_scope, "importStarred", False)
+        functions = {name: _get_undefined_names(_check([fn]))
+                     for name, fn in get_functions(tree).items()}
+        calls = _get_calls(tree)
+        aliases = _get_aliases(tree)
+        bound, modified = _get_mutated_names(tree)
+        # Functions may modify the globals they use
+        for fn_name in calls.intersection(functions):
+            modified.update(functions[fn_name])
+        return cls(undefined=_get_undefined_names(flakes_checker),
+                   defined=module_scope,
+                   import_starred=import_starred,
+                   marshal_candidates=_get_marshal_candidates(tree),
+                   mutated=bound | _follow_aliases(modified, aliases),
+                   aliases=aliases,
+                   calls=calls,
+                   functions=functions)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SymbolTable":
+        """Create a symbol table from the output of `to_dict`."""
+        return cls(**data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get a JSON-serializable representation of the symbol table."""
+        return {"undefined": sorted(self.undefined),
+                "defined": sorted(self.defined),
+                "import_starred": self.import_starred,
+                "marshal_candidates": sorted(self.marshal_candidates),
+                "mutated": sorted(self.mutated),
+                "aliases": {name: sorted(names)
+                            for name, names in self.aliases.items()},
+                "calls": sorted(self.calls),
+                "functions": {name: sorted(names)
+                              for name, names in self.functions.items()}}
+
+    def get_mutated(self, modified: Iterable[str] = ()) -> Set[str]:
+        """Get the names that the code binds or possibly modifies.
+
+        Args:
+            modified: Names whose objects are modified by other means (e.g.,
+                by functions that the code calls and that are defined in
+                other code blocks), along with the names aliasing them
+
+        Returns: `mutated`, and the names that `modified` might alias
+        """
+        return set(self.mutated) | _follow_aliases(modified, self.aliases)
+
+    def get_free_variables(self, fn_name: str,
+                           prelude: "SymbolTable" = None) -> Set[str]:
+        """Get the free variables of a global function.
+
+        Free variables are the names that the function uses but are defined
+        neither inside it nor in `prelude`.
+
+        Args:
+            fn_name: Name of a function in `functions`
+            prelude: Symbols of the code that runs before the function is
+                defined (i.e., the imports and functions that Kale prepends
+                to every pipeline step). Names it is missing are free
+                variables of the function as well.
+
+        Returns: the names of the free variables
+        """
+        free_vars = set(self.functions[fn_name])
+        if prelude is None:
+            return free_vars
+        if prelude.import_starred:
+            # Any name could come from the wildcard import
+            return set()
+        return ((free_vars - prelude.defined)
+                | (prelude.undefined - {fn_name}))
+
+
+def _get_marshal_candidates(tree: ast.Module) -> Set[str]:
+    # Nodes that define variables in a local scope are not traversed. For
+    # example, a function may define a variable x that is aliasing a global
+    # variable x, and we don't want to marshal it in this step, but from the
+    # step that defines the global x.
+    contexts = (ast.FunctionDef, ast.ClassDef, )
+    names = set()
+    for block in tree.body:
+        for node in astutils.walk(block, stop_at=contexts):
+            if isinstance(node, contexts):
+                names.add(node.name)
+            if isinstance(node, (ast.Name,)):
+                names.add(node.id)
+            if isinstance(node, (ast.Import, ast.ImportFrom,)):
+                for _n in node.names:
+                    if _n.asname is None:
+                        names.add(_n.name)
+                    else:
+                        names.add(_n.asname)
+            if isinstance(node, (ast.Tuple, ast.List)):
+                names.update(astutils.get_list_tuple_names(node))
+    return names
+
+
+def _get_root_name(node: ast.AST) -> Optional[str]:
+    # The variable that `x`, `x.a`, `x[0]`, `x.a(...)`, `*x`, ... refer to
+    while isinstance(node, (ast.Attribute, ast.Subscript, ast.Call,
+                            ast.Starred)):
+        node = node.func if isinstance(node, ast.Call) else node.value
+    return node.id if isinstance(node, ast.Name) else None
+
+
+def _get_mutated_names(tree: ast.Module) -> Tuple[Set[str], Set[str]]:
+    """Get the names that the module-level code binds or might modify.
+
+    A name is modified when one of its attributes or items is assigned or
+    deleted, when it is augmented (e.g., `x += 1`, which may be in-place),
+    when one of its methods is called, or when it is passed to a function
+    (except for a few builtins, like `print`), since the function might
+    modify it. Any other use of a name only reads it.
+
+    Returns: the names that are (re)bound or deleted, and the names whose
+        objects might be modified. The objects of the latter may be shared
+        with other names (see `_get_aliases`).
+    """
+    contexts = (ast.FunctionDef, ast.ClassDef, )
+    bound = set()
+    modified = set()
+    for block in tree.body:
+        for node in astutils.walk(block, stop_at=contexts):
+            if isinstance(node, contexts):
+                bound.add(node.name)
+            elif isinstance(node, (ast.Import, ast.ImportFrom,)):
+                bound.update(_n.asname or _n.name for _n in node.names)
+            elif isinstance(node, (ast.Name,)):
+                if isinstance(node.ctx, (ast.Store, ast.Del)):
+                    bound.add(node.id)
+            elif isinstance(node, (ast.Attribute, ast.Subscript)):
+                if isinstance(node.ctx, (ast.Store, ast.Del)):
+                    modified.add(_get_root_name(node))
+            elif isinstance(node, (ast.AugAssign,)):
+                modified.add(_get_root_name(node.target))
+            elif isinstance(node, ast.Call):
+                if isinstance(node.func, ast.Attribute):
+                    modified.add(_get_root_name(node.func))
+                if not (isinstance(node.func, ast.Name)
+                        and node.func.id in READ_ONLY_FUNCTIONS):
+                    args = node.args + [kw.value for kw in node.keywords]
+                    modified.update(_get_root_name(arg) for arg in args)
+    bound.discard(None)
+    modified.discard(None)
+    return bound, modified
+
+
+def _get_referenced_names(node: ast.AST) -> Set[str]:
+    """Get the names whose objects the value of an expression might share.
+
+    The value of `x`, `x.a`, `x[0]` or `x.a(...)` might be (a view of) the
+    object of `x`, the value of `[x, y]` contains the objects of `x` and `y`
+    and the value of `f(x)` might contain the object of `x` (e.g.,
+    `enumerate(x)`), unless `f` is a builtin that never modifies its
+    arguments.
+    """
+    if isinstance(node, (ast.Name, ast.Attribute, ast.Subscript,
+                         ast.Starred)):
+        return {_get_root_name(node)} - {None}
+    if isinstance(node, ast.Call):
+        if (isinstance(node.func, ast.Name)
+                and node.func.id in READ_ONLY_FUNCTIONS):
+            return set()
+        names = _get_referenced_names(node.func)
+        names.discard(getattr(node.func, "id", None))
+        return names.union(*(_get_referenced_names(arg) for arg in
+                             node.args + [kw.value for kw in node.keywords]))
+    if isinstance(node, (ast.Tuple, ast.List, ast.Set)):
+        children = node.elts
+    elif isinstance(node, ast.Dict):
+        children = [key for key in node.keys if key is not None] + node.values
+    elif isinstance(node, ast.IfExp):
+        children = [node.body, node.orelse]
+    elif isinstance(node, ast.BoolOp):
+        children = node.values
+    elif (isinstance(node, ast.BinOp)
+          and isinstance(node.op, (ast.Add, ast.Mult))):
+        # e.g., concatenating or repeating lists
+        children = [node.left, node.right]
+    elif isinstance(node, (ast.ListComp, ast.SetComp, ast.GeneratorExp)):
+        children = [node.elt]
+    elif isinstance(node, ast.DictComp):
+        children = [node.key, node.value]
+    elif isinstance(node, getattr(ast, "NamedExpr", ())):  # Python >= 3.8
+        children = [node.value]
+    else:
+        return set()
+    return set().union(*(_get_referenced_names(child) for child in children))
+
+
+def _get_target_names(node: ast.AST) -> Set[str]:
+    # The variables that `x`, `x.a`, `x[i]`, `x, *y`, ... are assigned to
+    if isinstance(node, (ast.Tuple, ast.List)):
+        return set().union(*map(_get_target_names, node.elts))
+    return {_get_root_name(node)} - {None}
+
+
+def _get_aliases(tree: ast.Module) -> Dict[str, Set[str]]:
+    """Get the names that the module-level code makes refer to other objects.
+
+    A name aliases the names whose objects it is assigned (`a = df.values`,
+    `data = [train_df, test_df]`), iterates over (`for df in data`,
+    comprehensions), enters (`with x as y`), or stores into its attributes
+    or items (`d["k"] = df`) or passes to its methods (`lst.append(df)`).
+    Modifying an alias might modify the objects of the names it aliases.
+
+    Returns: a dict [name] -> names it might alias
+    """
+    contexts = (ast.FunctionDef, ast.ClassDef, )
+    named_expr = getattr(ast, "NamedExpr", ())  # Python >= 3.8
+    aliases = dict()
+
+    def _add(targets, *values):
+        referenced = set().union(*map(_get_referenced_names, values))
+        for name in set().union(*map(_get_target_names, targets)):
+            aliases.setdefault(name, set()).update(referenced - {name})
+
+    for block in tree.body:
+        for node in astutils.walk(block, stop_at=contexts):
+            if isinstance(node, ast.Assign):
+                _add(node.targets, node.value)
+            elif isinstance(node, (ast.AugAssign, ast.AnnAssign, named_expr)):
+                if node.value is not None:
+                    _add([node.target], node.value)
+            elif isinstance(node, (ast.For, ast.AsyncFor, ast.comprehension)):
+                _add([node.target], node.iter)
+            elif isinstance(node, ast.withitem):
+                if node.optional_vars is not None:
+                    _add([node.optional_vars], node.context_expr)
+            elif (isinstance(node, ast.Call)
+                  and isinstance(node.func, ast.Attribute)):
+                _add([node.func], *node.args,
+                     *[kw.value for kw in node.keywords])
+    return aliases
+
+
+def _follow_aliases(names: Iterable[str],
+                    aliases: Dict[str, Iterable[str]]) -> Set[str]:
+    """Get `names` and all the names they alias, transitively."""
+    result = set()
+    left = list(names)
+    while left:
+        name = left.pop()
+        if name not in result:
+            result.add(name)
+            left.extend(aliases.get(name, ()))
+    return result
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse(code: str) -> ast.Module:
+    """Parse a code block, commenting its IPython magic commands.
+
+    Trees are cached, so that the queries on the same code block (e.g., its
+    symbol table and the sources of its functions) parse it once. Callers
+    must not modify them.
+    """
+    return ast.parse(utils.comment_magic_commands(code))
+
+
+def get_functions(tree: ast.Module) -> Dict[str, ast.FunctionDef]:
+    """Get the global functions of a module, by name."""
+    # Functions defined inside other statements (e.g., `try`) are global,
+    # class methods are not
+    fns = dict()
+    for block in tree.body:
+        for node in astutils.walk(block,
+                                  stop_at=(ast.FunctionDef,),
+                                  ignore=(ast.ClassDef,)):
+            if isinstance(node, (ast.FunctionDef,)):
+                fns[node.name] = node
+    return fns
+
+
+def _get_calls(tree: ast.Module) -> Set[str]:
+    # `func` is an ast.Attribute for method calls, like obj.foo()
+    return {node.func.id
+            for block in tree.body
+            for node in astutils.walk(block)
+            if (isinstance(node, (ast.Call,))
+                and isinstance(node.func, (ast.Name,)))}
+
+
+@lru_cache(maxsize=1)
+def _get_versions() -> str:
+    import pyflakes
+    try:
+        from importlib import metadata
+        kale_version = metadata.version("kubeflow-kale")
+    except Exception:  # Python < 3.8 or not installed
+        kale_version = "unknown"
+    return "%s-%s-%s" % (kale_version, pyflakes.__version__,
+                         CACHE_FORMAT_VERSION)
+
+
+def _get_cache_path(cache_dir: str, code: str) -> str:
+    digest = hashlib.sha256(
+        ("%s\0%s" % (_get_versions(), code)).encode()).hexdigest()
+    return os.path.join(cache_dir, digest + ".json")
+
+
+def _read_cache(path: str) -> Optional[SymbolTable]:
+    try:
+        with open(path) as f:
+            table = SymbolTable.from_dict(json.load(f))
+        # Mark the entry as recently used
+        os.utime(path)
+        return table
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, TypeError) as e:
+        log.debug("Ignoring invalid analysis cache entry %s: %s", path, e)
+        return None
+
+
+def _write_cache(path: str, table: SymbolTable):
+    tmp_path = "%s.tmp-%s" % (path, utils.random_string(10))
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "w") as f:
+            json.dump(table.to_dict(), f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        log.debug("Could not write analysis cache entry %s: %s", path, e)
+        utils.rm_r(tmp_path, silent=True)
+
+
+def get_cache_dir(nb_path: str) -> Optional[str]:
+    """Get the on-disk cache of the symbol tables of a notebook.
+
+    Returns: `<notebook_dir>/.kale/cache`, or None if the cache is disabled
+        by `$KALE_ANALYSIS_CACHE` or the notebook's folder does not exist
+    """
+    if os.environ.get(CACHE_ENV, "true").lower() == "false":
+        return None
+    nb_dir = os.path.dirname(os.path.abspath(os.path.expanduser(nb_path)))
+    if not os.path.isdir(nb_dir):
+        return None
+    return os.path.join(nb_dir, CACHE_DIR_NAME)
+
+
+def prune_cache(cache_dir: str, max_entries: int = MAX_CACHE_ENTRIES):
+    """Remove the least recently used symbol tables from the cache."""
+    try:
+        entries = [entry for entry in os.scandir(cache_dir)
+                   if entry.name.endswith(".json")]
+    except FileNotFoundError:
+        return
+    if len(entries) <= max_entries:
+        return
+    entries.sort(key=lambda entry: entry.stat().st_mtime)
+    for entry in entries[:len(entries) - max_entries]:
+        utils.rm_r(entry.path, silent=True)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def analyze(code: str, cache_dir: str = None) -> SymbolTable:
+    """Get the symbol table of a code block.
+
+    Symbol tables are cached by the code, so analyzing the same code again
+    (e.g., the source of an ancestor step) does not parse it again.
+
+    Args:
+        code: Multiline Python source code
+        cache_dir: Folder where symbol tables are persisted across processes
+            (see `get_cache_dir`). None disables the on-disk cache.
+
+    Raises:
+        SyntaxError: if the code cannot be parsed
+    """
+    if not cache_dir:
+        return SymbolTable.from_code(code)
+    path = _get_cache_path(cache_dir, code)
+    table = _read_cache(path)
+    if table is None:
+        table = SymbolTable.from_code(code)
+        _write_cache(path, table)
+    return table
@@ -164,6 +164,14 @@ def ensure_or_create_dir(filepath: str):
         raise RuntimeError("'%s' is not a directory" % dirname)
 
 
+def get_path_size(path: str) -> int:
+    """Get the size of a file or the total size of the files of a folder."""
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, f))
+               for root, _, files in os.walk(path) for f in files)
+
+
 def clean_dir(path: str):
     """If path exists, remove and then create empty dir."""
     if os.path.exists(path):
@@ -22,6 +22,7 @@ from jinja2 import Environment, PackageLoader, FileSystemLoader
 
 from kale import Pipeline, Step
 from kale.common import kfputils
+from kale.marshal import history
 
 
 log = logging.getLogger(__name__)
@@ -90,21 +91,36 @@ class Compiler:
                        for s in step_source_raw]
 
         template = self._get_templating_env().get_template(FN_TEMPLATE)
-        fn_code = template.render(step=step, **self.pipeline.config.to_dict())
+        fn_code = template.render(
+            step=step,
+            artifact_consumers=self.pipeline.get_artifact_consumers(),
+            **self.pipeline.config.to_dict())
         # fix code style using pep8 guidelines
         return autopep8.fix_code(fn_code)
 
     def generate_pipeline(self, lightweight_components):
         """Generate Python code using the pipeline template."""
         template = self._get_templating_env().get_template(PIPELINE_TEMPLATE)
+        config = self.pipeline.config.to_dict()
+        config["marshal_volume_size"] = self._get_marshal_volume_size()
         pipeline_code = template.render(
             pipeline=self.pipeline,
             lightweight_components=lightweight_components,
-            **self.pipeline.config.to_dict()
+            **config
         )
         # fix code style using pep8 guidelines
         return autopep8.fix_code(pipeline_code)
 
+    def _get_marshal_volume_size(self) -> str:
+        config = self.pipeline.config
+        if config.marshal_volume_size:
+            return config.marshal_volume_size
+        size = history.estimate_volume_size(config.marshal_history_path,
+                                            self.pipeline.steps,
+                                            config.marshal_keep_artifacts,
+                                            config.marshal_storage_endpoint)
+        return size or history.DEFAULT_VOLUME_SIZE
+
     def _get_templating_env(self, templates_path=None):
         if self.templating_env:
             return self.templating_env
@@ -198,6 +198,53 @@ class VolumeAccessModeValidator(EnumValidator):
     enum = ("", "rom", "rwo", "rwm")
 
 
+class VariableNameValidator(RegexValidator):
+    """Validates the name of a Python variable."""
+
+    regex = r"^[_a-zA-Z][_a-zA-Z0-9]*$"
+    error_message = "Not a valid Python variable name"
+
+
+class MmapModeValidator(EnumValidator):
+    """Validates the memory-map mode of marshalled Numpy arrays."""
+
+    enum = ("", "r", "c")
+
+
+class MmapVariablesValidator(DictValidator):
+    """Validates a dictionary of per-variable memory-map modes."""
+
+    key_validator = VariableNameValidator
+    value_validator = MmapModeValidator
+
+
+class CodecValidator(EnumValidator):
+    """Validates the compression codec of marshalled files."""
+
+    enum = ("none", "gzip", "lz4", "zstd")
+
+
+class CodecVariablesValidator(DictValidator):
+    """Validates a dictionary of per-variable compression codecs."""
+
+    key_validator = VariableNameValidator
+    value_validator = CodecValidator
+
+
+class StorageURLValidator(RegexValidator):
+    """Validates the URL of the object storage of marshalled objects."""
+
+    regex = r"^s3://[a-z0-9][a-z0-9.-]*[a-z0-9](/.*)?$"
+    error_message = "Not a valid storage URL (s3://<bucket>[/<prefix>])"
+
+
+class K8sQuantityValidator(RegexValidator):
+    """Validates a K8s quantity (e.g., the size of a volume)."""
+
+    regex = r"^[0-9]+(\.[0-9]+)?([KMGTPE]i|[kMGTPE])?$"
+    error_message = "Not a valid K8s quantity"
+
+
 class IsLowerValidator(Validator):
     """Validates if a string is all lowercase."""
 
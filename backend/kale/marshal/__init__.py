@@ -14,10 +14,19 @@
 
 # Import all backends so that they register themselves to the Dispatcher
 from .backends import *
-from .backend import get_dispatcher, set_data_dir, get_data_dir
+from .backend import (get_dispatcher, set_data_dir, get_data_dir,
+                      set_content_addressed, is_content_addressed,
+                      set_codec, get_codec, set_storage, get_storage,
+                      set_summaries, is_summaries_enabled, set_delta,
+                      is_delta_enabled)
+from .proxy import LazyProxy, is_loaded, unwrap
 
 save = get_dispatcher().save
 load = get_dispatcher().load
+save_many = get_dispatcher().save_many
+load_many = get_dispatcher().load_many
+delete = get_dispatcher().delete
+describe = get_dispatcher().describe
 get_backend = get_dispatcher().get_backend
 get_backends = get_dispatcher().get_backends
 get_backend_by_name = get_dispatcher().get_backend_by_name
@@ -14,15 +14,28 @@
 
 import os
 import re
+import time
+import shutil
+import inspect
 import logging
 
-from typing import Dict, Any, Type
+from typing import (Dict, Any, Type, Iterable, List, Callable, Tuple,
+                    Pattern, Optional)
+from concurrent.futures import ThreadPoolExecutor
 
 from kale.common import utils
+from kale.marshal import (buffers, cas, codecs, manifest, proxy, stats,
+                          storage, summary)
 
 log = logging.getLogger(__name__)
 
 __DATA_DIR = os.path.curdir
+__CONTENT_ADDRESSED = False
+__CODEC = codecs.NO_CODEC
+__SUMMARIES = False
+__DELTA = False
+# Unset until `set_storage` is called or the environment is inspected
+__STORAGE = False
 
 
 def set_data_dir(path):
@@ -40,6 +53,103 @@ def get_data_dir():
     return __DATA_DIR
 
 
+def set_content_addressed(enabled: bool):
+    """Enable or disable the content-addressed layout of the data directory.
+
+    When enabled, objects are stored as blobs named after the digest of their
+    content and `<name>.<ext>` becomes a pointer to its blob. Saving an
+    object that is already present in the data directory (e.g., the same
+    DataFrame marshalled by multiple steps) does not write any data.
+    """
+    global __CONTENT_ADDRESSED
+    __CONTENT_ADDRESSED = enabled
+
+
+def is_content_addressed() -> bool:
+    """Whether the content-addressed layout is enabled."""
+    return __CONTENT_ADDRESSED
+
+
+def set_codec(name: str):
+    """Set the default compression codec of the marshalled files.
+
+    Backends can override this setting with their `codec` attribute and
+    single objects with the `codec` argument of `save`.
+
+    Args:
+        name: One of the registered codecs (e.g., "gzip", "lz4", "zstd") or
+            "none" to disable compression.
+    """
+    global __CODEC
+    if name != codecs.NO_CODEC:
+        codecs.get_codec(name)  # validate the name
+    __CODEC = name
+
+
+def get_codec() -> str:
+    """Get the default compression codec of the marshalled files."""
+    return __CODEC
+
+
+def set_summaries(enabled: bool):
+    """Enable or disable the summaries of the marshalled objects.
+
+    When enabled, every save writes a small sidecar describing the object
+    (type, shape, dtype, size and repr), which `describe` reads without
+    loading the object.
+    """
+    global __SUMMARIES
+    __SUMMARIES = enabled
+
+
+def is_summaries_enabled() -> bool:
+    """Whether the summaries of the marshalled objects are enabled."""
+    return __SUMMARIES
+
+
+def set_delta(enabled: bool):
+    """Enable or disable delta marshalling of tabular objects.
+
+    When enabled, saving a Pandas DataFrame or an Arrow table under the name
+    of an object already in the data directory (e.g., a DataFrame that a
+    step extends with a few columns) writes just the new or changed columns,
+    along with a reference to the previous version of the object.
+    """
+    global __DELTA
+    __DELTA = enabled
+
+
+def is_delta_enabled() -> bool:
+    """Whether delta marshalling is enabled."""
+    return __DELTA
+
+
+def set_storage(url: str = None, endpoint_url: str = None):
+    """Store the marshalled objects in an S3-compatible bucket.
+
+    The data directory becomes a local staging area: saved objects are
+    uploaded to the bucket and loaded objects are downloaded from it.
+
+    By default, the storage is configured by the `KALE_MARSHAL_STORAGE_URL`
+    and `KALE_MARSHAL_STORAGE_ENDPOINT` environment variables.
+
+    Args:
+        url: `s3://<bucket>[/<prefix>]`. None disables the storage.
+        endpoint_url: Endpoint of the S3-compatible service (e.g., MinIO)
+    """
+    global __STORAGE
+    __STORAGE = (storage.S3Storage(url, endpoint_url=endpoint_url)
+                 if url else None)
+
+
+def get_storage() -> Optional[storage.S3Storage]:
+    """Get the object storage of the marshalled objects, if any."""
+    if __STORAGE is False:
+        set_storage(os.environ.get(storage.STORAGE_URL_ENV),
+                    os.environ.get(storage.STORAGE_ENDPOINT_ENV))
+    return __STORAGE
+
+
 class MarshalBackend(object):
     """Base class for marshalling Python objects.
 
@@ -53,16 +163,30 @@ class MarshalBackend(object):
     * `file_type`: The file extension of the files/folders the backend is able
                    to restore. NOTE: Currently this can be just *one* ext.
     * `obj_type_regex`: A regex which is matched against the `type` of an
-                        object.
+                        object and of the classes in its MRO.
+    * `match_type`: A method matching classes that cannot be described by
+                    a regex (e.g., classes implementing a protocol).
+    * `match_object`: A method matching objects that no backend matches by
+                      their type (e.g., dicts with specific contents).
+    * `priority`: Resolves conflicts between backends that match the same
+                  class. The backend with the highest priority wins.
+
+    Set the `codec` attribute to compress the backend's files with a specific
+    codec, regardless of the default one (see `set_codec`).
 
     Take a look at `backend.py` for some examples on how to create custom
-    marshal backends.
+    marshal backends. Third-party packages can register their backends with
+    an entry point in the `kale.marshal.backends` group, pointing to the
+    backend class. Backends should import their libraries in `save` and
+    `load`, so that registering them is cheap.
     """
     name: str = "Default backend"
     display_name: str = "generic"  # This is supposed to tbe the library name
     file_type: str = "dillpkl"
     obj_type_regex: str = None
+    priority: int = 0
     predictor_type: str = None  # Used for creating serving predictors
+    codec: str = None  # Override the default compression codec
 
     # Set to False if you want your backend not to use the default backend
     # in case of a missing library.
@@ -78,28 +202,116 @@ class MarshalBackend(object):
         self.obj_type_regex = obj_type_regex or self.obj_type_regex
         self.file_type = file_type or self.file_type
 
-    def wrapped_save(self, obj: Any, name: str):
+    def match_type(self, cls: type) -> bool:
+        """Whether the backend can save objects of class `cls`.
+
+        Override this to match classes that `obj_type_regex` cannot describe.
+        """
+        return False
+
+    def match_object(self, obj: Any) -> bool:
+        """Whether the backend can save `obj`.
+
+        This is consulted only for objects whose type no backend matches,
+        since it cannot be memoized per type. Override this to claim objects
+        of generic types by their contents.
+        """
+        return False
+
+    def wrapped_save(self, obj: Any, name: str, codec: str = None):
         """Wrapper around the public `save` function.
 
         This function provides common logging and exception handling for every
         class that extends the base `MarshalBackend`. `Dispatcher` calls
         directly this function instead of `save`.
 
+        Args:
+            obj: Object to be marshalled
+            name: Name of the object
+            codec: Compression codec. Overrides the codec of the backend and
+                the default one.
+
         Returns the path (<data_dir>/<basename>.<backend_extension>) to the
         saved file.
         """
         abs_path = os.path.join(get_data_dir(), name + "." + self.file_type)
         log.info("Saving %s object using %s: %s",
                  self.display_name, self.name, name)
+        codec = codecs.resolve_codec(codec or self.codec or get_codec())
+        if is_content_addressed():
+            codec = self._content_addressed_save(obj, abs_path, codec)
+        else:
+            codec = self._encoded_save(obj, abs_path, codec)
+        codecs.write_codec(abs_path, codec)
+        return abs_path
+
+    def _save(self, obj: Any, path: str):
         try:
-            self.save(obj, abs_path)
+            self.save(obj, path)
         except ImportError as e:
             if not self.fallback_on_missing_lib:
                 raise e
             log.warning("Failed to import %s (%s). Falling back to default "
                         "backend.", self.display_name, e)
-            self._default_save(obj, name)  # always try the default save
-        return abs_path
+            self._default_save(obj, path)  # always try the default save
+
+    def _encoded_save(self, obj: Any, path: str, codec: str) -> str:
+        """Save an object and compress it.
+
+        Returns: the codec that was actually used. Folders are never
+            compressed.
+        """
+        if codec == codecs.NO_CODEC:
+            self._save(obj, path)
+            return codec
+        with codecs.local_tmp_path(self.file_type) as tmp_path:
+            self._save(obj, tmp_path)
+            if os.path.isdir(tmp_path):
+                log.info("%s saved a folder, which cannot be compressed with"
+                         " %s", self.name, codec)
+                if os.path.exists(path):
+                    utils.rm_r(path)
+                shutil.move(tmp_path, path)
+                return codecs.NO_CODEC
+            codecs.get_codec(codec).encode(tmp_path, path)
+        return codec
+
+    def _get_blob_file_type(self, codec: str) -> str:
+        if codec == codecs.NO_CODEC:
+            return self.file_type
+        return "%s.%s" % (self.file_type, codecs.get_codec(codec).extension)
+
+    def _content_addressed_save(self, obj: Any, path: str, codec: str) -> str:
+        digest = cas.hash_object(obj)
+        blob_file_type = self._get_blob_file_type(codec)
+        if digest is None:
+            # The object cannot be hashed without serializing it, so we need
+            # to write it to a temporary blob and hash the result.
+            tmp_path = cas.get_tmp_path(get_data_dir(), blob_file_type)
+            codec = self._encoded_save(obj, tmp_path, codec)
+            digest = cas.hash_path(tmp_path)
+            blob_path = cas.get_blob_path(get_data_dir(), digest,
+                                          blob_file_type)
+            if os.path.exists(blob_path):
+                utils.rm_r(tmp_path)
+            else:
+                os.replace(tmp_path, blob_path)
+        else:
+            blob_path = cas.get_blob_path(get_data_dir(), digest,
+                                          blob_file_type)
+            if os.path.exists(blob_path):
+                log.info("Object already marshalled with digest %s. Skipping"
+                         " write.", digest)
+                if os.path.isdir(blob_path):
+                    codec = codecs.NO_CODEC
+            else:
+                # Write to a temporary path first so that a failing save never
+                # leaves a partial blob behind
+                tmp_path = cas.get_tmp_path(get_data_dir(), blob_file_type)
+                codec = self._encoded_save(obj, tmp_path, codec)
+                os.replace(tmp_path, blob_path)
+        cas.link(path, blob_path)
+        return codec
 
     def save(self, obj: Any, path: str):
         """Save `obj` to file."""
@@ -107,28 +319,64 @@ class MarshalBackend(object):
 
     @staticmethod
     def _default_save(obj: Any, path: str):
+        if buffers.IS_SUPPORTED:
+            # Write large buffers (e.g., Numpy arrays inside a dict) next to
+            # the pickle stream, to restore them without copying
+            buffers.dump(obj, path)
+            return
         import dill
         with open(path, "wb") as f:
             dill.dump(obj, f)
 
-    def wrapped_load(self, name: str) -> Any:
+    def remove(self, path: str):
+        """Remove the file or folder of a marshalled object.
+
+        Override this if the backend saves data outside of `path`.
+        """
+        utils.rm_r(path)
+
+    def wrapped_load(self, name: str, **kwargs) -> Any:
         """Wrapper around the public `load` function.
 
         This function provides common logging and exception handling for every
         class that extends the base `MarshalBackend`. `Dispatcher` calls
         directly this function instead of `load`.
+
+        Any keyword argument is forwarded to `load`, provided that the backend
+        supports it.
         """
         abs_path = os.path.join(get_data_dir(), name + "." + self.file_type)
         log.info("Loading %s file using %s: %s",
                  self.display_name, self.name, name)
+        kwargs = self._filter_load_kwargs(kwargs)
+        codec = codecs.read_codec(abs_path)
+        if codec == codecs.NO_CODEC:
+            return self._load(abs_path, kwargs)
+        with codecs.local_tmp_path(self.file_type) as tmp_path:
+            codecs.get_codec(codec).decode(abs_path, tmp_path)
+            return self._load(tmp_path, kwargs)
+
+    def _load(self, path: str, kwargs: Dict[str, Any]) -> Any:
         try:
-            return self.load(abs_path)
+            return self.load(path, **kwargs)
         except ImportError as e:
             if not self.fallback_on_missing_lib:
                 raise e
             log.warning("Failed to import %s (%s). Falling back to default "
                         "backend.", self.display_name, e)
-            return self._default_load(abs_path)  # always try the default load
+            return self._default_load(path)  # always try the default load
+
+    def _filter_load_kwargs(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        if not kwargs:
+            return kwargs
+        params = inspect.signature(self.load).parameters
+        if any(p.kind == p.VAR_KEYWORD for p in params.values()):
+            return kwargs
+        unsupported = sorted(set(kwargs.keys()) - set(params.keys()))
+        if unsupported:
+            log.warning("%s does not support the load options %s. Ignoring"
+                        " them.", self.name, unsupported)
+        return {k: v for k, v in kwargs.items() if k in params}
 
     def load(self, file_path: str) -> Any:
         """Restore `file_path` to memory."""
@@ -136,6 +384,8 @@ class MarshalBackend(object):
 
     @staticmethod
     def _default_load(file_path: str) -> Any:
+        if buffers.is_buffered_file(file_path):
+            return buffers.load(file_path)
         import dill
         return dill.load(open(file_path, "rb"))
 
@@ -171,22 +421,33 @@ class Dispatcher(object):
               attribute.
     * `load`: Dispatches to a specialized backend based on the input file path
               by filtering through the backends' `file_type` attribute.
+    * `save_many`, `load_many`: Same as `save` and `load`, but marshal
+              multiple objects concurrently using a thread pool.
 
     Users and external code are not supposed to interact directly with the
     singleton instance of this class. Rather, they should just call the
-    two publicly exposed functions `save` and `load` like so:
+    publicly exposed functions like so:
 
     ```
-    from kale.marshal import save, load
+    from kale.marshal import save, load, save_many, load_many
     ```
     """
 
+    # Used by `save_many` and `load_many` to bound the number of concurrent
+    # I/O operations
+    DEFAULT_MAX_WORKERS = 8
+
     END_USER_EXC_MSG = ("\n\nThe error was:\n%s\n\nPlease help us improve Kale"
                         " by opening a new issue at:"
                         "\nhttps://github.com/kubeflow-kale/kale/issues.")
 
+    ENTRY_POINTS_GROUP = "kale.marshal.backends"
+
     def __init__(self):
         self.backends: Dict[str, MarshalBackend] = dict()
+        self._entry_points_loaded = False
+        self._default_backend = MarshalBackend()
+        self._reset_index()
 
     def register(self, cls: Type[MarshalBackend]) -> Type[MarshalBackend]:
         """Register a new marshalling backend.
@@ -198,65 +459,387 @@ class Dispatcher(object):
         """
         if cls.__name__ not in self.backends:
             self.backends[cls.__name__] = cls()
+            self._reset_index()
         return cls
 
+    def _load_entry_points(self):
+        """Register the backends advertised by installed packages."""
+        if self._entry_points_loaded:
+            return
+        self._entry_points_loaded = True
+        for entry_point in _iter_entry_points(self.ENTRY_POINTS_GROUP):
+            try:
+                self.register(entry_point.load())
+            except Exception as e:
+                log.warning("Could not load marshal backend '%s': %s",
+                            entry_point.name, e)
+
+    def _reset_index(self):
+        # Compiled lazily by `_get_type_regexes` and `_get_file_type_index`
+        self._type_regexes: List[Tuple[Pattern, MarshalBackend]] = None
+        self._file_type_index: Dict[str, List[MarshalBackend]] = None
+        # Memoized dispatch results, keyed by the concrete type
+        self._type_index: Dict[type, MarshalBackend] = dict()
+        # Backends overriding `match_object`
+        self._object_matchers: List[MarshalBackend] = None
+
+    def _get_type_regexes(self) -> List[Tuple[Pattern, MarshalBackend]]:
+        if self._type_regexes is None:
+            # Backends without a regex are dispatched only by file type
+            self._type_regexes = [
+                (re.compile(backend.obj_type_regex), backend)
+                for backend in self.backends.values()
+                if backend.obj_type_regex]
+        return self._type_regexes
+
+    def _get_object_matchers(self) -> List[MarshalBackend]:
+        if self._object_matchers is None:
+            self._object_matchers = [
+                backend for backend in self.backends.values()
+                if (type(backend).match_object
+                    is not MarshalBackend.match_object)]
+        return self._object_matchers
+
+    def _get_file_type_index(self) -> Dict[str, List[MarshalBackend]]:
+        if self._file_type_index is None:
+            index = dict()
+            for backend in self.backends.values():
+                index.setdefault(backend.file_type, []).append(backend)
+            self._file_type_index = index
+        return self._file_type_index
+
     def get_backend(self, obj: Any):
         """Get the backend registered for the input object type."""
         return self._dispatch_obj_type(obj)
 
+    def get_matching_backends(self, obj: Any) -> List[MarshalBackend]:
+        """Get all the backends that can save `obj`, regardless of priority.
+
+        The default backend, which can save any object, is not included.
+        """
+        self._load_entry_points()
+        mro = type(obj).__mro__
+        cls_names = [_type_name(cls) for cls in mro]
+        backends = []
+        for backend in self.backends.values():
+            regex = backend.obj_type_regex
+            if ((regex and any(re.match(regex, n) for n in cls_names))
+                    or any(backend.match_type(cls) for cls in mro)
+                    or backend.match_object(obj)):
+                backends.append(backend)
+        return backends
+
     def get_backends(self) -> Dict[str, MarshalBackend]:
         """Get all registered backends."""
+        self._load_entry_points()
         # FIXME: How can we make this dict readonly? We don't want external
         # code to mess with it.
         return dict(self.backends)
 
     def get_backend_by_name(self, name: str):
         """Get a registered backend by its display name."""
+        self._load_entry_points()
         return self.backends[name]
 
-    def save(self, obj: Any, obj_name: str):
+    def save(self, obj: Any, obj_name: str, codec: str = None):
         """Save an object to file.
 
         Args:
             obj: Object to be marshalled
             obj_name: Name of the object to be saved
+            codec: Compression codec to be used for this object
         """
         try:
-            return self._dispatch_obj_type(obj).wrapped_save(obj, obj_name)
+            return self._save(obj, obj_name, codec=codec)
         except Exception as e:
-            error_msg = ("During data passing, Kale could not marshal the"
-                         " following object:\n\n  - path: '%s'\n  - type: '%s'"
-                         % (obj_name, type(obj)))
-            log.error(error_msg + self.END_USER_EXC_MSG % e)
-            log.debug("Original Traceback", exc_info=e.__traceback__)
+            self._log_save_error(obj, obj_name, e)
             utils.graceful_exit(1)
 
-    def load(self, basename: str):
+    def save_many(self, objs: Dict[str, Any],
+                  options: Dict[str, Dict[str, Any]] = None,
+                  max_workers: int = None):
+        """Save multiple objects concurrently.
+
+        Args:
+            objs: A dictionary of object names and objects to be marshalled
+            options: Per-object save options (i.e., `codec`). See `save`
+            max_workers: Maximum number of concurrent saves. Defaults to
+                `DEFAULT_MAX_WORKERS`
+
+        Returns: a dictionary of object names and paths to the saved files
+        """
+        options = options or dict()
+        paths, errors = self._run_concurrently(
+            self._save,
+            {name: (obj, name, options.get(name, dict()).get("codec"))
+             for name, obj in objs.items()},
+            max_workers)
+        if errors:
+            for name, e in errors.items():
+                self._log_save_error(objs[name], name, e)
+            utils.graceful_exit(1)
+        return paths
+
+    def _save(self, obj: Any, obj_name: str, codec: str = None):
+        obj = proxy.unwrap(obj)
+        backend = self._dispatch_obj_type(obj)
+        start = time.perf_counter()
+        path = backend.wrapped_save(obj, obj_name, codec=codec)
+        if is_summaries_enabled():
+            summary.write(path, obj)
+        else:
+            summary.remove(path)
+        self._remove_stale_entries(obj_name, path)
+        if get_storage():
+            get_storage().upload(get_data_dir(), os.path.basename(path))
+        seconds = time.perf_counter() - start
+        backend_name = self._get_backend_name(path)
+        size = utils.get_path_size(path)
+        manifest.record(get_data_dir(), obj_name, path, backend_name, size)
+        stats.record("save", obj_name, backend_name, codecs.read_codec(path),
+                     size, seconds)
+        return path
+
+    def _get_backend_name(self, path: str) -> str:
+        """Get the name of the backend that can load the file at `path`."""
+        _backends = self._get_file_type_index().get(
+            os.path.splitext(path)[1].lstrip("."), [self._default_backend])
+        return type(_backends[0]).__name__
+
+    def _remove_stale_entries(self, basename: str, path: str):
+        """Remove older files of an object saved with a different backend.
+
+        E.g., a variable that was marshalled as a list by a step and then as
+        a DataFrame by a downstream step.
+        """
+        file_types = {b.file_type for b in self.backends.values()}
+        file_types.add(MarshalBackend.file_type)
+        for file_type in file_types:
+            stale_path = os.path.join(get_data_dir(),
+                                      "%s.%s" % (basename, file_type))
+            if stale_path != path and os.path.lexists(stale_path):
+                self._remove_entry(stale_path)
+                codecs.write_codec(stale_path, codecs.NO_CODEC)
+                summary.remove(stale_path)
+
+    def delete(self, basename: str):
+        """Delete a marshalled object.
+
+        The object is removed from the data dir, along with its codec
+        annotation, its summary and its blob, if no other object points to
+        it, and from the object storage, if any.
+        """
+        data_dir = get_data_dir()
+        for entry in self._list_data_dir().get(basename, []):
+            path = os.path.join(data_dir, entry)
+            is_link = os.path.islink(path)
+            blob_path = os.path.realpath(path)
+            self._remove_entry(path)
+            if os.path.exists(codecs.get_codec_file(path)):
+                utils.rm_r(codecs.get_codec_file(path))
+            summary.remove(path)
+            if is_link:
+                cas.remove_unreferenced(data_dir, blob_path)
+        if get_storage():
+            get_storage().delete(basename)
+
+    def _remove_entry(self, path: str):
+        if os.path.islink(path):
+            # Blobs are removed once no pointer references them
+            utils.rm_r(path)
+            return
+        _backends = self._get_file_type_index().get(
+            os.path.splitext(path)[1].lstrip("."), [self._default_backend])
+        _backends[0].remove(path)
+
+    def _log_save_error(self, obj: Any, obj_name: str, e: Exception):
+        error_msg = ("During data passing, Kale could not marshal the"
+                     " following object:\n\n  - path: '%s'\n  - type: '%s'"
+                     % (obj_name, type(obj)))
+        log.error(error_msg + self.END_USER_EXC_MSG % e)
+        log.debug("Original Traceback", exc_info=e.__traceback__)
+
+    def load(self, basename: str, lazy: bool = False, **kwargs):
         """Restore a file to memory.
 
         Args:
             basename: The name of the serialized object to be loaded
+            lazy: Return a `LazyProxy` that loads the object the first time
+                it is used. The file is still looked up right away, along
+                with its summary, if any (see `describe`).
+            kwargs: Backend specific load options (e.g., `mmap_mode` for
+                Numpy arrays). Options that are not supported by the
+                dispatched backend are ignored.
 
         Returns: restored object
         """
         try:
-            entry_name = self._unique_ls(basename)
-            return self._dispatch_file_type(entry_name).wrapped_load(basename)
+            return self._load(basename, self._get_data_dir_entries(), kwargs,
+                              lazy)
         except Exception as e:
-            error_msg = ("During data passing, Kale could not load the"
-                         " following file:\n\n\n  - name: '%s'" % basename)
-            log.error(error_msg + self.END_USER_EXC_MSG % e)
-            log.debug("Original Traceback", exc_info=e.__traceback__)
+            self._log_load_error(basename, e)
             utils.graceful_exit(1)
 
+    def load_many(self, basenames: Iterable[str],
+                  options: Dict[str, Dict[str, Any]] = None,
+                  max_workers: int = None,
+                  lazy: bool = False) -> Dict[str, Any]:
+        """Restore multiple files to memory concurrently.
+
+        The data directory is listed just once for all the objects.
+
+        Args:
+            basenames: The names of the serialized objects to be loaded
+            options: Per-object backend specific load options. See `load`
+            max_workers: Maximum number of concurrent loads. Defaults to
+                `DEFAULT_MAX_WORKERS`
+            lazy: Return lazy proxies instead of loading the objects. See
+                `load`
+
+        Returns: a dictionary of object names and restored objects
+        """
+        options = options or dict()
+        try:
+            data_dir_entries = self._get_data_dir_entries()
+        except Exception as e:
+            self._log_load_error(", ".join(basenames), e)
+            utils.graceful_exit(1)
+        objs, errors = self._run_concurrently(
+            self._load,
+            {name: (name, data_dir_entries, options.get(name, dict()), lazy)
+             for name in basenames},
+            # Proxies do not load their objects, but the objects are still
+            # downloaded from the object storage, if any
+            max_workers if not lazy or get_storage() else 1)
+        if errors:
+            for name, e in errors.items():
+                self._log_load_error(name, e)
+            utils.graceful_exit(1)
+        return objs
+
+    def _load(self, basename: str, data_dir_entries: Dict[str, List[str]],
+              kwargs: Dict[str, Any], lazy: bool = False):
+        start = time.perf_counter()
+        # Looking up the object includes downloading it from the storage
+        entry_name = self._get_entry_name(basename, data_dir_entries)
+        lookup_seconds = time.perf_counter() - start
+        backend = self._dispatch_file_type(entry_name)
+        if not lazy:
+            return self._timed_load(backend, basename, entry_name, kwargs,
+                                    lookup_seconds)
+
+        def _lazy_load():
+            try:
+                return self._timed_load(backend, basename, entry_name, kwargs,
+                                        lookup_seconds)
+            except Exception as e:
+                self._log_load_error(basename, e)
+                raise
+        return proxy.LazyProxy(_lazy_load, summary=summary.read(
+            os.path.join(get_data_dir(), entry_name)))
+
+    def describe(self, obj: Any) -> Dict[str, Any]:
+        """Describe an object without loading it.
+
+        Args:
+            obj: A lazy proxy, as returned by `load(..., lazy=True)`, or any
+                other object
+
+        Returns: the summary of the object (type, shape, dtype, size and
+            repr). Proxies that have not been loaded yet are described by
+            the summary saved along with their object, if any.
+        """
+        obj_summary = proxy.get_summary(obj)
+        if obj_summary is not None and not proxy.is_loaded(obj):
+            return obj_summary
+        return summary.summarize(proxy.unwrap(obj))
+
+    @staticmethod
+    def _timed_load(backend: MarshalBackend, basename: str, entry_name: str,
+                    kwargs: Dict[str, Any], lookup_seconds: float):
+        start = time.perf_counter()
+        obj = backend.wrapped_load(basename, **kwargs)
+        seconds = time.perf_counter() - start + lookup_seconds
+        path = os.path.join(get_data_dir(), entry_name)
+        stats.record("load", basename, type(backend).__name__,
+                     codecs.read_codec(path), utils.get_path_size(path),
+                     seconds)
+        return obj
+
+    def _log_load_error(self, basename: str, e: Exception):
+        error_msg = ("During data passing, Kale could not load the"
+                     " following file:\n\n\n  - name: '%s'" % basename)
+        log.error(error_msg + self.END_USER_EXC_MSG % e)
+        log.debug("Original Traceback", exc_info=e.__traceback__)
+
+    def _run_concurrently(self, fn: Callable, args: Dict[str, tuple],
+                          max_workers: int = None):
+        """Run `fn` over multiple sets of arguments using a thread pool.
+
+        Returns: two dictionaries with the results and the exceptions of the
+            successful and failed calls, respectively, keyed as `args`.
+        """
+        max_workers = min(max_workers or self.DEFAULT_MAX_WORKERS, len(args))
+        results, errors = dict(), dict()
+        if max_workers <= 1:
+            # No need to spawn threads for a single object
+            for name, _args in args.items():
+                try:
+                    results[name] = fn(*_args)
+                except Exception as e:
+                    errors[name] = e
+            return results, errors
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {name: pool.submit(fn, *_args)
+                       for name, _args in args.items()}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                errors[name] = e
+        return results, errors
+
+    def _get_data_dir_entries(self) -> Dict[str, List[str]]:
+        """Get the files and folders of the data dir, grouped by basename.
+
+        Read them from the manifest of the data dir, if present, so that the
+        data dir does not need to be listed.
+        """
+        if get_storage():
+            # Objects are looked up in the bucket
+            return dict()
+        entries = manifest.read(get_data_dir())
+        if entries is None:
+            return self._list_data_dir()
+        return {name: [entry["file"]] for name, entry in entries.items()}
+
+    def _get_entry_name(self, basename: str,
+                        data_dir_entries: Dict[str, List[str]]) -> str:
+        if get_storage():
+            return get_storage().download(get_data_dir(), basename)
+        entries = data_dir_entries.get(basename, [])
+        if (len(entries) == 1
+                and os.path.lexists(os.path.join(get_data_dir(), entries[0]))):
+            return entries[0]
+        # The object is missing from the manifest (e.g., it was saved by an
+        # older version of Kale) or is ambiguous: scan the data dir
+        return self._unique_ls(basename, self._list_data_dir())
+
     @staticmethod
-    def _unique_ls(basename: str):
+    def _list_data_dir() -> Dict[str, List[str]]:
+        """Group the files and folders of the data dir by basename."""
+        entries = dict()
+        for ls in os.listdir(get_data_dir()):
+            if (os.path.isfile(os.path.join(get_data_dir(), ls))
+                    or os.path.isdir(os.path.join(get_data_dir(), ls))):
+                entries.setdefault(os.path.splitext(ls)[0], []).append(ls)
+        return entries
+
+    @staticmethod
+    def _unique_ls(basename: str, data_dir_entries: Dict[str, List[str]]):
         # get the unique file/folder inside _DATA_DIR: there could be
         # multiple files with the same name and different extension.
-        entries = [ls for ls in os.listdir(get_data_dir())
-                   if ((os.path.isfile(os.path.join(get_data_dir(), ls))
-                        or os.path.isdir(os.path.join(get_data_dir(), ls)))
-                       and os.path.splitext(ls)[0] == basename)]
+        entries = data_dir_entries.get(basename, [])
         if not entries:
             raise ValueError("No file or folder found with basename '%s'"
                              % basename)
@@ -268,30 +851,52 @@ class Dispatcher(object):
     def _dispatch_obj_type(self, obj: Any) -> MarshalBackend:
         """Dispatch to a backend based on the object's type matching regex.
 
+        The classes in the MRO of the object's type are matched in order
+        against the backends' `obj_type_regex`, so the backend registered for
+        the closest class wins. Conflicts between backends matching the same
+        class are resolved by their `priority`. The result is memoized per
+        type. Objects of types that no backend matches are offered to the
+        backends' `match_object`.
+
         Args:
             obj: any Python object
         """
-        # object types are printed as <class 'obj type'>
-        _type = re.sub(r"'>$", "",
-                       re.sub(r"^<class '", "",
-                              str(type(obj))))
-        # type of base class
-        _type_base = re.sub(r"'>$", "",
-                            re.sub(r"^<class '", "",
-                                   str(obj.__class__.__bases__[0])))
-        _backends = [backend for backend in self.backends.values()
-                     if re.match(backend.obj_type_regex, _type)
-                     or re.match(backend.obj_type_regex, _type_base)]
-        if len(_backends) > 1:
-            raise RuntimeError("Too many matching marshalling backends for"
-                               " object type %s (base type %s): %s"
-                               % (_type, _type_base, _backends))
-        if not _backends:
-            log.warning("No backends found for type %s (%s). Falling back to"
-                        " default backend." % (_type, _type_base))
-            return MarshalBackend()
-        else:
+        _type = type(obj)
+        try:
+            backend = self._type_index[_type]
+        except KeyError:
+            backend = self._type_index[_type] = self._match_type(_type)
+        if backend is None:
+            for matcher in self._get_object_matchers():
+                if matcher.match_object(obj):
+                    return matcher
+            log.warning("No backends found for type %s. Falling back to"
+                        " default backend." % _type_name(_type))
+            return self._default_backend
+        return backend
+
+    def _match_type(self, _type: type) -> Optional[MarshalBackend]:
+        self._load_entry_points()
+        regexes = self._get_type_regexes()
+        for cls in _type.__mro__:
+            cls_name = _type_name(cls)
+            _backends = [backend for regex, backend in regexes
+                         if regex.match(cls_name)]
+            _backends += [backend for backend in self.backends.values()
+                          if backend not in _backends
+                          and backend.match_type(cls)]
+            if not _backends:
+                continue
+            priority = max(backend.priority for backend in _backends)
+            _backends = [backend for backend in _backends
+                         if backend.priority == priority]
+            if len(_backends) > 1:
+                raise RuntimeError("Too many matching marshalling backends"
+                                   " for object type %s (matching class %s):"
+                                   " %s" % (_type_name(_type), cls_name,
+                                            _backends))
             return _backends[0]
+        return None
 
     def _dispatch_file_type(self, filename: str) -> MarshalBackend:
         """Dispatch to a backend based on the matching file type.
@@ -303,9 +908,9 @@ class Dispatcher(object):
         Args:
             filename (str): filename whose extension must be matched.
         """
-        _backends = [
-            backend for backend in self.backends.values()
-            if os.path.splitext(filename)[1].lstrip(".") == backend.file_type]
+        self._load_entry_points()
+        _backends = self._get_file_type_index().get(
+            os.path.splitext(filename)[1].lstrip("."), [])
         if len(_backends) > 1:
             raise RuntimeError("Too many matching marshalling backends for"
                                " file %s : %s" % (os.path.basename(filename),
@@ -313,6 +918,25 @@ class Dispatcher(object):
         if not _backends:
             log.warning("No backends found for '%s'. Falling back to default"
                         " backend." % filename)
-            return MarshalBackend()
+            return self._default_backend
         else:
             return _backends[0]
+
+
+def _type_name(cls: type) -> str:
+    """Get the fully qualified name of a class, e.g. 'numpy.ndarray'."""
+    if cls.__module__ == "builtins":
+        return cls.__qualname__
+    return "%s.%s" % (cls.__module__, cls.__qualname__)
+
+
+def _iter_entry_points(group: str):
+    try:
+        from importlib import metadata
+    except ImportError:  # Python < 3.8
+        import pkg_resources
+        return list(pkg_resources.iter_entry_points(group))
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        return list(entry_points.select(group=group))
+    return list(entry_points.get(group, []))
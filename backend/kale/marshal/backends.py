@@ -12,9 +12,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import sys
+import json
+import mmap
+import struct
 import logging
 
-from kale.marshal.backend import get_dispatcher, MarshalBackend
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Tuple
+
+from kale.common import utils
+from kale.marshal import codecs
+from kale.marshal.backend import get_dispatcher, get_data_dir, MarshalBackend
 
 
 log = logging.getLogger(__name__)
@@ -64,35 +74,577 @@ class NumpyBackend(MarshalBackend):
     display_name = "numpy"
     file_type = "npy"
     obj_type_regex = r"numpy\..*"
+    # Memory-map arrays instead of reading them in memory. Either None, "r"
+    # (read-only) or "c" (copy-on-write: pages are copied in memory only when
+    # the array is written to, while the file stays untouched).
+    mmap_mode: str = None
 
     def save(self, obj, path):
         """Save a Numpy object."""
         import numpy as np
         np.save(path, obj)
 
-    def load(self, file_path):
-        """Restore a Numpy object."""
+    def load(self, file_path, mmap_mode=None):
+        """Restore a Numpy object.
+
+        Args:
+            file_path: Path to the `.npy` file
+            mmap_mode: Override the backend's `mmap_mode` for this object.
+                Use an empty string to read the whole array in memory.
+        """
         import numpy as np
-        return np.load(file_path)
+        if mmap_mode is None:
+            mmap_mode = self.mmap_mode
+        return np.load(file_path, mmap_mode=mmap_mode or None)
 
 
 @register_backend
 class PandasBackend(MarshalBackend):
-    """Marshal Pandas objects."""
+    """Marshal Pandas objects.
+
+    When `pyarrow` is installed, objects are saved in the Arrow IPC (Feather)
+    format by `PandasArrowBackend`. Objects that cannot be restored exactly
+    from Arrow (e.g., columns with mixed types, or object columns holding
+    lists or dicts) are pickled.
+    """
     name = "Pandas backend"
     display_name = "pandas"
     file_type = "pdpkl"
     obj_type_regex = r"pandas\..*(DataFrame|Series)"
+    # Set to False to always pickle Pandas objects
+    prefer_arrow = True
+
+    def wrapped_save(self, obj, name, codec=None):
+        """Save a Pandas object, preferring the Arrow format."""
+        path = get_dispatcher().get_backend_by_name(
+            "DeltaBackend").try_save(obj, name, codec=codec)
+        if path:
+            return path
+        if self.prefer_arrow:
+            arrow_backend = get_dispatcher().get_backend_by_name(
+                "PandasArrowBackend")
+            try:
+                return arrow_backend.wrapped_save(obj, name, codec=codec)
+            except ImportError as e:
+                log.debug("Cannot save object using %s: %s",
+                          arrow_backend.name, e)
+            except Exception as e:
+                log.info("Cannot convert object to Arrow (%s). Falling back"
+                         " to pickle.", e)
+        return super().wrapped_save(obj, name, codec=codec)
 
     def save(self, obj, path):
         """Save a Pandas object."""
         import pandas as pd  # noqa: F401
         obj.to_pickle(path)
 
+    def load(self, file_path, columns=None):
+        """Restore a Pandas object.
+
+        Args:
+            file_path: Path to the pickle file
+            columns: Restore just these columns of a DataFrame
+        """
+        import pandas as pd
+        obj = pd.read_pickle(file_path)
+        if columns is not None:
+            obj = obj[columns]
+        return obj
+
+
+@register_backend
+class PandasArrowBackend(MarshalBackend):
+    """Marshal Pandas objects in the Arrow IPC (Feather) format.
+
+    Conversion to and from Arrow is multithreaded and loading supports
+    reading just a subset of the columns. This backend is not dispatched
+    based on the object type: `PandasBackend` selects it when `pyarrow` is
+    available.
+    """
+    name = "Pandas Arrow backend"
+    display_name = "pandas"
+    file_type = "feather"
+    obj_type_regex = None
+    # The pickle fallback is handled by PandasBackend
+    fallback_on_missing_lib = False
+
+    # Schema metadata used to restore Series objects
+    SERIES_METADATA_KEY = b"kale.pandas.series"
+
+    def save(self, obj, path):
+        """Save a Pandas object."""
+        import pyarrow.feather as feather
+        feather.write_feather(self.to_table(obj), path)
+
+    def to_table(self, obj):
+        """Convert a Pandas object to an Arrow table."""
+        import pandas as pd
+        import pyarrow as pa
+        metadata = None
+        if isinstance(obj, pd.Series):
+            metadata = {self.SERIES_METADATA_KEY:
+                        b"unnamed" if obj.name is None else b"named"}
+            obj = obj.to_frame(name=0 if obj.name is None else obj.name)
+        if len({type(c) for c in obj.columns}) > 1:
+            # Arrow would convert them to strings
+            raise TypeError("Column names of mixed types cannot be"
+                            " restored from Arrow")
+        table = pa.Table.from_pandas(obj)
+        # Data columns come first in the schema, then the index
+        for dtype, field in zip(obj.dtypes, table.schema):
+            if dtype == object and (pa.types.is_integer(field.type)
+                                    or pa.types.is_floating(field.type)
+                                    or pa.types.is_boolean(field.type)):
+                raise TypeError("Column '%s' would not be restored with the"
+                                " object dtype" % field.name)
+        for field in table.schema:
+            if pa.types.is_nested(field.type):
+                # e.g., lists come back as arrays and dicts gain keys
+                raise TypeError("Column '%s' holds nested objects that"
+                                " cannot be restored from Arrow"
+                                % field.name)
+        if metadata:
+            table = table.replace_schema_metadata(
+                {**table.schema.metadata, **metadata})
+        return table
+
+    def load(self, file_path, columns=None):
+        """Restore a Pandas object.
+
+        Args:
+            file_path: Path to the Feather file
+            columns: Restore just these columns of a DataFrame
+        """
+        import pyarrow.feather as feather
+        return self.from_table(feather.read_table(
+            file_path, columns=columns, memory_map=True, use_threads=True))
+
+    def from_table(self, table):
+        """Convert an Arrow table created by `to_table` to a Pandas object."""
+        obj = table.to_pandas(use_threads=True)
+        series = (table.schema.metadata or {}).get(self.SERIES_METADATA_KEY)
+        if series:
+            obj = obj.iloc[:, 0]
+            if series == b"unnamed":
+                obj.name = None
+        return obj
+
+
+@register_backend
+class ArrowBackend(MarshalBackend):
+    """Marshal Arrow tables and record batches in the Arrow IPC format."""
+    name = "Arrow backend"
+    display_name = "pyarrow"
+    file_type = "arrow"
+    obj_type_regex = r"pyarrow\.lib\.(Table|RecordBatch)$"
+
+    # Schema metadata used to restore record batches
+    RECORD_BATCH_METADATA_KEY = b"kale.arrow.record_batch"
+
+    def wrapped_save(self, obj, name, codec=None):
+        """Save an Arrow table as a delta, if enabled, or in full."""
+        path = get_dispatcher().get_backend_by_name(
+            "DeltaBackend").try_save(obj, name, codec=codec)
+        return path or super().wrapped_save(obj, name, codec=codec)
+
+    def save(self, obj, path):
+        """Save an Arrow table or record batch."""
+        import pyarrow as pa
+        if isinstance(obj, pa.RecordBatch):
+            obj = obj.replace_schema_metadata(
+                {**(obj.schema.metadata or {}),
+                 self.RECORD_BATCH_METADATA_KEY: b"1"})
+        with pa.OSFile(path, "wb") as sink:
+            with pa.ipc.new_file(sink, obj.schema) as writer:
+                writer.write(obj)
+
     def load(self, file_path):
-        """Restore a Pandas object."""
+        """Restore an Arrow table or record batch, memory-mapping the file."""
+        import pyarrow as pa
+        reader = pa.ipc.open_file(pa.memory_map(file_path))
+        metadata = dict(reader.schema.metadata or {})
+        if metadata.pop(self.RECORD_BATCH_METADATA_KEY, None) is None:
+            return reader.read_all()
+        return reader.get_batch(0).replace_schema_metadata(metadata or None)
+
+
+@register_backend
+class DeltaBackend(MarshalBackend):
+    """Marshal tabular objects as deltas of their previous version.
+
+    A delta is a folder with:
+
+    * `delta.json`: the columns of the object, the digest of each column and
+      the path to the base (the previous version of the object), if any.
+    * `schema.arrow`: the Arrow schema of the whole object.
+    * `columns.arrow`: the columns that are not in the base, in the Arrow
+      IPC format.
+
+    When saving an object whose name already has a delta in the data
+    directory, the old delta is moved to `<data_dir>/.kale.delta` and becomes
+    the base of the new one, provided that they share some columns. Columns
+    are matched by the digest of their data, so renamed columns are not
+    written again either. Loading memory-maps the files of the delta and of
+    its bases and reassembles the object.
+
+    This backend is not dispatched based on the object type: `PandasBackend`
+    and `ArrowBackend` select it for Pandas DataFrames and Arrow tables when
+    delta marshalling is enabled (see `kale.marshal.set_delta`).
+    """
+    name = "Delta backend"
+    display_name = "delta"
+    file_type = "delta"
+    obj_type_regex = None
+    fallback_on_missing_lib = False
+
+    BASES_DIR_NAME = ".kale.delta"
+    METADATA_FILE_NAME = "delta.json"
+    SCHEMA_FILE_NAME = "schema.arrow"
+    COLUMNS_FILE_NAME = "columns.arrow"
+    KIND_PANDAS = "pandas"
+    KIND_ARROW = "arrow"
+
+    def try_save(self, obj, name, codec=None):
+        """Save an object as a delta, if enabled and supported.
+
+        Deltas are not compressed, content-addressed or uploaded to an object
+        storage, so they are used only when none of these applies.
+
+        Returns: the path to the saved delta, or None if the object has to
+            be saved in full by the calling backend
+        """
+        from kale.marshal.backend import (is_delta_enabled, get_codec,
+                                          get_storage, is_content_addressed)
+
+        if (not is_delta_enabled() or is_content_addressed() or get_storage()
+                or codecs.resolve_codec(codec or get_codec())
+                != codecs.NO_CODEC):
+            return None
+        try:
+            return self.wrapped_save(obj, name)
+        except Exception as e:
+            log.info("Cannot save %s as a delta (%s). Saving it in full.",
+                     name, e)
+            return None
+
+    def wrapped_save(self, obj, name, codec=None):
+        """Save a delta directly to the data directory."""
+        path = os.path.join(get_data_dir(), name + "." + self.file_type)
+        log.info("Saving %s object using %s: %s",
+                 self.display_name, self.name, name)
+        kind, table = self._to_table(obj)
+        if len(set(table.column_names)) != len(table.column_names):
+            raise ValueError("Duplicate column names")
+        columns = [{"name": column_name, "digest": self._hash_column(column)}
+                   for column_name, column in zip(table.column_names,
+                                                  table.columns)]
+        base_columns = self._get_base_columns(path)
+        for column in columns:
+            column["base_column"] = base_columns.get(column["digest"])
+        base_path = None
+        if any(column["base_column"] for column in columns):
+            # The previous version of the object becomes the base
+            base_path = os.path.join(
+                get_data_dir(), self.BASES_DIR_NAME,
+                "%s-%s.%s" % (name, utils.random_string(10), self.file_type))
+
+        tmp_path = os.path.join(get_data_dir(), ".%s.tmp-%s"
+                                % (os.path.basename(path),
+                                   utils.random_string(10)))
+        try:
+            self._write(tmp_path, kind, table, columns, base_path)
+        except BaseException:
+            utils.rm_r(tmp_path, silent=True)
+            raise
+        if base_path:
+            os.makedirs(os.path.dirname(base_path), exist_ok=True)
+            os.replace(path, base_path)
+        elif os.path.lexists(path):
+            self.remove(path)
+        os.replace(tmp_path, path)
+        codecs.write_codec(path, codecs.NO_CODEC)
+        log.info("Wrote %d out of %d columns of %s", sum(
+            1 for c in columns if not c["base_column"]), len(columns), name)
+        return path
+
+    def _to_table(self, obj):
+        import pyarrow as pa
+        if isinstance(obj, pa.Table):
+            return self.KIND_ARROW, obj
         import pandas as pd
-        return pd.read_pickle(file_path)
+        if isinstance(obj, pd.DataFrame):
+            return self.KIND_PANDAS, get_dispatcher().get_backend_by_name(
+                "PandasArrowBackend").to_table(obj)
+        raise TypeError("Unsupported object type: %s" % type(obj))
+
+    @staticmethod
+    def _hash_column(column) -> str:
+        """Compute the digest of the data of an Arrow column.
+
+        Sliced arrays share their buffers with the whole array, so the
+        offset and the length of each chunk are hashed along with them.
+        """
+        import hashlib
+        import pyarrow as pa
+        from kale.marshal import cas
+        if pa.types.is_nested(column.type) or pa.types.is_dictionary(
+                column.type):
+            # Child arrays have offsets of their own. Never match them.
+            return "unhashable-%s" % utils.random_string(16)
+        hasher = hashlib.new(cas.HASH_ALGORITHM)
+        hasher.update(str(column.type).encode())
+        for chunk in column.chunks:
+            hasher.update(struct.pack("<qqq", chunk.offset, len(chunk),
+                                      chunk.null_count))
+            for buf in chunk.buffers():
+                if buf is None:
+                    hasher.update(struct.pack("<q", -1))
+                    continue
+                hasher.update(struct.pack("<q", buf.size))
+                hasher.update(memoryview(buf))
+        return hasher.hexdigest()
+
+    def _get_base_columns(self, path) -> Dict[str, str]:
+        """Get the columns of the delta at `path`, keyed by digest."""
+        try:
+            metadata = self._read_metadata(path)
+        except (OSError, ValueError):
+            return dict()
+        return {column["digest"]: column["name"]
+                for column in metadata["columns"]}
+
+    def _write(self, path, kind, table, columns, base_path):
+        import pyarrow as pa
+        os.makedirs(path)
+        with pa.OSFile(os.path.join(path, self.SCHEMA_FILE_NAME), "wb") as f:
+            f.write(table.schema.serialize())
+        new_columns = table.select([column["name"] for column in columns
+                                    if not column["base_column"]])
+        with pa.OSFile(os.path.join(path, self.COLUMNS_FILE_NAME),
+                       "wb") as sink:
+            with pa.ipc.new_file(sink, new_columns.schema) as writer:
+                writer.write(new_columns)
+        with open(os.path.join(path, self.METADATA_FILE_NAME), "w") as f:
+            json.dump({"kind": kind, "columns": columns,
+                       "base": base_path and os.path.basename(base_path)}, f)
+
+    def _read_metadata(self, path) -> Dict[str, Any]:
+        with open(os.path.join(path, self.METADATA_FILE_NAME)) as f:
+            return json.load(f)
+
+    def _get_base_path(self, path, metadata):
+        if not metadata.get("base"):
+            return None
+        # Bases live in the bases dir, next to the top-level delta
+        bases_dir = (os.path.dirname(path)
+                     if os.path.basename(os.path.dirname(path))
+                     == self.BASES_DIR_NAME
+                     else os.path.join(os.path.dirname(path),
+                                       self.BASES_DIR_NAME))
+        return os.path.join(bases_dir, metadata["base"])
+
+    def load(self, file_path, columns=None):
+        """Restore a delta.
+
+        Args:
+            file_path: Path to the delta folder
+            columns: Restore just these columns
+        """
+        import pyarrow as pa
+        metadata = self._read_metadata(file_path)
+        schema = pa.ipc.read_schema(pa.memory_map(
+            os.path.join(file_path, self.SCHEMA_FILE_NAME)))
+        if columns is not None and metadata["kind"] == self.KIND_PANDAS:
+            # Restore the index along with the columns
+            index_columns = [c for c in (schema.pandas_metadata or {})
+                             .get("index_columns", [])
+                             if isinstance(c, str) and c not in columns]
+            columns = list(columns) + index_columns
+        table = self._read_table(file_path, metadata, columns)
+        table = pa.Table.from_arrays(
+            table.columns, schema=pa.schema(
+                [schema.field(name) for name in table.column_names],
+                metadata=schema.metadata))
+        if metadata["kind"] == self.KIND_ARROW:
+            return table
+        return get_dispatcher().get_backend_by_name(
+            "PandasArrowBackend").from_table(table)
+
+    def _read_table(self, path, metadata, columns=None):
+        """Reassemble the columns of a delta from its files and its bases."""
+        import pyarrow as pa
+        entries = OrderedDict((column["name"], column)
+                              for column in metadata["columns"])
+        names = list(entries) if columns is None else list(columns)
+        missing = [name for name in names if name not in entries]
+        if missing:
+            raise KeyError("Columns not found: %s" % missing)
+        own = pa.ipc.open_file(pa.memory_map(
+            os.path.join(path, self.COLUMNS_FILE_NAME))).read_all()
+        base_names = [entries[name]["base_column"] for name in names
+                      if entries[name]["base_column"]]
+        base = None
+        if base_names:
+            base_path = self._get_base_path(path, metadata)
+            base = self._read_table(base_path,
+                                    self._read_metadata(base_path),
+                                    list(OrderedDict.fromkeys(base_names)))
+        arrays = [base.column(entries[name]["base_column"])
+                  if entries[name]["base_column"] else own.column(name)
+                  for name in names]
+        return pa.Table.from_arrays(arrays, names=names)
+
+    def remove(self, path):
+        """Remove a delta, along with its bases."""
+        try:
+            metadata = self._read_metadata(path)
+        except (OSError, ValueError):
+            metadata = dict()
+        base_path = self._get_base_path(path, metadata)
+        if base_path and os.path.lexists(base_path):
+            self.remove(base_path)
+        utils.rm_r(path)
+
+
+@register_backend
+class ScipySparseBackend(MarshalBackend):
+    """Marshal SciPy sparse matrices and arrays.
+
+    The object is saved as a folder with one `.npy` file per component array
+    (e.g., `data`, `indices` and `indptr` of a CSR matrix), so that the
+    arrays can be memory-mapped on load. Formats without component arrays
+    (LIL, DOK) are saved as CSR and converted back on load.
+    """
+    name = "SciPy sparse backend"
+    display_name = "scipy"
+    file_type = "sparse"
+    obj_type_regex = r"scipy\.sparse\..*_(matrix|array)$"
+    # See `NumpyBackend.mmap_mode`
+    mmap_mode: str = None
+
+    METADATA_FILE_NAME = "sparse.json"
+    COMPONENTS = {"csr": ("data", "indices", "indptr"),
+                  "csc": ("data", "indices", "indptr"),
+                  "bsr": ("data", "indices", "indptr"),
+                  "coo": ("data", "row", "col"),
+                  "dia": ("data", "offsets")}
+
+    def save(self, obj, path):
+        """Save a SciPy sparse matrix or array.
+
+        The components are written to a temporary folder, which then
+        replaces any previous version of the object.
+        """
+        import scipy.sparse  # noqa: F401
+        tmp_path = os.path.join(os.path.dirname(path), ".%s.tmp-%s"
+                                % (os.path.basename(path),
+                                   utils.random_string(10)))
+        try:
+            self._write(obj, tmp_path)
+        except BaseException:
+            utils.rm_r(tmp_path, silent=True)
+            raise
+        if os.path.lexists(path):
+            utils.rm_r(path)
+        os.replace(tmp_path, path)
+
+    def _write(self, obj, path):
+        import numpy as np
+        fmt = obj.format
+        if fmt not in self.COMPONENTS:
+            obj = obj.tocsr()
+        os.makedirs(path)
+        for component in self.COMPONENTS[obj.format]:
+            np.save(os.path.join(path, component + ".npy"),
+                    getattr(obj, component))
+        with open(os.path.join(path, self.METADATA_FILE_NAME), "w") as f:
+            json.dump({"class": type(obj).__name__,
+                       "format": obj.format,
+                       "original_format": fmt,
+                       "shape": list(obj.shape)}, f)
+
+    def load(self, file_path, mmap_mode=None):
+        """Restore a SciPy sparse matrix or array.
+
+        Args:
+            file_path: Path to the folder of the component arrays
+            mmap_mode: Override the backend's `mmap_mode` for this object.
+                Use an empty string to read the arrays in memory.
+        """
+        import numpy as np
+        import scipy.sparse
+        if mmap_mode is None:
+            mmap_mode = self.mmap_mode
+        with open(os.path.join(file_path, self.METADATA_FILE_NAME)) as f:
+            metadata = json.load(f)
+        fmt = metadata["format"]
+        arrays = [np.load(os.path.join(file_path, component + ".npy"),
+                          mmap_mode=mmap_mode or None)
+                  for component in self.COMPONENTS[fmt]]
+        # e.g., csr_array when saving a csr_array, even if it was converted
+        # from a lil_array
+        kind = metadata["class"].rsplit("_", 1)[-1]
+        cls = getattr(scipy.sparse, "%s_%s" % (fmt, kind), None)
+        if cls is None:  # sparse arrays are not available in this version
+            cls = getattr(scipy.sparse, "%s_matrix" % fmt)
+        shape = tuple(metadata["shape"])
+        if fmt == "coo":
+            obj = cls((arrays[0], (arrays[1], arrays[2])), shape=shape)
+        else:
+            obj = cls(tuple(arrays), shape=shape)
+        if metadata["original_format"] != fmt:
+            obj = obj.asformat(metadata["original_format"])
+        return obj
+
+
+@register_backend
+class PolarsBackend(MarshalBackend):
+    """Marshal Polars DataFrames in the Arrow IPC format.
+
+    The file is memory-mapped on load and supports reading just a subset of
+    the columns.
+    """
+    name = "Polars backend"
+    display_name = "polars"
+    file_type = "plipc"
+    obj_type_regex = r"polars\.dataframe\.frame\.DataFrame$"
+
+    def save(self, obj, path):
+        """Save a Polars DataFrame."""
+        import polars as pl  # noqa: F401
+        # Compressed files cannot be memory-mapped
+        obj.write_ipc(path, compression="uncompressed")
+
+    def load(self, file_path, columns=None):
+        """Restore a Polars DataFrame.
+
+        Args:
+            file_path: Path to the Arrow IPC file
+            columns: Restore just these columns
+        """
+        import polars as pl
+        # Uncompressed files are memory-mapped by default. The `memory_map`
+        # argument was removed in Polars 2.
+        return pl.read_ipc(file_path, columns=columns)
+
+
+@register_backend
+class PolarsSeriesBackend(MarshalBackend):
+    """Marshal Polars Series as single-column Arrow IPC files."""
+    name = "Polars Series backend"
+    display_name = "polars"
+    file_type = "plseries"
+    obj_type_regex = r"polars\.series\.series\.Series$"
+
+    def save(self, obj, path):
+        """Save a Polars Series."""
+        import polars as pl  # noqa: F401
+        obj.to_frame().write_ipc(path, compression="uncompressed")
+
+    def load(self, file_path):
+        """Restore a Polars Series."""
+        import polars as pl
+        return pl.read_ipc(file_path).to_series()
 
 
 @register_backend
@@ -134,35 +686,243 @@ class XGBoostDMatrixBackend(MarshalBackend):
         return xgb.DMatrix(file_path)
 
 
+# Map the dtypes of the safetensors format to the names of the torch dtypes
+_SAFETENSORS_DTYPES = {"F64": "float64", "F32": "float32", "F16": "float16",
+                       "BF16": "bfloat16", "F8_E4M3": "float8_e4m3fn",
+                       "F8_E5M2": "float8_e5m2", "I64": "int64",
+                       "I32": "int32", "I16": "int16", "I8": "int8",
+                       "U64": "uint64", "U32": "uint32", "U16": "uint16",
+                       "U8": "uint8", "BOOL": "bool", "C64": "complex64"}
+
+
+def _is_torch_tensor(obj: Any) -> bool:
+    # Do not import torch just to find out that `obj` is not a tensor
+    torch = sys.modules.get("torch")
+    return (torch is not None
+            and type(obj) in (torch.Tensor, torch.nn.Parameter))
+
+
+def _to_storable(tensors: Dict[str, Any]) -> Dict[str, Any]:
+    """Prepare tensors to be written with safetensors.
+
+    safetensors writes contiguous CPU tensors that do not share memory, so
+    views of the same storage (e.g., tied weights) are copied.
+    """
+    storable = dict()
+    storages = set()
+    for key, tensor in tensors.items():
+        tensor = tensor.detach().cpu()
+        storage = tensor.untyped_storage().data_ptr()
+        if not tensor.is_contiguous():
+            tensor = tensor.contiguous()
+        elif storage in storages:
+            tensor = tensor.clone()
+        storages.add(tensor.untyped_storage().data_ptr())
+        storable[key] = tensor
+    return storable
+
+
+def _save_safetensors(tensors: Dict[str, Any], path: str,
+                      metadata: Dict[str, str] = None):
+    from safetensors.torch import save_file
+    save_file(_to_storable(tensors), path, metadata=metadata)
+
+
+def _load_safetensors(path: str) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """Memory-map the tensors of a safetensors file.
+
+    The mapping is copy-on-write, so the tensors can be modified without
+    touching the file.
+
+    Returns: the tensors and the metadata of the file
+    """
+    import torch
+
+    with open(path, "rb") as f:
+        # ACCESS_COPY makes the mapped tensors writable, copy-on-write
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    view = memoryview(mm)
+    header_size = struct.unpack("<Q", view[:8])[0]
+    header = json.loads(bytes(view[8:8 + header_size]))
+    metadata = header.pop("__metadata__", None) or dict()
+    data = view[8 + header_size:]
+    tensors = dict()
+    for key, info in header.items():
+        dtype = getattr(torch, _SAFETENSORS_DTYPES.get(info["dtype"], ""),
+                        None)
+        if dtype is None:
+            raise ValueError("Unsupported dtype '%s' of tensor '%s' in %s"
+                             % (info["dtype"], key, path))
+        start, end = info["data_offsets"]
+        if start == end:
+            tensors[key] = torch.empty(info["shape"], dtype=dtype)
+        else:
+            tensors[key] = torch.frombuffer(
+                data[start:end], dtype=dtype).reshape(info["shape"])
+    return tensors, metadata
+
+
+@register_backend
+class PyTorchTensorBackend(MarshalBackend):
+    """Marshal PyTorch tensors and state dicts with safetensors.
+
+    Tensors are written without pickling and are memory-mapped on load.
+    State dicts (dicts of tensors) are matched by their contents. Tensors
+    are always restored on the CPU.
+    """
+    name = "PyTorch tensor backend"
+    display_name = "pytorch"
+    file_type = "safetensors"
+    obj_type_regex = r"torch\.(Tensor|nn\.parameter\.Parameter)$"
+
+    _TENSOR_KEY = "tensor"
+    _KIND_KEY = "kale.torch.kind"
+    _KEYS_KEY = "kale.torch.keys"
+    _REQUIRES_GRAD_KEY = "kale.torch.requires_grad"
+    # The `_metadata` attribute of state dicts, holding the modules' versions
+    _STATE_DICT_METADATA_KEY = "kale.torch.state_dict_metadata"
+
+    def match_object(self, obj):
+        """Match state dicts, i.e. dicts of tensors."""
+        return (isinstance(obj, dict) and len(obj) > 0
+                and all(isinstance(k, str) and _is_torch_tensor(v)
+                        for k, v in obj.items()))
+
+    def save(self, obj, path):
+        """Save a PyTorch tensor or state dict."""
+        import torch
+        if isinstance(obj, dict):
+            tensors = obj
+            kind = "dict" if type(obj) is dict else "state_dict"
+        else:
+            tensors = {self._TENSOR_KEY: obj}
+            kind = ("parameter" if isinstance(obj, torch.nn.Parameter)
+                    else "tensor")
+        metadata = {self._KIND_KEY: kind,
+                    self._KEYS_KEY: json.dumps(list(tensors)),
+                    self._REQUIRES_GRAD_KEY: json.dumps(
+                        sorted(k for k, v in tensors.items()
+                               if v.requires_grad))}
+        if getattr(obj, "_metadata", None) is not None:
+            metadata[self._STATE_DICT_METADATA_KEY] = json.dumps(
+                obj._metadata)
+        _save_safetensors(tensors, path, metadata)
+
+    def load(self, file_path):
+        """Restore a PyTorch tensor or state dict."""
+        import torch
+        tensors, metadata = _load_safetensors(file_path)
+        for key in json.loads(metadata.get(self._REQUIRES_GRAD_KEY, "[]")):
+            tensors[key].requires_grad_(True)
+        kind = metadata.get(self._KIND_KEY)
+        if kind == "tensor":
+            return tensors[self._TENSOR_KEY]
+        if kind == "parameter":
+            tensor = tensors[self._TENSOR_KEY]
+            return torch.nn.Parameter(tensor,
+                                      requires_grad=tensor.requires_grad)
+        # safetensors does not preserve the order of the tensors
+        keys = json.loads(metadata.get(self._KEYS_KEY, "null")) or sorted(
+            tensors)
+        if kind == "dict":
+            return {key: tensors[key] for key in keys}
+        state_dict = OrderedDict((key, tensors[key]) for key in keys)
+        if self._STATE_DICT_METADATA_KEY in metadata:
+            state_dict._metadata = json.loads(
+                metadata[self._STATE_DICT_METADATA_KEY])
+        return state_dict
+
+
 @register_backend
 class PyTorchBackend(MarshalBackend):
-    """Marshal PyTorch objects."""
+    """Marshal PyTorch modules as their class reference and state.
+
+    A module is saved to a folder: its tensors (parameters and buffers) go to
+    `tensors.safetensors` and the rest of it (its class, submodules and
+    attributes) is pickled with dill to `module.pkl`, referencing them.
+    Unlike TorchScript, this works for any module and restores the module's
+    own class.
+    """
     name = "PyTorch backend"
     display_name = "pytorch"
-    file_type = "pt"
-    obj_type_regex = r"torch\.nn\.modules\.module\.Module"
+    file_type = "torch"
+    obj_type_regex = r"torch\.nn\.modules\.module\.Module$"
+
+    MODULE_FILE = "module.pkl"
+    TENSORS_FILE = "tensors.safetensors"
 
     def save(self, obj, path):
-        """Save a PyTorch object."""
+        """Save a PyTorch module."""
+        import dill
         import torch
-        model_script = torch.jit.script(obj)
-        model_script.save(path)
+
+        tensors = dict()
+        keys = dict()
+
+        class _Pickler(dill.Pickler):
+            def persistent_id(self, o):
+                if not _is_torch_tensor(o):
+                    return None
+                if id(o) not in keys:
+                    keys[id(o)] = str(len(keys))
+                    tensors[keys[id(o)]] = o
+                return ("tensor", keys[id(o)],
+                        isinstance(o, torch.nn.Parameter), o.requires_grad,
+                        str(o.device))
+
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, self.MODULE_FILE), "wb") as f:
+            _Pickler(f).dump(obj)
+        _save_safetensors(tensors, os.path.join(path, self.TENSORS_FILE))
 
     def load(self, file_path):
-        """Restore a PyTorch object."""
+        """Restore a PyTorch module."""
+        import dill
         import torch
-        obj_torch = torch.jit.load(file_path)
-        # `jit.load` returns a `ScirptModule` object.
-        # To turn it into a PyTorch `Module` again
-        # we pass it inside a `Sequential` container.
-        # The `Sequential` container is a wrapper
-        # that feeds the data to the modules it contains in order.
-        # Here, we create a `Sequential` container
-        # with only one item, so it works like a wrapper
-        # function around our model.
-        obj_torch = torch.nn.Sequential(obj_torch)
-        obj_torch.eval()
-        return obj_torch
+
+        tensors, _ = _load_safetensors(
+            os.path.join(file_path, self.TENSORS_FILE))
+
+        class _Unpickler(dill.Unpickler):
+            def persistent_load(self, pid):
+                _, key, is_parameter, requires_grad, device = pid
+                tensor = tensors[key]
+                if device != "cpu":
+                    try:
+                        tensor = tensor.to(device)
+                    except (RuntimeError, AssertionError) as e:
+                        log.warning("Could not move tensor to '%s' (%s)."
+                                    " Keeping it on the CPU.", device, e)
+                if is_parameter:
+                    return torch.nn.Parameter(tensor,
+                                              requires_grad=requires_grad)
+                return tensor.requires_grad_(requires_grad)
+
+        with open(os.path.join(file_path, self.MODULE_FILE), "rb") as f:
+            return _Unpickler(f).load()
+
+
+@register_backend
+class PyTorchScriptBackend(MarshalBackend):
+    """Marshal TorchScript modules.
+
+    Scripting is slow and fails on many models, so Kale never scripts modules
+    by itself. Export a model explicitly (e.g., `torch.jit.script(model)`)
+    to marshal it for serving.
+    """
+    name = "PyTorch TorchScript backend"
+    display_name = "pytorch"
+    file_type = "pt"
+    obj_type_regex = r"torch\.jit\._script\.ScriptModule$"
+
+    def save(self, obj, path):
+        """Save a TorchScript module."""
+        obj.save(path)
+
+    def load(self, file_path):
+        """Restore a TorchScript module."""
+        import torch
+        return torch.jit.load(file_path)
 
 
 @register_backend
@@ -210,3 +970,150 @@ class TensorflowKerasBackend(MarshalBackend):
             #  folder (for tensorflow serve)
             obj = load_model(file_path + "/1", compile=False)
         return obj
+
+
+@register_backend
+class StreamBackend(MarshalBackend):
+    """Marshal generators and chunked readers chunk by chunk.
+
+    Every item produced by the stream (a *chunk*) is saved to its own file,
+    using the backend registered for its type. E.g., Pandas DataFrames are
+    saved in the Arrow format, Numpy arrays as `.npy` files. Chunks are
+    written one at a time, so streams larger than the available memory can
+    be marshalled. The index of the chunks is written last, to mark the
+    stream as complete.
+
+    Loading returns a `ChunkedStream`, which loads the chunks lazily, while
+    iterating over it.
+
+    The backend saves objects that cannot be pickled otherwise: generators,
+    the finite iterators of `itertools` and the chunked readers of Pandas
+    and Arrow. Builtin iterators (e.g., `map`, `zip` or a `list_iterator`)
+    are pickled and loaded back with their type. Besides those, the backend
+    saves objects implementing the chunk protocol, i.e., a `__kale_chunks__`
+    method that returns an iterable of chunks. Wrap an iterator in a
+    generator to stream it.
+
+    Saving a stream consumes it: after a generator has been marshalled, the
+    variable that holds it is exhausted in the step that saved it. Infinite
+    iterators of `itertools` (`count`, `cycle` and `repeat`) are pickled
+    instead. Streams of more than `max_chunks` chunks (e.g., of an infinite
+    generator) fail to be saved.
+    """
+    name = "Stream backend"
+    display_name = "stream"
+    file_type = "stream"
+    # Generators, the finite itertools and chunked readers of Pandas and
+    # Arrow
+    obj_type_regex = (r"(generator"
+                      r"|itertools\.(?!count$|cycle$|repeat$).*"
+                      r"|pandas\.io\.parsers\..*TextFileReader"
+                      r"|pyarrow\.lib\.RecordBatchReader)$")
+    # Set to None to save streams of any length
+    max_chunks = 100000
+
+    INDEX_FILE_NAME = "index.json"
+    CHUNK_FILE_NAME = "chunk-%06d.%s"
+
+    def match_type(self, cls):
+        """Match classes implementing the chunk protocol."""
+        return "__kale_chunks__" in vars(cls)
+
+    def wrapped_save(self, obj, name, codec=None):
+        """Save a stream directly to the data directory.
+
+        Streams are written chunk by chunk to a temporary folder, which then
+        replaces any previous version of the object. Compression and the
+        content-addressed layout do not apply to streams.
+        """
+        path = os.path.join(get_data_dir(), name + "." + self.file_type)
+        log.info("Saving %s object using %s: %s",
+                 self.display_name, self.name, name)
+        tmp_path = os.path.join(get_data_dir(), ".%s.tmp-%s"
+                                % (os.path.basename(path),
+                                   utils.random_string(10)))
+        try:
+            self.save(obj, tmp_path)
+        except BaseException:
+            utils.rm_r(tmp_path, silent=True)
+            raise
+        if os.path.lexists(path):
+            utils.rm_r(path)
+        os.replace(tmp_path, path)
+        codecs.write_codec(path, codecs.NO_CODEC)
+        return path
+
+    def save(self, obj, path):
+        """Save the chunks of a stream to the folder `path`."""
+        os.makedirs(path)
+        chunks = obj.__kale_chunks__() if self.match_type(type(obj)) else obj
+        index = []
+        for i, chunk in enumerate(chunks):
+            if self.max_chunks is not None and i >= self.max_chunks:
+                raise ValueError("The stream has more than %d chunks. It"
+                                 " may be infinite." % self.max_chunks)
+            backend, chunk_file = self._save_chunk(chunk, path, i)
+            index.append({"file": chunk_file,
+                          "backend": type(backend).__name__})
+        with open(os.path.join(path, self.INDEX_FILE_NAME), "w") as f:
+            json.dump({"chunks": index}, f)
+
+    def _save_chunk(self, chunk: Any, path: str, i: int):
+        backend = get_dispatcher().get_backend(chunk)
+        if isinstance(backend, PandasBackend) and backend.prefer_arrow:
+            # Same as `PandasBackend.wrapped_save`
+            arrow_backend = get_dispatcher().get_backend_by_name(
+                "PandasArrowBackend")
+            chunk_file = self.CHUNK_FILE_NAME % (i, arrow_backend.file_type)
+            try:
+                arrow_backend.save(chunk, os.path.join(path, chunk_file))
+                return arrow_backend, chunk_file
+            except Exception as e:
+                log.debug("Cannot save chunk using %s: %s",
+                          arrow_backend.name, e)
+                utils.rm_r(os.path.join(path, chunk_file), silent=True)
+        chunk_file = self.CHUNK_FILE_NAME % (i, backend.file_type)
+        backend._save(chunk, os.path.join(path, chunk_file))
+        return backend, chunk_file
+
+    def load(self, file_path):
+        """Restore a stream as a `ChunkedStream`."""
+        return ChunkedStream(file_path)
+
+
+class ChunkedStream(object):
+    """Iterable over the chunks of a marshalled stream.
+
+    Chunks are loaded one at a time, while iterating. The stream can be
+    iterated multiple times and marshalled again, chunk by chunk.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        index_path = os.path.join(path, StreamBackend.INDEX_FILE_NAME)
+        try:
+            with open(index_path) as f:
+                self._chunks = json.load(f)["chunks"]
+        except FileNotFoundError:
+            raise RuntimeError("The stream at '%s' is incomplete: missing"
+                               " index file" % path)
+
+    def __len__(self):
+        """Get the number of chunks."""
+        return len(self._chunks)
+
+    def __iter__(self) -> Iterator[Any]:
+        """Load the chunks lazily."""
+        backends = get_dispatcher().get_backends()
+        for chunk in self._chunks:
+            backend = backends.get(chunk["backend"], MarshalBackend())
+            yield backend._load(os.path.join(self.path, chunk["file"]), {})
+
+    def __kale_chunks__(self):
+        """Implement the chunk protocol, to save the stream again."""
+        return iter(self)
+
+    def __repr__(self):
+        """Describe the stream."""
+        return "<ChunkedStream of %d chunks at '%s'>" % (len(self),
+                                                         self.path)
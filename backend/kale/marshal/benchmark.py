@@ -0,0 +1,416 @@
+# Copyright 2020 The Kale Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark the marshal backends.
+
+Generate synthetic objects of several kinds (workloads) and sizes, and save
+and load each of them with every backend that can handle it, including the
+default (pickle) backend:
+
+    python -m kale.marshal.benchmark --sizes 1Mi,16Mi,256Mi \
+        --codecs none,lz4 --output results.json
+
+Every result records the save and load times and throughputs, the peak
+memory allocated while saving and loading, and the bytes on disk.
+Throughputs are computed from the size of the object in memory (the
+requested size), not from the bytes on disk, so that backends and codecs
+that write fewer bytes are not reported as slower. Compare two runs to spot
+regressions:
+
+    python -m kale.marshal.benchmark --sizes 1Mi,16Mi \
+        --compare baseline.json --output results.json
+
+Peak memory is measured in a separate, untimed round, as the sum of the
+peak allocations traced by `tracemalloc` (Python and libraries that report
+to it, e.g., NumPy) and of the peak allocations of Arrow's memory pool,
+which does not report to `tracemalloc`. Loads read files that the saves
+just wrote, so they are likely to hit the page cache.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+import tracemalloc
+
+from typing import Any, Callable, Dict, Iterable, List
+
+from kale.common import logutils, utils
+from kale.marshal import codecs
+from kale.marshal.backend import (MarshalBackend, get_dispatcher,
+                                  get_data_dir, set_data_dir,
+                                  is_content_addressed,
+                                  set_content_addressed)
+
+log = logging.getLogger(__name__)
+
+DEFAULT_SIZES = ("1Mi", "16Mi")
+DEFAULT_REPEAT = 3
+# Seconds between two samples of the memory allocated by Arrow
+ARROW_SAMPLING_INTERVAL = 0.001
+# Report results whose throughput dropped by more than this fraction
+DEFAULT_THRESHOLD = 0.2
+OBJECT_NAME = "obj"
+_SIZE_SUFFIXES = {"Ki": 1 << 10, "Mi": 1 << 20, "Gi": 1 << 30}
+
+
+def parse_size(size: str) -> int:
+    """Parse a size in bytes, with an optional Ki, Mi or Gi suffix."""
+    size = size.strip()
+    for suffix, multiplier in _SIZE_SUFFIXES.items():
+        if size.endswith(suffix):
+            return int(float(size[:-len(suffix)]) * multiplier)
+    return int(size)
+
+
+def _numpy(size: int):
+    import numpy as np
+    return np.random.default_rng(0).random(max(size // 8, 1))
+
+
+def _pandas(size: int):
+    import numpy as np
+    import pandas as pd
+    # ~44 bytes per row: 4 float, 1 int and 1 short string column
+    rows = max(size // 44, 1)
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.random((rows, 4)), columns=list("abcd"))
+    df["e"] = rng.integers(0, 1 << 30, rows)
+    df["f"] = pd.Series(["cat-%d" % i for i in range(16)]).iloc[
+        rng.integers(0, 16, rows)].to_numpy()
+    return df
+
+
+def _sklearn(size: int):
+    import numpy as np
+    from sklearn.preprocessing import StandardScaler
+    # A fitted scaler holds 3 float arrays (mean, variance and scale) with
+    # one value per feature
+    features = max(size // 24, 1)
+    return StandardScaler().fit(
+        np.random.default_rng(0).random((2, features)))
+
+
+def _dict_of_arrays(size: int):
+    import numpy as np
+    rng = np.random.default_rng(0)
+    return {"array_%d" % i: rng.random(max(size // 64, 1))
+            for i in range(8)}
+
+
+def _sparse(size: int):
+    from scipy import sparse
+    # A 1% dense CSR matrix (e.g., TF-IDF features): ~12 bytes per nonzero
+    # value (8 for the value and 4 for its column index)
+    nnz = max(size // 12, 1)
+    cols = 10000
+    return sparse.random(max(nnz * 100 // cols, 1), cols, density=0.01,
+                         format="csr", random_state=0)
+
+
+def _function(size: int):
+    weights = _numpy(size)
+
+    def predict(x):
+        return x @ weights
+    return predict
+
+
+WORKLOADS: Dict[str, Callable[[int], Any]] = {
+    "numpy": _numpy,
+    "pandas": _pandas,
+    "sklearn": _sklearn,
+    "dict_of_arrays": _dict_of_arrays,
+    "sparse": _sparse,
+    "function": _function,
+}
+
+
+def get_backends(obj: Any) -> List[MarshalBackend]:
+    """Get the backends that can save `obj`, and the default backend."""
+    dispatcher = get_dispatcher()
+    return dispatcher.get_matching_backends(obj) + [MarshalBackend()]
+
+
+def _get_arrow_memory_pool():
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return None
+    return pa.default_memory_pool()
+
+
+def _run_with_arrow_peak(fn: Callable[[], Any]) -> int:
+    """Run `fn` and get the peak memory it allocated from Arrow's pool."""
+    pool = _get_arrow_memory_pool()
+    if pool is None:
+        fn()
+        return 0
+    start = pool.bytes_allocated()
+    start_max_memory = pool.max_memory()
+    # A running maximum, so that sampling does not add to the traced memory
+    sampled_peak = [start]
+    done = threading.Event()
+
+    def _sample():
+        while not done.wait(ARROW_SAMPLING_INTERVAL):
+            sampled_peak[0] = max(sampled_peak[0], pool.bytes_allocated())
+
+    sampler = threading.Thread(target=_sample, daemon=True)
+    sampler.start()
+    try:
+        fn()
+    finally:
+        done.set()
+        sampler.join()
+    peak = max(sampled_peak[0], pool.bytes_allocated())
+    max_memory = pool.max_memory()
+    if max_memory is not None and max_memory > (start_max_memory or 0):
+        # `fn` raised the all-time peak of the pool, which, unlike the
+        # samples, cannot miss short-lived allocations
+        peak = max(peak, max_memory)
+    return peak - start
+
+
+def _measure(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Get the peak memory of `fn` and its fastest time out of `repeat`."""
+    tracemalloc.start()
+    try:
+        arrow_peak_memory = _run_with_arrow_peak(fn)
+        peak_memory = tracemalloc.get_traced_memory()[1] + arrow_peak_memory
+    finally:
+        tracemalloc.stop()
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        seconds.append(time.perf_counter() - start)
+    return {"seconds": min(seconds), "peak_memory": peak_memory}
+
+
+def _throughput(size: int, seconds: float) -> float:
+    return size / 1e6 / seconds if seconds > 0 else 0.0
+
+
+def _run_one(obj: Any, object_bytes: int, backend: MarshalBackend,
+             codec: str, repeat: int) -> Dict[str, Any]:
+    data_dir = tempfile.mkdtemp(prefix="kale-marshal-benchmark-")
+    prev_data_dir = get_data_dir()
+    set_data_dir(data_dir)
+    try:
+        paths = []
+        save = _measure(lambda: paths.append(
+            backend.wrapped_save(obj, OBJECT_NAME, codec=codec)), repeat)
+        if not paths[-1].endswith("." + backend.file_type):
+            # The backend delegated to another one (e.g., Pandas to Arrow)
+            backend = get_dispatcher()._dispatch_file_type(paths[-1])
+        disk_bytes = utils.get_path_size(paths[-1])
+        load = _measure(lambda: backend.wrapped_load(OBJECT_NAME), repeat)
+    finally:
+        set_data_dir(prev_data_dir)
+        utils.rm_r(data_dir, silent=True)
+    return {"backend": type(backend).__name__,
+            "file_type": backend.file_type,
+            "object_bytes": object_bytes,
+            "disk_bytes": disk_bytes,
+            "save_seconds": save["seconds"],
+            "save_throughput": _throughput(object_bytes, save["seconds"]),
+            "save_peak_memory": save["peak_memory"],
+            "load_seconds": load["seconds"],
+            "load_throughput": _throughput(object_bytes, load["seconds"]),
+            "load_peak_memory": load["peak_memory"]}
+
+
+def run(workloads: Iterable[str] = tuple(WORKLOADS),
+        sizes: Iterable[str] = DEFAULT_SIZES,
+        codecs_: Iterable[str] = (codecs.NO_CODEC,),
+        repeat: int = DEFAULT_REPEAT) -> Dict[str, Any]:
+    """Benchmark the backends.
+
+    Workloads whose libraries are not installed are skipped. A backend that
+    fails to save or load an object is reported with an `error`.
+
+    Args:
+        workloads: Names of the workloads (see `WORKLOADS`)
+        sizes: Approximate sizes of the generated objects (e.g., "16Mi")
+        codecs_: Compression codecs to benchmark each backend with
+        repeat: Time every save and load this many times and keep the
+            fastest
+
+    Returns: the benchmark's environment and results, JSON-serializable
+    """
+    results = []
+    content_addressed = is_content_addressed()
+    set_content_addressed(False)
+    try:
+        for workload in workloads:
+            for size in sizes:
+                object_bytes = parse_size(size)
+                try:
+                    obj = WORKLOADS[workload](object_bytes)
+                except ImportError as e:
+                    log.warning("Skipping workload %s: %s", workload, e)
+                    break
+                for backend in get_backends(obj):
+                    for codec in codecs_:
+                        result = {"workload": workload, "size": size,
+                                  "codec": codec}
+                        try:
+                            result.update(_run_one(obj, object_bytes,
+                                                   backend, codec, repeat))
+                        except Exception as e:
+                            log.warning("%s failed on %s (%s): %s",
+                                        type(backend).__name__, workload,
+                                        size, e)
+                            result.update(backend=type(backend).__name__,
+                                          error=str(e))
+                        results.append(result)
+    finally:
+        set_content_addressed(content_addressed)
+    return {"environment": _get_environment(), "results": results}
+
+
+def _get_environment() -> Dict[str, Any]:
+    libraries = dict()
+    for name in ("numpy", "pandas", "pyarrow", "scipy", "sklearn", "dill"):
+        module = sys.modules.get(name)
+        if module is not None:
+            libraries[name] = getattr(module, "__version__", None)
+    return {"python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "libraries": libraries,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+
+
+def _get_key(result: Dict[str, Any]) -> tuple:
+    return (result["workload"], result["size"], result["codec"],
+            result["backend"])
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """Find the results whose throughput regressed.
+
+    Args:
+        baseline: The output of a previous `run`
+        current: The output of `run`
+        threshold: The fraction of the baseline throughput that a result
+            may lose before it is reported
+
+    Returns: the regressions, with the baseline and current throughputs
+    """
+    baseline_results = {_get_key(result): result
+                        for result in baseline["results"]
+                        if "error" not in result}
+    regressions = []
+    for result in current["results"]:
+        base = baseline_results.get(_get_key(result))
+        if base is None or "error" in result:
+            continue
+        for operation in ("save", "load"):
+            key = operation + "_throughput"
+            if result[key] < base[key] * (1 - threshold):
+                regressions.append({"workload": result["workload"],
+                                    "size": result["size"],
+                                    "codec": result["codec"],
+                                    "backend": result["backend"],
+                                    "operation": operation,
+                                    "baseline": base[key],
+                                    "current": result[key]})
+    return regressions
+
+
+def _format_table(results: List[Dict[str, Any]]) -> str:
+    rows = [("workload", "size", "backend", "codec", "object (MB)",
+             "disk (MB)",
+             "save (MB/s)", "load (MB/s)", "save peak (MB)",
+             "load peak (MB)")]
+    for r in results:
+        if "error" in r:
+            rows.append((r["workload"], r["size"], r["backend"], r["codec"],
+                         "error: %s" % r["error"], "", "", "", "", ""))
+            continue
+        rows.append((r["workload"], r["size"], r["backend"], r["codec"],
+                     "%.2f" % (r["object_bytes"] / 1e6),
+                     "%.2f" % (r["disk_bytes"] / 1e6),
+                     "%.1f" % r["save_throughput"],
+                     "%.1f" % r["load_throughput"],
+                     "%.2f" % (r["save_peak_memory"] / 1e6),
+                     "%.2f" % (r["load_peak_memory"] / 1e6)))
+    widths = [max(len(str(row[i])) for row in rows)
+              for i in range(len(rows[0]))]
+    return "\n".join("  ".join(str(c).ljust(w) for c, w in zip(row, widths))
+                     for row in rows)
+
+
+def main(argv: List[str] = None):
+    """Entry-point of the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark the Kale"
+                                                 " marshal backends")
+    parser.add_argument("--workloads", type=str, default=",".join(WORKLOADS),
+                        help="Comma-separated workloads. Available: %s"
+                             % ", ".join(WORKLOADS))
+    parser.add_argument("--sizes", type=str, default=",".join(DEFAULT_SIZES),
+                        help="Comma-separated object sizes (e.g., 1Mi,1Gi)")
+    parser.add_argument("--codecs", type=str, default=codecs.NO_CODEC,
+                        help="Comma-separated compression codecs")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="Number of timed rounds per measurement")
+    parser.add_argument("--output", type=str,
+                        help="Write the results to this JSON file")
+    parser.add_argument("--compare", type=str,
+                        help="Compare the results to a previous JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Report throughputs lower than the baseline by"
+                             " more than this fraction")
+    parser.add_argument("--debug", action="store_true",
+                        help="Log every save and load")
+    args = parser.parse_args(argv)
+
+    level = logging.DEBUG if args.debug else logging.WARNING
+    for module in ("kale.common", "kale.marshal"):
+        logutils.get_or_create_logger(module, level=level)
+
+    workloads = args.workloads.split(",")
+    unknown = sorted(set(workloads) - set(WORKLOADS))
+    if unknown:
+        parser.error("Unknown workloads: %s" % ", ".join(unknown))
+    for codec in args.codecs.split(","):
+        if codec != codecs.NO_CODEC:
+            codecs.get_codec(codec)  # validate the name
+    output = run(workloads, args.sizes.split(","), args.codecs.split(","),
+                 args.repeat)
+    print(_format_table(output["results"]))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), output, args.threshold)
+        for r in regressions:
+            print("Regression: %(workload)s (%(size)s) %(backend)s"
+                  " %(codec)s %(operation)s: %(baseline).1f MB/s ->"
+                  " %(current).1f MB/s" % r)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# Copyright 2020 The Kale Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Pickle files with out-of-band buffers.
+
+With pickle protocol 5, objects that hold large contiguous buffers (e.g.,
+Numpy arrays, also when nested inside dicts or lists) can hand them to the
+pickler out-of-band, instead of copying them into the pickle stream. This
+module writes these buffers to the same file, after the pickle stream and
+aligned to `ALIGNMENT` bytes:
+
+    MAGIC | pickle stream | buffer 1 | ... | buffer N | index | index size
+
+Loading memory-maps the file and passes the buffers to the unpickler as
+zero-copy views. The mapping is copy-on-write, so the restored objects can
+be modified without touching the file.
+"""
+
+import io
+import mmap
+import json
+import pickle
+import struct
+
+from typing import Any
+
+MAGIC = b"KALEOOB1"
+ALIGNMENT = 64
+# Smaller buffers are kept in-band, inside the pickle stream
+OUT_OF_BAND_THRESHOLD = 1 << 16  # 64KiB
+# Pickle protocol 5 (PEP 574) is available in Python >= 3.8
+PROTOCOL = 5
+IS_SUPPORTED = pickle.HIGHEST_PROTOCOL >= PROTOCOL
+
+_INDEX_SIZE = struct.Struct("<Q")
+
+
+def is_buffered_file(path: str) -> bool:
+    """Whether `path` was written by `dump`."""
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def _pad(f: io.BufferedWriter):
+    f.write(b"\0" * (-f.tell() % ALIGNMENT))
+
+
+def get_pickler_class():
+    """Get a dill pickler that hands Numpy buffers to `buffer_callback`."""
+    import dill
+
+    class _Pickler(dill.Pickler):
+        def reducer_override(self, obj):
+            # dill pickles Numpy arrays with `__reduce__`, which copies their
+            # data in-band regardless of the protocol
+            cls = type(obj)
+            if cls.__module__ == "numpy" and cls.__name__ == "ndarray":
+                return obj.__reduce_ex__(self.proto)
+            return NotImplemented
+
+    return _Pickler
+
+
+def dump(obj: Any, path: str):
+    """Pickle `obj` with dill, writing large buffers out-of-band."""
+    buffers = []
+
+    def buffer_callback(buf: pickle.PickleBuffer) -> bool:
+        if buf.raw().nbytes < OUT_OF_BAND_THRESHOLD:
+            return True  # serialize in-band
+        buffers.append(buf)
+        return False
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        start = f.tell()
+        get_pickler_class()(f, protocol=PROTOCOL,
+                            buffer_callback=buffer_callback).dump(obj)
+        index = {"pickle": [start, f.tell() - start], "buffers": []}
+        for buf in buffers:
+            _pad(f)
+            raw = buf.raw()
+            index["buffers"].append([f.tell(), raw.nbytes])
+            f.write(raw)
+            buf.release()
+        index_bytes = json.dumps(index).encode()
+        f.write(index_bytes)
+        f.write(_INDEX_SIZE.pack(len(index_bytes)))
+
+
+def load(path: str) -> Any:
+    """Restore an object written by `dump`."""
+    import dill
+    with open(path, "rb") as f:
+        # ACCESS_COPY makes the mapped buffers writable, copy-on-write
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    view = memoryview(mm)
+    index_size = _INDEX_SIZE.unpack(view[-_INDEX_SIZE.size:])[0]
+    index_start = len(view) - _INDEX_SIZE.size - index_size
+    index = json.loads(bytes(view[index_start:-_INDEX_SIZE.size]))
+    start, size = index["pickle"]
+    buffers = [view[offset:offset + size]
+               for offset, size in index["buffers"]]
+    return dill.load(io.BytesIO(view[start:start + size]), buffers=buffers)
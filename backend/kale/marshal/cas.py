@@ -0,0 +1,145 @@
+# Copyright 2020 The Kale Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Content-addressed storage for marshalled objects.
+
+When content addressing is enabled, the marshalled objects are not written
+directly to `<data_dir>/<name>.<ext>`. Instead, each serialized object
+becomes a *blob*, stored under `<data_dir>/.kale.blobs/<digest>.<ext>`, and
+`<data_dir>/<name>.<ext>` is just a (relative) symlink pointing to it. Saving
+an object whose digest is already present in the blob store only requires
+updating the symlink.
+"""
+
+import os
+import hashlib
+import logging
+
+from typing import Any, Optional
+
+from kale.common import utils
+from kale.marshal import buffers
+
+log = logging.getLogger(__name__)
+
+BLOBS_DIR_NAME = ".kale.blobs"
+HASH_ALGORITHM = "sha256"
+CHUNK_SIZE = 1 << 20  # 1MiB
+
+
+class _HashWriter:
+    """File-like object that feeds everything it receives to a hash."""
+
+    def __init__(self, hasher):
+        self.hasher = hasher
+
+    def write(self, data):
+        """Update the hash with new data."""
+        self.hasher.update(data)
+        return len(data)
+
+
+def hash_object(obj: Any) -> Optional[str]:
+    """Compute the digest of an object by streaming its pickle to a hash.
+
+    The object is pickled straight into the hash function, so nothing is
+    written to disk. With pickle protocol 5 (Python >= 3.8), the data of
+    NumPy arrays, also inside pandas objects and containers, is handed to the
+    hash out-of-band (see `buffers.get_pickler_class`), without being copied.
+    Other large objects, and arrays with older protocols, are copied into
+    the pickle stream, one chunk at a time.
+
+    Returns: the hex digest, or None in case the object cannot be pickled.
+    """
+    hasher = hashlib.new(HASH_ALGORITHM)
+
+    def _hash_buffer(buffer):
+        try:
+            data = buffer.raw()
+        except BufferError:  # non-contiguous
+            data = memoryview(bytes(buffer))
+        hasher.update(str(data.nbytes).encode())
+        hasher.update(data)
+
+    try:
+        if buffers.IS_SUPPORTED:
+            buffers.get_pickler_class()(
+                _HashWriter(hasher), protocol=buffers.PROTOCOL,
+                buffer_callback=_hash_buffer).dump(obj)
+        else:
+            import dill
+            dill.dump(obj, _HashWriter(hasher))
+    except Exception as e:
+        log.debug("Could not hash object of type %s: %s", type(obj), e)
+        return None
+    return hasher.hexdigest()
+
+
+def hash_path(path: str) -> str:
+    """Compute the digest of a file or a folder, reading it in chunks."""
+    hasher = hashlib.new(HASH_ALGORITHM)
+    if os.path.isdir(path):
+        files = sorted(os.path.join(root, f)
+                       for root, _, fs in os.walk(path) for f in fs)
+    else:
+        files = [path]
+    for f in files:
+        hasher.update(os.path.relpath(f, path).encode())
+        with open(f, "rb") as fp:
+            for chunk in iter(lambda: fp.read(CHUNK_SIZE), b""):
+                hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def get_blobs_dir(data_dir: str) -> str:
+    """Get the path to the blob store of a data directory."""
+    return os.path.join(data_dir, BLOBS_DIR_NAME)
+
+
+def get_blob_path(data_dir: str, digest: str, file_type: str) -> str:
+    """Get the path to the blob of an object."""
+    os.makedirs(get_blobs_dir(data_dir), exist_ok=True)
+    return os.path.join(get_blobs_dir(data_dir),
+                        "%s.%s" % (digest, file_type))
+
+
+def get_tmp_path(data_dir: str, file_type: str) -> str:
+    """Get a temporary path inside the blob store."""
+    return get_blob_path(data_dir, "tmp-%s" % utils.random_string(10),
+                         file_type)
+
+
+def link(path: str, blob_path: str):
+    """Atomically point `path` to `blob_path`.
+
+    The symlink is relative, so that it stays valid when the data directory
+    is mounted to a different location (e.g., when a snapshot of the volume
+    is restored in a notebook server).
+    """
+    tmp_path = "%s.tmp-%s" % (path, utils.random_string(10))
+    os.symlink(os.path.relpath(blob_path, os.path.dirname(path)), tmp_path)
+    if os.path.isdir(path) and not os.path.islink(path):
+        # `os.replace` cannot overwrite a folder
+        utils.rm_r(path)
+    os.replace(tmp_path, path)
+
+
+def remove_unreferenced(data_dir: str, blob_path: str):
+    """Remove a blob, unless an object of the data directory points to it."""
+    blob_path = os.path.realpath(blob_path)
+    for entry in os.listdir(data_dir):
+        path = os.path.join(data_dir, entry)
+        if os.path.islink(path) and os.path.realpath(path) == blob_path:
+            return
+    utils.rm_r(blob_path)
@@ -0,0 +1,187 @@
+# Copyright 2020 The Kale Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compression codecs for marshalled files.
+
+A codec compresses the file produced by a marshal backend. The name of the
+codec is recorded in a hidden file next to the artifact
+(`<data_dir>/.<name>.<ext>.codec`), so that loading decodes it transparently.
+"""
+
+import os
+import shutil
+import logging
+import tempfile
+import contextlib
+
+from typing import Dict, Type
+
+log = logging.getLogger(__name__)
+
+NO_CODEC = "none"
+CHUNK_SIZE = 1 << 20  # 1MiB
+
+
+class Codec(object):
+    """Base class for compression codecs.
+
+    Subclasses need to define the codec's `name`, the `extension` of the
+    encoded files and implement `open`, returning a file object that
+    compresses on write and decompresses on read.
+    """
+    name: str = None
+    extension: str = None
+
+    def open(self, path: str, mode: str):
+        """Open a compressed file."""
+        raise NotImplementedError
+
+    def encode(self, src_path: str, dst_path: str):
+        """Compress `src_path` into `dst_path`."""
+        with open(src_path, "rb") as src, self.open(dst_path, "wb") as dst:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+
+    def decode(self, src_path: str, dst_path: str):
+        """Decompress `src_path` into `dst_path`."""
+        with self.open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+
+    def check_available(self):
+        """Raise ImportError if the codec's library is not installed."""
+        pass
+
+
+_codecs: Dict[str, Codec] = dict()
+
+
+def register_codec(cls: Type[Codec]) -> Type[Codec]:
+    """Register a new compression codec."""
+    if cls.name not in _codecs:
+        _codecs[cls.name] = cls()
+    return cls
+
+
+def get_codec(name: str) -> Codec:
+    """Get a registered codec by name."""
+    if name not in _codecs:
+        raise ValueError("Unknown codec '%s'. Available codecs: %s"
+                         % (name, sorted(_codecs.keys())))
+    return _codecs[name]
+
+
+def get_codecs() -> Dict[str, Codec]:
+    """Get all registered codecs."""
+    return dict(_codecs)
+
+
+@register_codec
+class GzipCodec(Codec):
+    """Compress files with gzip."""
+    name = "gzip"
+    extension = "gz"
+    # Favour throughput over compression ratio
+    compresslevel = 1
+
+    def open(self, path, mode):
+        """Open a gzip file."""
+        import gzip
+        return gzip.open(path, mode, compresslevel=self.compresslevel)
+
+
+@register_codec
+class LZ4Codec(Codec):
+    """Compress files with LZ4 (requires the `lz4` package)."""
+    name = "lz4"
+    extension = "lz4"
+
+    def open(self, path, mode):
+        """Open an LZ4 frame file."""
+        import lz4.frame
+        return lz4.frame.open(path, mode)
+
+    def check_available(self):
+        """Check that `lz4` is installed."""
+        import lz4.frame  # noqa: F401
+
+
+@register_codec
+class ZstdCodec(Codec):
+    """Compress files with Zstandard (requires the `zstandard` package)."""
+    name = "zstd"
+    extension = "zst"
+
+    def open(self, path, mode):
+        """Open a Zstandard file."""
+        import zstandard
+        return zstandard.open(path, mode)
+
+    def check_available(self):
+        """Check that `zstandard` is installed."""
+        import zstandard  # noqa: F401
+
+
+def resolve_codec(name: str = None) -> str:
+    """Validate a codec name, falling back to no codec if not installed."""
+    if not name or name == NO_CODEC:
+        return NO_CODEC
+    try:
+        get_codec(name).check_available()
+    except ImportError as e:
+        log.warning("Codec '%s' is not available (%s). Falling back to"
+                    " uncompressed files.", name, e)
+        return NO_CODEC
+    return name
+
+
+@contextlib.contextmanager
+def local_tmp_path(file_type: str):
+    """Get a path inside a new local temporary directory.
+
+    Encoding and decoding go through the local temporary directory, so that
+    only compressed bytes travel to and from the data directory. The
+    temporary directory is removed on exit.
+    """
+    tmp_dir = tempfile.mkdtemp(prefix="kale-")
+    try:
+        yield os.path.join(tmp_dir, "obj." + file_type)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def get_codec_file(path: str) -> str:
+    """Get the path to the codec annotation of the artifact at `path`."""
+    return os.path.join(os.path.dirname(path),
+                        ".%s.codec" % os.path.basename(path))
+
+
+def write_codec(path: str, codec_name: str):
+    """Record the codec used to encode the artifact at `path`."""
+    codec_file = get_codec_file(path)
+    if codec_name == NO_CODEC:
+        try:
+            os.remove(codec_file)
+        except FileNotFoundError:
+            pass
+        return
+    with open(codec_file, "w") as f:
+        f.write(codec_name)
+
+
+def read_codec(path: str) -> str:
+    """Get the codec used to encode the artifact at `path`."""
+    try:
+        with open(get_codec_file(path)) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return NO_CODEC
@@ -0,0 +1,112 @@
+# Copyright 2020 The Kale Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Garbage collection of marshalled objects during a pipeline run.
+
+The compiler knows, for every marshalled object, which steps consume it (see
+`Pipeline.get_artifact_consumers`). When a step completes, it releases its
+inputs with `release`, and an object is deleted as soon as its last consumer
+has released it.
+
+Steps may run in parallel, so the reference counts are not kept in a shared
+counter. Instead, every consumer leaves a marker, one empty file per step, in
+`<data_dir>/.kale.gc/<run_id>/<name>/`: an object is deleted when the
+markers of all its consumers are there. Markers are scoped to the run, since
+the data directory may outlive it (e.g., when it lives in the workspace
+volume). Deleting an object twice, when two consumers complete at the same
+time, is harmless.
+"""
+
+import os
+import logging
+
+from typing import Dict, Iterable, Set
+
+from kale.common import utils
+from kale.marshal.backend import get_dispatcher, get_storage, set_data_dir
+
+log = logging.getLogger(__name__)
+
+RUN_ID_ENV = "KALE_MARSHAL_RUN_ID"
+DEFAULT_RUN_ID = "local"
+GC_DIR_NAME = ".kale.gc"
+
+
+def get_run_id() -> str:
+    """Get the ID of the current pipeline run."""
+    return os.environ.get(RUN_ID_ENV) or DEFAULT_RUN_ID
+
+
+def _get_markers_dir(name: str) -> str:
+    return "/".join([GC_DIR_NAME, get_run_id(), name])
+
+
+def _mark_released(data_dir: str, name: str, step_name: str):
+    marker = "%s/%s" % (_get_markers_dir(name), step_name)
+    if get_storage():
+        get_storage().touch(marker)
+        return
+    path = os.path.join(data_dir, marker)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "w").close()
+
+
+def _get_released(data_dir: str, name: str) -> Set[str]:
+    markers_dir = _get_markers_dir(name)
+    if get_storage():
+        return {os.path.basename(marker) for marker
+                in get_storage().list_files(markers_dir + "/")}
+    try:
+        return set(os.listdir(os.path.join(data_dir, markers_dir)))
+    except FileNotFoundError:
+        return set()
+
+
+def _remove_markers(data_dir: str, name: str):
+    markers_dir = _get_markers_dir(name)
+    if get_storage():
+        get_storage().remove(get_storage().list_files(markers_dir + "/"))
+    else:
+        utils.rm_r(os.path.join(data_dir, markers_dir), silent=True)
+
+
+def release(step_name: str, consumers: Dict[str, Iterable[str]],
+            data_dir: str):
+    """Release the inputs of a completed step.
+
+    Args:
+        step_name: Name of the completed step
+        consumers: The inputs of the step, mapped to the names of all the
+            steps that consume them
+        data_dir: The marshal data directory
+    """
+    set_data_dir(data_dir)
+    for name, steps in sorted(consumers.items()):
+        try:
+            _release(data_dir, name, step_name, set(steps))
+        except Exception:
+            # Failing to collect garbage must not fail the step
+            log.exception("Failed to release '%s'", name)
+
+
+def _release(data_dir: str, name: str, step_name: str, steps: Set[str]):
+    _mark_released(data_dir, name, step_name)
+    pending = steps - _get_released(data_dir, name)
+    if pending:
+        log.info("Keeping '%s', still needed by: %s", name,
+                 ", ".join(sorted(pending)))
+        return
+    log.info("Deleting '%s', all its consumers have completed", name)
+    get_dispatcher().delete(name)
+    _remove_markers(data_dir, name)
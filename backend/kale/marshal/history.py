@@ -0,0 +1,244 @@
+# Copyright 2020 The Kale Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""History of the marshalled data of pipeline runs.
+
+Every pipeline step records the marshalled data of its run:
+
+    {"run": ..., "step": ..., "time": ..., "data_dir_size": ...,
+     "objects": {...}}
+
+`data_dir_size` is the size of the marshal data directory when the step
+completes, before it releases its inputs (see `kale.marshal.gc`), and
+`objects` the sizes of the objects that the step saved.
+
+The compiler sizes the marshal volume of the next runs with
+`estimate_volume_size`, so the history has to outlive the steps and be
+readable from the notebook. The history path (`marshal_history_path`) is
+either:
+
+- An object storage URL (`s3://<bucket>/<prefix>`), where every record is a
+  separate object, or
+- A file path, where the records are appended to a JSON Lines file. The
+  compiler reads them only if the file is on a volume that both the notebook
+  and the steps mount, i.e., a shared (ReadWriteMany) volume that is not
+  snapshotted. The default path, under the working directory, is on the
+  steps' container filesystem or Rok snapshot, which are discarded with the
+  run, and the volume keeps the default size.
+"""
+
+import os
+import json
+import math
+import time
+import logging
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from kale.common import utils
+from kale.marshal import gc, stats, storage
+
+log = logging.getLogger(__name__)
+
+HISTORY_DIR_NAME = ".kale"
+# Estimate sizes from this many of the latest runs
+MAX_RUNS = 10
+# Extra space on top of the estimated size
+HEADROOM = 0.5
+MIN_VOLUME_SIZE = 128 << 20  # 128MiB
+DEFAULT_VOLUME_SIZE = "1Gi"
+
+
+def get_history_path(working_dir: str, pipeline_name: str) -> str:
+    """Get the default path to the history of a pipeline."""
+    return os.path.join(working_dir, HISTORY_DIR_NAME,
+                        "%s.marshal_history.jsonl" % pipeline_name)
+
+
+def _get_storage(history_path: str,
+                 endpoint_url: str = None) -> Optional[storage.S3Storage]:
+    if not history_path.startswith(storage.S3_SCHEME):
+        return None
+    return storage.S3Storage(
+        history_path,
+        endpoint_url=(endpoint_url
+                      or os.environ.get(storage.STORAGE_ENDPOINT_ENV)))
+
+
+def _get_disk_usage(path: str) -> int:
+    # Symlinks (e.g., of content-addressed objects) take up no space, their
+    # blobs are counted once
+    return sum(os.lstat(os.path.join(root, f)).st_size
+               for root, _, files in os.walk(path) for f in files)
+
+
+def _get_record_name(entry: Dict[str, Any]) -> str:
+    return "%s-%s.json" % (entry["run"], entry["step"])
+
+
+def record_step(history_path: str, step_name: str, data_dir: str,
+                stats_path: str = stats.DEFAULT_STATS_PATH,
+                endpoint_url: str = None):
+    """Record the marshalled data of a completed step.
+
+    Args:
+        history_path: Path (or object storage URL) to the history of the
+            pipeline (see `get_history_path`)
+        step_name: Name of the step
+        data_dir: The marshal data directory
+        stats_path: Path to the statistics recorded by the step's kernel
+        endpoint_url: Endpoint of the object storage. Defaults to
+            `$KALE_MARSHAL_STORAGE_ENDPOINT`.
+    """
+    try:
+        entry = {"run": gc.get_run_id(),
+                 "step": step_name,
+                 "time": time.time(),
+                 "data_dir_size": _get_disk_usage(data_dir),
+                 "objects": {r["name"]: r["size"]
+                             for r in stats.read(stats_path)
+                             if r["operation"] == "save"}}
+        line = (json.dumps(entry, sort_keys=True) + "\n").encode()
+        history_storage = _get_storage(history_path, endpoint_url)
+        if history_storage:
+            # Objects cannot be appended to, so every record is an object
+            history_storage.put(_get_record_name(entry), line)
+            return
+        os.makedirs(os.path.dirname(history_path), exist_ok=True)
+        fd = os.open(history_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+                     0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+    except Exception:
+        log.exception("Could not record the marshalled data to '%s'",
+                      history_path)
+
+
+def _read_lines(history_path: str,
+                history_storage: Optional[storage.S3Storage]) -> List[str]:
+    if history_storage:
+        return [history_storage.get(relpath).decode()
+                for relpath in history_storage.list_files("")]
+    try:
+        with open(history_path) as f:
+            return list(f)
+    except FileNotFoundError:
+        return []
+
+
+def read(history_path: str,
+         endpoint_url: str = None) -> List[List[Dict[str, Any]]]:
+    """Read the records of the latest `MAX_RUNS` runs, grouped by run.
+
+    Returns: the runs, oldest first. Empty if the history cannot be read.
+    """
+    history_storage = _get_storage(history_path, endpoint_url)
+    try:
+        lines = _read_lines(history_path, history_storage)
+    except Exception as e:
+        log.warning("Could not read the history of the marshalled data"
+                    " from '%s': %s", history_path, e)
+        return []
+    entries = []
+    for line in lines:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            continue
+    runs = dict()
+    # Records in the object storage are listed by name
+    for entry in sorted(entries, key=lambda e: e.get("time", 0)):
+        runs.setdefault(entry.get("run"), []).append(entry)
+    runs = list(runs.values())
+    if len(runs) > 2 * MAX_RUNS:
+        if history_storage:
+            history_storage.remove(_get_record_name(entry)
+                                   for run in runs[:-MAX_RUNS]
+                                   for entry in run)
+        else:
+            _compact(history_path, runs[-MAX_RUNS:])
+    return runs[-MAX_RUNS:]
+
+
+def _compact(history_path: str, runs: List[List[Dict[str, Any]]]):
+    """Atomically replace the history with just the latest runs."""
+    tmp_path = "%s.tmp-%s" % (history_path, utils.random_string(10))
+    with open(tmp_path, "w") as f:
+        for run in runs:
+            for entry in run:
+                f.write(json.dumps(entry, sort_keys=True) + "\n")
+    os.replace(tmp_path, history_path)
+
+
+def _estimate_peak_from_objects(steps: Iterable, sizes: Dict[str, int],
+                                keep_artifacts: bool) -> int:
+    """Simulate the run of the steps, in order, and get the peak usage.
+
+    Objects take up space from when their producer completes until their
+    last consumer completes (or until the end of the run, if artifacts are
+    kept).
+    """
+    steps = list(steps)
+    last_consumer = dict()
+    for i, step in enumerate(steps):
+        for name in step.ins:
+            last_consumer[name] = i
+    live = dict()
+    peak = 0
+    for i, step in enumerate(steps):
+        for name in step.outs:
+            live[name] = sizes.get(name, 0)
+        peak = max(peak, sum(live.values()))
+        if not keep_artifacts:
+            for name in [n for n in live if last_consumer.get(n, -1) <= i]:
+                del live[name]
+    return peak
+
+
+def estimate_volume_size(history_path: str, steps: Iterable,
+                         keep_artifacts: bool = False,
+                         endpoint_url: str = None) -> Optional[str]:
+    """Estimate the size of the marshal volume from the past runs.
+
+    The estimate is the largest of the peak usage that the past runs
+    observed and the peak usage that the sizes of the objects imply for the
+    current steps (e.g., when steps were added), plus `HEADROOM`.
+
+    Args:
+        history_path: Path (or object storage URL) to the history of the
+            pipeline
+        steps: The steps of the pipeline, in topological order
+        keep_artifacts: Whether objects are kept until the end of the run
+        endpoint_url: Endpoint of the object storage
+
+    Returns: A K8s quantity (e.g., "300Mi"), or None if there is no history
+    """
+    runs = read(history_path, endpoint_url)
+    if not runs:
+        return None
+    observed_peak = max(entry.get("data_dir_size", 0)
+                        for run in runs for entry in run)
+    sizes = dict()
+    for run in runs:
+        for entry in run:
+            for name, size in entry.get("objects", {}).items():
+                sizes[name] = max(size, sizes.get(name, 0))
+    peak = max(observed_peak,
+               _estimate_peak_from_objects(steps, sizes, keep_artifacts))
+    size = max(int(peak * (1 + HEADROOM)), MIN_VOLUME_SIZE)
+    log.info("Estimated a marshal volume of %d bytes from %d past run(s)",
+             size, len(runs))
+    return "%dMi" % math.ceil(size / (1 << 20))
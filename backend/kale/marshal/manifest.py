@@ -0,0 +1,131 @@
+# Copyright 2020 The Kale Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Manifest of the marshalled objects of a data directory.
+
+The manifest (`<data_dir>/.kale.manifest.jsonl`) is an append-only log with
+one JSON record per save:
+
+    {"name": ..., "file": ..., "backend": ..., "size": ..., "checksum": ...}
+
+Every record is appended with a single `write` on a file opened in append
+mode, so concurrent writers never interleave their records. Later records of
+the same name supersede earlier ones. Malformed lines (e.g., a record that
+was being written when a step crashed) are ignored.
+
+Loading an object consults the manifest, instead of listing and stat-ing the
+whole data directory. Data directories without a manifest, or objects that
+are missing from it, are resolved by scanning the directory.
+"""
+
+import os
+import json
+import logging
+import threading
+
+from typing import Dict, Any, Optional
+
+from kale.common import utils
+
+log = logging.getLogger(__name__)
+
+MANIFEST_FILE_NAME = ".kale.manifest.jsonl"
+# Rewrite the manifest when it contains this many superseded records
+COMPACTION_THRESHOLD = 1000
+
+_lock = threading.Lock()
+
+
+def get_manifest_path(data_dir: str) -> str:
+    """Get the path to the manifest of a data directory."""
+    return os.path.join(data_dir, MANIFEST_FILE_NAME)
+
+
+def _get_checksum(path: str) -> Optional[str]:
+    # Only content-addressed objects have a checksum for free: the name of
+    # their blob. Hashing every file would double the I/O of each save.
+    if not os.path.islink(path):
+        return None
+    return os.path.basename(os.readlink(path)).split(".", 1)[0]
+
+
+def record(data_dir: str, name: str, path: str, backend: str, size: int):
+    """Append the record of a newly saved object to the manifest.
+
+    Args:
+        data_dir: The data directory
+        name: The name of the object
+        path: Path to the saved file or folder
+        backend: Name of the backend that saved the object
+        size: Size of the saved file or folder, in bytes
+    """
+    entry = {"name": name,
+             "file": os.path.basename(path),
+             "backend": backend,
+             "size": size,
+             "checksum": _get_checksum(path)}
+    line = (json.dumps(entry, sort_keys=True) + "\n").encode()
+    with _lock:
+        fd = os.open(get_manifest_path(data_dir),
+                     os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+
+def _read_records(data_dir: str):
+    with open(get_manifest_path(data_dir), "rb") as f:
+        lines = f.read().splitlines()
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            entry = None
+        if not isinstance(entry, dict) or not {"name", "file"} <= set(entry):
+            log.debug("Skipping malformed manifest record: %s", line)
+            continue
+        yield entry
+
+
+def read(data_dir: str) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Read the manifest of a data directory.
+
+    Returns: a dictionary of object names and their latest records, or None
+        if the data directory does not have a manifest.
+    """
+    try:
+        records = list(_read_records(data_dir))
+    except FileNotFoundError:
+        return None
+    entries = {entry["name"]: entry for entry in records}
+    if len(records) - len(entries) >= COMPACTION_THRESHOLD:
+        _compact(data_dir, entries)
+    return entries
+
+
+def _compact(data_dir: str, entries: Dict[str, Dict[str, Any]]):
+    """Atomically replace the manifest with just the latest records.
+
+    Records appended by other processes while compacting may be lost. This
+    is safe, since objects missing from the manifest are resolved by
+    scanning the data directory.
+    """
+    path = get_manifest_path(data_dir)
+    tmp_path = "%s.tmp-%s" % (path, utils.random_string(10))
+    with _lock:
+        with open(tmp_path, "w") as f:
+            for entry in entries.values():
+                f.write(json.dumps(entry, sort_keys=True) + "\n")
+        os.replace(tmp_path, path)
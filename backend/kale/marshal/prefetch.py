@@ -0,0 +1,136 @@
+# Copyright 2020 The Kale Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Prefetch the inputs of a pipeline step.
+
+A step loads its inputs inside a Jupyter kernel, so reading them only starts
+once the kernel is up. `start` reads the inputs in a background thread while
+the step is still booting the kernel, initializing MLMD and taking snapshots:
+
+* objects of the data directory are read into the page cache, so that the
+  kernel's loads hit warm data, and
+* objects of an object storage are downloaded to the data directory, which
+  the kernel's loads then skip downloading. A load of an object that is
+  still being prefetched waits for its download to complete.
+
+Prefetching is best-effort: errors are logged and the kernel loads whatever
+was not prefetched as usual.
+"""
+
+import os
+import logging
+import threading
+
+from typing import Dict, List, Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+from kale.marshal import manifest
+from kale.marshal.backend import get_storage
+
+log = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1 << 20  # 1MiB
+MAX_WORKERS = 8
+# Do not evict more than this fraction of the available memory from the
+# page cache
+MAX_MEMORY_FRACTION = 0.5
+
+
+def _get_available_memory() -> int:
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_AVPHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return 0
+
+
+def _get_entries(data_dir: str) -> Dict[str, List[str]]:
+    """Group the files and folders of the data dir by object name."""
+    entries = manifest.read(data_dir)
+    if entries is not None:
+        return {name: [entry["file"]] for name, entry in entries.items()}
+    entries = dict()
+    for ls in os.listdir(data_dir):
+        if not ls.startswith("."):
+            entries.setdefault(os.path.splitext(ls)[0], []).append(ls)
+    return entries
+
+
+def _list_files(path: str) -> List[str]:
+    if not os.path.isdir(path):
+        return [path]
+    return [os.path.join(root, f)
+            for root, _, files in os.walk(path, followlinks=True)
+            for f in files]
+
+
+def _read_file(path: str):
+    """Read a file into the page cache."""
+    buf = bytearray(CHUNK_SIZE)
+    with open(path, "rb", buffering=0) as f:
+        if hasattr(os, "posix_fadvise"):
+            # Start the kernel's readahead for the whole file
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+        while f.readinto(buf):
+            pass
+
+
+def _warm_page_cache(data_dir: str, names: Iterable[str]):
+    entries = _get_entries(data_dir)
+    paths = [path for name in names
+             for entry in entries.get(name, [])
+             for path in _list_files(os.path.join(data_dir, entry))]
+    budget = _get_available_memory() * MAX_MEMORY_FRACTION
+    selected = []
+    for path in paths:
+        size = os.path.getsize(path)
+        if size > budget:
+            log.info("Not prefetching %s: not enough free memory", path)
+            continue
+        budget -= size
+        selected.append(path)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        list(pool.map(_read_file, selected))
+
+
+def _download(data_dir: str, names: Iterable[str]):
+    os.makedirs(data_dir, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        list(pool.map(lambda name: get_storage().download(data_dir, name),
+                      names))
+
+
+def prefetch(data_dir: str, names: Iterable[str]):
+    """Prefetch the objects `names` of the data directory."""
+    names = list(names)
+    log.info("Prefetching %s", ", ".join(names))
+    try:
+        if get_storage():
+            _download(data_dir, names)
+        else:
+            _warm_page_cache(data_dir, names)
+    except Exception:
+        log.exception("Failed to prefetch the step's inputs")
+        return
+    log.info("Prefetched %s", ", ".join(names))
+
+
+def start(data_dir: str, names: Iterable[str]) -> threading.Thread:
+    """Prefetch the objects `names` of the data directory in the background.
+
+    Returns: the (daemon) thread that prefetches the objects
+    """
+    thread = threading.Thread(target=prefetch, args=(data_dir, list(names)),
+                              name="kale-marshal-prefetch", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,187 @@
+# Copyright 2020 The Kale Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Lazy proxies for marshalled objects.
+
+A `LazyProxy` stands in for an object that has not been loaded yet. The
+object is loaded the first time the proxy is used (attribute access, operator,
+iteration, ...) and every operation is then forwarded to it.
+"""
+
+import copy
+import operator
+import threading
+
+from typing import Any, Callable, Dict, Optional
+
+
+class LazyProxy(object):
+    """Transparent proxy that loads the wrapped object on first use.
+
+    `isinstance` checks see the class of the wrapped object, while `type()`
+    returns `LazyProxy`. Use `unwrap` to get the underlying object and
+    `get_summary` to get a description of it that does not require loading
+    it.
+    """
+
+    __slots__ = ("_kale_factory", "_kale_obj", "_kale_lock", "_kale_summary",
+                 "__weakref__")
+
+    _UNSET = object()
+
+    def __init__(self, factory: Callable[[], Any],
+                 summary: Dict[str, Any] = None):
+        object.__setattr__(self, "_kale_factory", factory)
+        object.__setattr__(self, "_kale_summary", summary)
+        object.__setattr__(self, "_kale_obj", LazyProxy._UNSET)
+        object.__setattr__(self, "_kale_lock", threading.Lock())
+
+    def _kale_resolve(self) -> Any:
+        obj = object.__getattribute__(self, "_kale_obj")
+        if obj is not LazyProxy._UNSET:
+            return obj
+        with object.__getattribute__(self, "_kale_lock"):
+            obj = object.__getattribute__(self, "_kale_obj")
+            if obj is LazyProxy._UNSET:
+                obj = object.__getattribute__(self, "_kale_factory")()
+                object.__setattr__(self, "_kale_obj", obj)
+                object.__setattr__(self, "_kale_factory", None)
+        return obj
+
+    @property
+    def __class__(self):
+        """Get the class of the wrapped object."""
+        return type(_resolve(self))
+
+    def __getattr__(self, name):
+        """Get an attribute of the wrapped object."""
+        return getattr(_resolve(self), name)
+
+    def __setattr__(self, name, value):
+        """Set an attribute of the wrapped object."""
+        setattr(_resolve(self), name, value)
+
+    def __delattr__(self, name):
+        """Delete an attribute of the wrapped object."""
+        delattr(_resolve(self), name)
+
+    def __reduce_ex__(self, protocol):
+        """Pickle the wrapped object, instead of the proxy."""
+        return _resolve(self).__reduce_ex__(protocol)
+
+
+def _resolve(proxy: LazyProxy) -> Any:
+    return LazyProxy._kale_resolve(proxy)
+
+
+def _binary_op(op: Callable) -> Callable:
+    def forward(self, other):
+        return op(_resolve(self), unwrap(other))
+    return forward
+
+
+def _reflected_op(op: Callable) -> Callable:
+    def forward(self, other):
+        return op(unwrap(other), _resolve(self))
+    return forward
+
+
+def _inplace_op(op: Callable) -> Callable:
+    def forward(self, other):
+        # The result is bound to the name of the proxy in the caller's scope,
+        # so there is no need to update the wrapped object
+        return op(_resolve(self), unwrap(other))
+    return forward
+
+
+def _forward(fn: Callable) -> Callable:
+    def forward(self, *args, **kwargs):
+        return fn(_resolve(self), *args, **kwargs)
+    return forward
+
+
+# Special methods are looked up on the type, bypassing `__getattr__`, so they
+# need to be defined explicitly
+for _name, _fn in [("dir", dir), ("repr", repr), ("str", str),
+                   ("bytes", bytes), ("format", format), ("hash", hash),
+                   ("bool", bool), ("len", len), ("iter", iter),
+                   ("reversed", reversed), ("contains", operator.contains),
+                   ("getitem", operator.getitem),
+                   ("setitem", operator.setitem),
+                   ("delitem", operator.delitem),
+                   ("call", lambda obj, *a, **kw: obj(*a, **kw)),
+                   ("enter", lambda obj: obj.__enter__()),
+                   ("exit", lambda obj, *a: obj.__exit__(*a)),
+                   ("int", int), ("float", float), ("complex", complex),
+                   ("index", operator.index), ("round", round),
+                   ("neg", operator.neg), ("pos", operator.pos),
+                   ("abs", abs), ("invert", operator.invert),
+                   ("array", lambda obj, *a: obj.__array__(*a)),
+                   ("copy", copy.copy), ("deepcopy", copy.deepcopy)]:
+    setattr(LazyProxy, "__%s__" % _name, _forward(_fn))
+
+for _name, _op in [("lt", operator.lt), ("le", operator.le),
+                   ("eq", operator.eq), ("ne", operator.ne),
+                   ("gt", operator.gt), ("ge", operator.ge)]:
+    setattr(LazyProxy, "__%s__" % _name, _binary_op(_op))
+
+for _name, _op in [("add", operator.add), ("sub", operator.sub),
+                   ("mul", operator.mul), ("matmul", operator.matmul),
+                   ("truediv", operator.truediv),
+                   ("floordiv", operator.floordiv), ("mod", operator.mod),
+                   ("divmod", divmod), ("pow", operator.pow),
+                   ("lshift", operator.lshift), ("rshift", operator.rshift),
+                   ("and", operator.and_), ("xor", operator.xor),
+                   ("or", operator.or_)]:
+    setattr(LazyProxy, "__%s__" % _name, _binary_op(_op))
+    setattr(LazyProxy, "__r%s__" % _name, _reflected_op(_op))
+
+for _name, _op in [("add", operator.iadd), ("sub", operator.isub),
+                   ("mul", operator.imul), ("matmul", operator.imatmul),
+                   ("truediv", operator.itruediv),
+                   ("floordiv", operator.ifloordiv), ("mod", operator.imod),
+                   ("pow", operator.ipow), ("lshift", operator.ilshift),
+                   ("rshift", operator.irshift), ("and", operator.iand),
+                   ("xor", operator.ixor), ("or", operator.ior)]:
+    setattr(LazyProxy, "__i%s__" % _name, _inplace_op(_op))
+
+
+def is_proxy(obj: Any) -> bool:
+    """Check whether `obj` is a lazy proxy."""
+    return type(obj) is LazyProxy
+
+
+def is_loaded(obj: Any) -> bool:
+    """Check whether a lazy proxy has already loaded its object."""
+    if not is_proxy(obj):
+        return True
+    return (object.__getattribute__(obj, "_kale_obj")
+            is not LazyProxy._UNSET)
+
+
+def unwrap(obj: Any) -> Any:
+    """Get the object wrapped by a lazy proxy, loading it if needed.
+
+    Objects that are not proxies are returned as they are.
+    """
+    if is_proxy(obj):
+        return _resolve(obj)
+    return obj
+
+
+def get_summary(obj: Any) -> Optional[Dict[str, Any]]:
+    """Get the summary a lazy proxy was created with, without loading it."""
+    if not is_proxy(obj):
+        return None
+    return object.__getattribute__(obj, "_kale_summary")
@@ -0,0 +1,169 @@
+# Copyright 2020 The Kale Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""I/O statistics of the marshalled objects.
+
+Every save and load records the size of the object on disk, the time it
+took, the throughput, the backend and the codec that handled it.
+
+Pipeline steps run the user code (and thus marshalling) inside a Jupyter
+kernel. `enable` makes the kernel append its records to a temporary file,
+which the step then summarizes with `write_report`:
+
+* into `<data_dir>/.kale.stats/<step_name>.json`, and
+* as a table in the step's `mlpipeline-ui-metadata`.
+"""
+
+import os
+import json
+import logging
+import threading
+
+from typing import Dict, List, Any
+
+from kale.common import utils
+
+log = logging.getLogger(__name__)
+
+STATS_PATH_ENV = "KALE_MARSHAL_STATS_PATH"
+DEFAULT_STATS_PATH = "/tmp/kale-marshal-stats.jsonl"
+STATS_DIR_NAME = ".kale.stats"
+OPERATIONS = ("save", "load")
+# Records kept in memory, so that long-lived processes (e.g., a notebook's
+# kernel) do not grow without bound
+MAX_RECORDS = 10000
+
+_records: List[Dict[str, Any]] = list()
+_lock = threading.Lock()
+
+_TABLE_HEADER = ["operation", "name", "backend", "codec", "size (MB)",
+                 "time (s)", "throughput (MB/s)"]
+
+
+def _throughput(size: int, seconds: float) -> float:
+    return size / 1e6 / seconds if seconds > 0 else 0.0
+
+
+def record(operation: str, name: str, backend: str, codec: str, size: int,
+           seconds: float):
+    """Record the statistics of a save or a load.
+
+    The latest `MAX_RECORDS` records are kept in memory (see `get_records`)
+    and every record is appended to the file at `$KALE_MARSHAL_STATS_PATH`,
+    if set.
+    """
+    entry = {"operation": operation, "name": name, "backend": backend,
+             "codec": codec, "size": size, "seconds": seconds,
+             "throughput": _throughput(size, seconds)}
+    log.info("%s %s: %.2f MB in %.3f s (%.2f MB/s)", operation.capitalize(),
+             name, size / 1e6, seconds, entry["throughput"])
+    with _lock:
+        _records.append(entry)
+        del _records[:-MAX_RECORDS]
+        stats_path = os.environ.get(STATS_PATH_ENV)
+        if stats_path:
+            with open(stats_path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+
+def get_records() -> List[Dict[str, Any]]:
+    """Get the latest statistics recorded by the current process."""
+    with _lock:
+        return list(_records)
+
+
+def enable(stats_path: str = DEFAULT_STATS_PATH):
+    """Record the statistics of child processes (e.g., a Jupyter kernel).
+
+    Child processes started after this call inherit the environment variable
+    and append their records to `stats_path`.
+    """
+    if os.path.exists(stats_path):
+        os.remove(stats_path)
+    os.environ[STATS_PATH_ENV] = stats_path
+
+
+def read(stats_path: str = DEFAULT_STATS_PATH) -> List[Dict[str, Any]]:
+    """Read the records appended to `stats_path`."""
+    try:
+        with open(stats_path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def summarize(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Aggregate the records by operation."""
+    totals = dict()
+    for operation in OPERATIONS:
+        op_records = [r for r in records if r["operation"] == operation]
+        size = sum(r["size"] for r in op_records)
+        seconds = sum(r["seconds"] for r in op_records)
+        totals[operation] = {"count": len(op_records), "size": size,
+                             "seconds": seconds,
+                             "throughput": _throughput(size, seconds)}
+    return totals
+
+
+def _to_table_row(operation: str, name: str, backend: str, codec: str,
+                  size: int, seconds: float, throughput: float) -> List[str]:
+    return [operation, name, backend, codec, "%.3f" % (size / 1e6),
+            "%.3f" % seconds, "%.2f" % throughput]
+
+
+def to_uimetadata_table(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Create a KFP ui-metadata table with the records and their totals."""
+    rows = [_to_table_row(r["operation"], r["name"], r["backend"],
+                          r["codec"], r["size"], r["seconds"],
+                          r["throughput"])
+            for r in records]
+    for operation, total in summarize(records).items():
+        if total["count"]:
+            rows.append(_to_table_row(operation, "TOTAL", "", "",
+                                      total["size"], total["seconds"],
+                                      total["throughput"]))
+    return {"type": "table",
+            "storage": "inline",
+            "format": "csv",
+            "header": _TABLE_HEADER,
+            "source": "\n".join(",".join(row) for row in rows)}
+
+
+def write_report(step_name: str, data_dir: str,
+                 stats_path: str = DEFAULT_STATS_PATH):
+    """Summarize the statistics of a pipeline step.
+
+    Args:
+        step_name: Name of the pipeline step
+        data_dir: The marshal data directory, where the JSON report is saved
+        stats_path: Path to the records appended by the Jupyter kernel
+    """
+    from kale.common import kfputils
+
+    records = read(stats_path)
+    if not records:
+        return
+    report = {"step": step_name,
+              "objects": records,
+              "totals": summarize(records)}
+    try:
+        report_path = os.path.join(data_dir, STATS_DIR_NAME,
+                                   "%s.json" % step_name)
+        utils.ensure_or_create_dir(report_path)
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+    except (OSError, RuntimeError):
+        log.exception("Could not write the marshal statistics to '%s'",
+                      data_dir)
+    kfputils.append_uimetadata_outputs([to_uimetadata_table(records)])
@@ -0,0 +1,288 @@
+# Copyright 2020 The Kale Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Object storage for marshalled objects.
+
+By default, marshalled objects live in the data directory, which pipelines
+mount from a shared volume. With an object storage, the data directory is
+just a local staging area: every saved object is uploaded to a bucket and
+every loaded object is downloaded from it first.
+
+The object `<data_dir>/<name>.<ext>` is stored under the key
+`<prefix>/<name>.<ext>` (objects saved as folders, under
+`<prefix>/<name>.<ext>/<file>`), along with its codec annotation and
+summary.
+"""
+
+import os
+import fcntl
+import hashlib
+import logging
+import contextlib
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+
+from kale.marshal import codecs, summary
+
+log = logging.getLogger(__name__)
+
+STORAGE_URL_ENV = "KALE_MARSHAL_STORAGE_URL"
+STORAGE_ENDPOINT_ENV = "KALE_MARSHAL_STORAGE_ENDPOINT"
+S3_SCHEME = "s3://"
+
+
+def parse_url(url: str) -> Tuple[str, str]:
+    """Split an `s3://<bucket>/<prefix>` URL into bucket and prefix."""
+    if not url.startswith(S3_SCHEME):
+        raise ValueError("Unsupported storage URL '%s'. Expected"
+                         " 's3://<bucket>[/<prefix>]'" % url)
+    bucket, _, prefix = url[len(S3_SCHEME):].partition("/")
+    if not bucket:
+        raise ValueError("Storage URL '%s' does not specify a bucket" % url)
+    return bucket, prefix.strip("/")
+
+
+def get_etag(path: str, part_size: int, multipart: bool) -> str:
+    """Compute the ETag S3 assigns to a local file, once uploaded.
+
+    The ETag of a file uploaded with a single request is the MD5 of its
+    contents. The ETag of a file uploaded in parts of `part_size` is the MD5
+    of the MD5s of its parts, followed by the number of parts.
+    """
+    md5 = hashlib.md5()
+    part_digests = []
+    with open(path, "rb") as f:
+        for part in iter(lambda: f.read(part_size), b""):
+            if multipart:
+                part_digests.append(hashlib.md5(part).digest())
+            else:
+                md5.update(part)
+    if not multipart:
+        return md5.hexdigest()
+    return "%s-%d" % (hashlib.md5(b"".join(part_digests)).hexdigest(),
+                      len(part_digests))
+
+
+class S3Storage(object):
+    """Store marshalled objects in an S3-compatible bucket.
+
+    Large files are uploaded with parallel multipart uploads and downloaded
+    with parallel ranged requests. Multiple files (e.g., the contents of a
+    folder) are transferred concurrently.
+
+    Credentials are read from the standard AWS environment variables and
+    config files.
+    """
+
+    # Files larger than this are transferred in parts of this size
+    PART_SIZE = 8 << 20  # 8MiB
+    MAX_WORKERS = 8
+
+    def __init__(self, url: str, endpoint_url: str = None,
+                 max_workers: int = None, part_size: int = None):
+        self.url = url
+        self.bucket, self.prefix = parse_url(url)
+        self.endpoint_url = endpoint_url
+        self.max_workers = max_workers or self.MAX_WORKERS
+        self.part_size = part_size or self.PART_SIZE
+        self._client = None
+
+    @property
+    def client(self):
+        """Get the (lazily created) S3 client."""
+        if self._client is None:
+            import boto3
+            from botocore.config import Config
+            self._client = boto3.client(
+                "s3", endpoint_url=self.endpoint_url,
+                config=Config(max_pool_connections=self.max_workers ** 2))
+        return self._client
+
+    def _get_transfer_config(self):
+        from boto3.s3.transfer import TransferConfig
+        return TransferConfig(multipart_threshold=self.part_size,
+                              multipart_chunksize=self.part_size,
+                              max_concurrency=self.max_workers,
+                              use_threads=True)
+
+    def _get_key(self, relpath: str) -> str:
+        relpath = relpath.replace(os.sep, "/")
+        return "%s/%s" % (self.prefix, relpath) if self.prefix else relpath
+
+    def _get_relpath(self, key: str) -> str:
+        return key[len(self.prefix) + 1:] if self.prefix else key
+
+    def _list_objects(self, relpath_prefix: str) -> List[Dict[str, Any]]:
+        objs = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket,
+                                       Prefix=self._get_key(relpath_prefix)):
+            objs.extend(page.get("Contents", []))
+        return objs
+
+    def _list(self, relpath_prefix: str) -> List[str]:
+        return [obj["Key"] for obj in self._list_objects(relpath_prefix)]
+
+    def _run(self, fn, args_list):
+        if len(args_list) <= 1:
+            return [fn(*args) for args in args_list]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(lambda args: fn(*args), args_list))
+
+    def _upload_file(self, path: str, key: str):
+        self.client.upload_file(path, self.bucket, key,
+                                Config=self._get_transfer_config())
+
+    def _download_file(self, key: str, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.client.download_file(self.bucket, key, path,
+                                  Config=self._get_transfer_config())
+
+    def upload(self, data_dir: str, entry: str):
+        """Upload the file or folder `<data_dir>/<entry>`.
+
+        Any other version of the same object (i.e., with a different
+        extension) is removed from the bucket.
+        """
+        path = os.path.join(data_dir, entry)
+        if os.path.isdir(path):
+            files = [os.path.relpath(os.path.join(root, f), data_dir)
+                     for root, _, fs in os.walk(path) for f in fs]
+        else:
+            files = [entry]
+        for sidecar in (codecs.get_codec_file(path),
+                        summary.get_summary_file(path)):
+            if os.path.exists(sidecar):
+                files.append(os.path.relpath(sidecar, data_dir))
+        keys = {self._get_key(f) for f in files}
+        log.info("Uploading %s to %s (%d files)", entry, self.url, len(files))
+        self._run(self._upload_file,
+                  [(os.path.join(data_dir, f), self._get_key(f))
+                   for f in files])
+        name = os.path.splitext(entry)[0]
+        self.remove(self._get_relpath(key)
+                    for key in self._list_object_keys(name) if key not in keys)
+
+    @staticmethod
+    def _get_entry(relpath: str) -> Optional[str]:
+        """Get the data dir entry a file belongs to."""
+        entry = relpath.split("/", 1)[0]
+        if entry.startswith("."):
+            # codec annotation (.<entry>.codec) or summary
+            # (.<entry>.summary.json)
+            for suffix in (".codec", summary.SUMMARY_SUFFIX):
+                if entry.endswith(suffix):
+                    return entry[1:-len(suffix)]
+            return None
+        return entry
+
+    def _list_object_files(self, name: str) -> List[Dict[str, Any]]:
+        """List the files (keys and sizes) of the object `name`."""
+        return [obj for obj in self._list_objects(name + ".")
+                + self._list_objects("." + name + ".")
+                if os.path.splitext(
+                    self._get_entry(self._get_relpath(obj["Key"]))
+                    or "")[0] == name]
+
+    def _list_object_keys(self, name: str) -> List[str]:
+        """List the keys of all the files of the object `name`."""
+        return [obj["Key"] for obj in self._list_object_files(name)]
+
+    def delete(self, name: str):
+        """Delete all the files of the object `name`."""
+        self.remove(self._get_relpath(key)
+                    for key in self._list_object_keys(name))
+
+    def touch(self, relpath: str):
+        """Create an empty file (e.g., a marker) in the bucket."""
+        self.put(relpath, b"")
+
+    def put(self, relpath: str, data: bytes):
+        """Write a (small) file to the bucket."""
+        self.client.put_object(Bucket=self.bucket, Key=self._get_key(relpath),
+                               Body=data)
+
+    def get(self, relpath: str) -> bytes:
+        """Read a (small) file from the bucket."""
+        obj = self.client.get_object(Bucket=self.bucket,
+                                     Key=self._get_key(relpath))
+        return obj["Body"].read()
+
+    def list_files(self, relpath_prefix: str) -> List[str]:
+        """List the files whose path starts with `relpath_prefix`."""
+        return [self._get_relpath(key) for key in self._list(relpath_prefix)]
+
+    def remove(self, relpaths: Iterable[str]):
+        """Remove files from the bucket."""
+        keys = [{"Key": self._get_key(relpath)} for relpath in relpaths]
+        # A request can delete up to 1000 keys
+        for i in range(0, len(keys), 1000):
+            self.client.delete_objects(Bucket=self.bucket,
+                                       Delete={"Objects": keys[i:i + 1000]})
+
+    def _is_downloaded(self, path: str, obj: Dict[str, Any]) -> bool:
+        """Check whether a local file has the contents of an S3 object."""
+        if not (os.path.isfile(path) and os.path.getsize(path) == obj["Size"]):
+            return False
+        etag = obj["ETag"].strip('"')
+        # Files uploaded with a different part size (or encrypted with KMS)
+        # never match and are downloaded again
+        return get_etag(path, self.part_size, "-" in etag) == etag
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _lock(data_dir: str, name: str):
+        """Lock the download of an object across processes."""
+        os.makedirs(data_dir, exist_ok=True)
+        with open(os.path.join(data_dir, ".%s.download.lock" % name),
+                  "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def download(self, data_dir: str, name: str) -> str:
+        """Download the object `name` to the data directory.
+
+        Files that are already in the data directory (e.g., prefetched)
+        with the same contents, as determined by their ETags, are not
+        downloaded again. If another process (e.g., the step's prefetching)
+        is downloading the same object, wait for it to complete first.
+
+        Returns: the name of the downloaded file or folder (<name>.<ext>)
+        """
+        with self._lock(data_dir, name):
+            return self._download(data_dir, name)
+
+    def _download(self, data_dir: str, name: str) -> str:
+        objs = self._list_object_files(name)
+        entries = sorted({self._get_entry(self._get_relpath(obj["Key"]))
+                          for obj in objs})
+        if not entries:
+            raise ValueError("No object found with name '%s' in %s"
+                             % (name, self.url))
+        if len(entries) > 1:
+            raise ValueError("Found multiple objects with name %s in %s: %s"
+                             % (name, self.url, entries))
+        downloads = [(obj["Key"],
+                      os.path.join(data_dir, self._get_relpath(obj["Key"])))
+                     for obj in objs]
+        downloads = [(key, path) for (key, path), obj in zip(downloads, objs)
+                     if not self._is_downloaded(path, obj)]
+        log.info("Downloading %s from %s (%d/%d files)", entries[0], self.url,
+                 len(downloads), len(objs))
+        self._run(self._download_file, downloads)
+        return entries[0]
@@ -0,0 +1,143 @@
+# Copyright 2020 The Kale Authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Summaries of the marshalled objects.
+
+When summaries are enabled (see `kale.marshal.set_summaries`), every save
+writes a small JSON sidecar next to the marshalled file
+(`.<name>.<ext>.summary.json`) describing the object:
+
+    {"type": "pandas.core.frame.DataFrame", "shape": [1000, 4],
+     "dtype": {"a": "float64", ...}, "size": 32000, "repr": "..."}
+
+Resuming a notebook from a snapshot restores every marshalled object as a
+lazy proxy carrying its summary, so objects can be inspected with
+`kale.marshal.describe` without loading them.
+"""
+
+import os
+import sys
+import json
+import logging
+
+from typing import Any, Dict, Optional
+
+log = logging.getLogger(__name__)
+
+SUMMARY_SUFFIX = ".summary.json"
+# Number of rows of tabular objects included in the summary
+HEAD_ROWS = 5
+MAX_REPR_LENGTH = 1000
+
+
+def get_summary_file(path: str) -> str:
+    """Get the path to the summary of the artifact at `path`."""
+    return os.path.join(os.path.dirname(path),
+                        ".%s%s" % (os.path.basename(path), SUMMARY_SUFFIX))
+
+
+def _truncate(text: str) -> str:
+    if len(text) <= MAX_REPR_LENGTH:
+        return text
+    return text[:MAX_REPR_LENGTH - 3] + "..."
+
+
+def _get_size(obj: Any) -> int:
+    nbytes = getattr(obj, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    memory_usage = getattr(obj, "memory_usage", None)
+    if callable(memory_usage):
+        try:
+            # pandas objects, without introspecting Python objects
+            usage = memory_usage(index=True, deep=False)
+            return int(getattr(usage, "sum", lambda: usage)())
+        except Exception:
+            pass
+    return sys.getsizeof(obj)
+
+
+def _get_dtype(obj: Any) -> Optional[Any]:
+    dtypes = getattr(obj, "dtypes", None)
+    if dtypes is not None and hasattr(dtypes, "items"):
+        return {str(k): str(v) for k, v in dtypes.items()}
+    dtype = getattr(obj, "dtype", None)
+    return str(dtype) if dtype is not None else None
+
+
+def _get_repr(obj: Any) -> str:
+    head = getattr(obj, "head", None)
+    if callable(head) and hasattr(obj, "shape"):
+        try:
+            # pandas objects: render just the first rows
+            return _truncate(repr(head(HEAD_ROWS)))
+        except Exception:
+            pass
+    return _truncate(repr(obj))
+
+
+def summarize(obj: Any) -> Dict[str, Any]:
+    """Describe an object with its type, shape, dtype, size and repr.
+
+    Fields that do not apply to the object (e.g., the shape of a dict) are
+    omitted.
+    """
+    from kale.marshal.backend import _type_name
+
+    summary = {"type": _type_name(type(obj)), "size": _get_size(obj)}
+    shape = getattr(obj, "shape", None)
+    if isinstance(shape, tuple):
+        summary["shape"] = [int(d) if isinstance(d, int) else str(d)
+                            for d in shape]
+    elif hasattr(type(obj), "__len__"):
+        try:
+            summary["length"] = len(obj)
+        except Exception:
+            pass
+    dtype = _get_dtype(obj)
+    if dtype is not None:
+        summary["dtype"] = dtype
+    summary["repr"] = _get_repr(obj)
+    return summary
+
+
+def write(path: str, obj: Any):
+    """Write the summary of `obj`, saved at `path`, to its sidecar.
+
+    Summaries are best effort: failing to summarize an object is logged and
+    never fails the save.
+    """
+    try:
+        summary = summarize(obj)
+        with open(get_summary_file(path), "w") as f:
+            json.dump(summary, f)
+    except Exception as e:
+        log.warning("Could not summarize '%s': %s", os.path.basename(path), e)
+
+
+def read(path: str) -> Optional[Dict[str, Any]]:
+    """Read the summary of the artifact at `path`, if any."""
+    try:
+        with open(get_summary_file(path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def remove(path: str):
+    """Remove the summary of the artifact at `path`, if any."""
+    try:
+        os.remove(get_summary_file(path))
+    except FileNotFoundError:
+        pass
@@ -14,15 +14,17 @@
 
 import os
 import logging
+import functools
 import networkx as nx
 
-from typing import Iterable, NamedTuple
+from typing import Dict, Iterable, List, NamedTuple
 from kubernetes.config import ConfigException
 from kubernetes.client.rest import ApiException
 
 from kale import Step
 from kale.config import Config, Field, validators
 from kale.common import graphutils, utils, podutils
+from kale.marshal import history
 
 log = logging.getLogger(__name__)
 
@@ -111,6 +113,45 @@ class PipelineConfig(Config):
     abs_working_dir = Field(type=str, default="")
     marshal_volume = Field(type=bool, default=True)
     marshal_path = Field(type=str, default="/marshal")
+    # Size of the marshal volume. By default, it is estimated from the
+    # marshalled data of the past runs.
+    marshal_volume_size = Field(type=str,
+                                validators=[validators.K8sQuantityValidator])
+    # Where the steps record the marshalled data of every run, to size the
+    # marshal volume: an s3:// URL, or a path on a ReadWriteMany volume that
+    # the steps mount without snapshotting it. The default path, in the
+    # working directory, is not readable after the run.
+    marshal_history_path = Field(type=str)
+    # Store marshalled objects by content digest to deduplicate saves
+    marshal_content_addressed = Field(type=bool, default=False)
+    # Memory-map marshalled Numpy arrays on load, pipeline-wide and per
+    # variable ("r": read-only, "c": copy-on-write)
+    marshal_mmap_mode = Field(type=str,
+                              validators=[validators.MmapModeValidator])
+    marshal_mmap_variables = Field(
+        type=dict, default=dict(),
+        validators=[validators.MmapVariablesValidator])
+    # Load step inputs lazily, on their first use
+    marshal_lazy_load = Field(type=bool, default=False)
+    # Compress marshalled files, pipeline-wide and per variable
+    marshal_codec = Field(type=str, validators=[validators.CodecValidator])
+    marshal_codec_variables = Field(
+        type=dict, default=dict(),
+        validators=[validators.CodecVariablesValidator])
+    # Write a summary of every marshalled object, to inspect it on resume
+    # without loading it
+    marshal_summaries = Field(type=bool, default=False)
+    # Save DataFrames and Arrow tables that steps extend with a few columns
+    # as deltas of their previous version
+    marshal_delta = Field(type=bool, default=False)
+    # Keep the marshalled objects after their last consumer has completed,
+    # e.g., to explore them from the snapshots of the steps. Set to False to
+    # delete them and free up the marshal volume.
+    marshal_keep_artifacts = Field(type=bool, default=True)
+    # Store marshalled objects in an S3-compatible bucket, instead of a volume
+    marshal_storage_url = Field(type=str,
+                                validators=[validators.StorageURLValidator])
+    marshal_storage_endpoint = Field(type=str)
     autosnapshot = Field(type=bool, default=True)
     steps_defaults = Field(type=dict, default=dict())
     kfp_host = Field(type=str)
@@ -126,6 +167,9 @@ class PipelineConfig(Config):
         return utils.get_main_source_path()
 
     def _postprocess(self):
+        # The history is shared by the runs of the pipeline, so it is named
+        # after the pipeline before the name gets randomized
+        self._set_marshal_history_path()
         self._randomize_pipeline_name()
         self._set_docker_image()
         self._set_volume_storage_class()
@@ -134,6 +178,13 @@ class PipelineConfig(Config):
         self._set_abs_working_dir()
         self._set_marshal_path()
 
+    def _set_marshal_history_path(self):
+        if not self.marshal_history_path:
+            self.marshal_history_path = history.get_history_path(
+                self.abs_working_dir
+                or utils.abs_working_dir(self.source_path),
+                self.pipeline_name)
+
     def _randomize_pipeline_name(self):
         self.pipeline_name = "%s-%s" % (self.pipeline_name,
                                         utils.random_string())
@@ -179,7 +230,12 @@ class PipelineConfig(Config):
     def _set_marshal_path(self):
         # Check if the workspace directory is under a mounted volume.
         # If so, marshal data into a folder in that volume,
-        # otherwise create a new volume and mount it at /marshal
+        # otherwise create a new volume and mount it at /marshal.
+        # With an object storage, steps exchange data through the bucket and
+        # the marshal directory is just a local staging area
+        if self.marshal_storage_url:
+            self.marshal_volume = False
+            return
         wd = os.path.realpath(self.abs_working_dir)
         # get the volumes for which the working directory is a sub-path of
         # the mount point
@@ -193,6 +249,15 @@ class PipelineConfig(Config):
             self.marshal_path = os.path.join(wd, marshal_dir)
 
 
+def _mutation(method):
+    """Bump the version of the pipeline's graph when calling `method`."""
+    @functools.wraps(method)
+    def _wrapper(self, *args, **kwargs):
+        self.version += 1
+        return method(self, *args, **kwargs)
+    return _wrapper
+
+
 class Pipeline(nx.DiGraph):
     """A Pipeline that can be converted into a KFP pipeline.
 
@@ -201,7 +266,29 @@ class Pipeline(nx.DiGraph):
     algorithms but provides helper functions to work with Step objects
     instead of standard networkx "nodes". This makes it simpler to access
     the steps of the pipeline and their attributes.
+
+    The topological order and the ancestors of the steps are computed once
+    and reused until the graph changes (see `get_graph_index`).
     """
+    # Incremented by every method that changes the nodes or edges
+    version = 0
+    _graph_index = None
+
+    add_node = _mutation(nx.DiGraph.add_node)
+    add_nodes_from = _mutation(nx.DiGraph.add_nodes_from)
+    remove_node = _mutation(nx.DiGraph.remove_node)
+    remove_nodes_from = _mutation(nx.DiGraph.remove_nodes_from)
+    add_edge = _mutation(nx.DiGraph.add_edge)
+    add_edges_from = _mutation(nx.DiGraph.add_edges_from)
+    add_weighted_edges_from = _mutation(nx.DiGraph.add_weighted_edges_from)
+    remove_edge = _mutation(nx.DiGraph.remove_edge)
+    remove_edges_from = _mutation(nx.DiGraph.remove_edges_from)
+    clear = _mutation(nx.DiGraph.clear)
+    # Not available in older NetworkX versions
+    if hasattr(nx.DiGraph, "update"):
+        update = _mutation(nx.DiGraph.update)
+    if hasattr(nx.DiGraph, "clear_edges"):
+        clear_edges = _mutation(nx.DiGraph.clear_edges)
 
     def __init__(self, config: PipelineConfig, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -213,7 +300,7 @@ class Pipeline(nx.DiGraph):
         """Add a new Step to the pipeline."""
         if not isinstance(step, Step):
             raise RuntimeError("Not of type Step.")
-        if step.name in self.steps_names:
+        if step.name in self.nodes:
             raise RuntimeError("Step with name '%s' already exists"
                                % step.name)
         self.add_node(step.name, step=step)
@@ -234,7 +321,7 @@ class Pipeline(nx.DiGraph):
     @property
     def steps_names(self):
         """Get all Steps' names, sorted topologically."""
-        return [step.name for step in self._topological_sort()]
+        return list(self.get_graph_index().order)
 
     @property
     def all_steps_parameters(self):
@@ -286,8 +373,15 @@ class Pipeline(nx.DiGraph):
                 raise ValueError("Unknown volume type: {}".format(v.type))
         self.pipeline_parameters.update(volume_parameters)
 
-    def _topological_sort(self) -> Iterable[Step]:
-        return self._steps_iterable(nx.topological_sort(self))
+    def get_graph_index(self) -> graphutils.GraphIndex:
+        """Get the topological order and the ancestors of the steps.
+
+        The index is built once for every version of the graph.
+        """
+        if (self._graph_index is None
+                or self._graph_index.version != self.version):
+            self._graph_index = graphutils.GraphIndex(self, self.version)
+        return self._graph_index
 
     def get_ordered_ancestors(self, step_name: str) -> Iterable[Step]:
         """Return the ancestors of a step in an ordered manner.
@@ -298,7 +392,19 @@ class Pipeline(nx.DiGraph):
             Iterable[Step]: A Steps iterable.
         """
         return self._steps_iterable(
-            graphutils.get_ordered_ancestors(self, step_name))
+            self.get_graph_index().get_ordered_ancestors(step_name))
+
+    def get_artifact_consumers(self) -> Dict[str, List[str]]:
+        """Get the names of the steps that consume each marshalled object.
+
+        Returns:
+            Dict[str, List[str]]: The sorted step names, by variable name.
+        """
+        consumers = dict()
+        for step in self.steps:
+            for name in step.ins:
+                consumers.setdefault(name, []).append(step.name)
+        return {name: sorted(steps) for name, steps in consumers.items()}
 
     def _steps_iterable(self, step_names: Iterable[str]) -> Iterable[Step]:
         for name in step_names:
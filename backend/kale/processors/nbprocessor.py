@@ -22,7 +22,7 @@ import nbformat as nb
 
 from kale.config import Field
 from kale import Pipeline, Step, PipelineConfig, PipelineParam
-from kale.common import astutils, flakeutils, graphutils, utils
+from kale.common import astutils, graphutils, symbolutils
 
 # fixme: Change the name of this key to `kale_metadata`
 KALE_NB_METADATA_KEY = 'kubeflow_notebook'
@@ -175,6 +175,8 @@ class NotebookProcessor:
         """
         self.nb_path = os.path.expanduser(nb_path)
         self.notebook = self._read_notebook()
+        # Symbol tables of the steps, persisted across compilations
+        self.analysis_cache_dir = symbolutils.get_cache_dir(self.nb_path)
 
         nb_metadata = self.notebook.metadata.get(KALE_NB_METADATA_KEY, dict())
 
@@ -196,6 +198,14 @@ class NotebookProcessor:
                              " path %s" % self.nb_path)
         return nb.read(self.nb_path, as_version=nb.NO_CONVERT)
 
+    def _analyze(self, code: str) -> symbolutils.SymbolTable:
+        try:
+            return symbolutils.analyze(code, self.analysis_cache_dir)
+        except SyntaxError as e:
+            # compilation errors are the only errors that Flakes reports
+            raise RuntimeError("Flakes reported the following error:"
+                               "\n\t{}".format(e))
+
     def to_pipeline(self):
         """Convert an annotated Notebook to a Pipeline object."""
         (pipeline_parameters_source,
@@ -212,6 +222,8 @@ class NotebookProcessor:
         # run static analysis over the source code
         self.dependencies_detection(imports_and_functions)
         self.assign_metrics(pipeline_metrics)
+        if self.analysis_cache_dir:
+            symbolutils.prune_cache(self.analysis_cache_dir)
 
         # if there are multiple DAG leaves, add an empty step at the end of the
         # pipeline for final snapshot
@@ -591,8 +603,8 @@ class NotebookProcessor:
         # XXX: Extension parsing of the RPC result
         rev_pipeline_metrics = {v: k for k, v in pipeline_metrics.items()}
         metrics_left = set(rev_pipeline_metrics.keys())
-        for anc in graphutils.get_ordered_ancestors(self.pipeline,
-                                                    tmp_step_name):
+        graph_index = self.pipeline.get_graph_index()
+        for anc in graph_index.get_ordered_ancestors(tmp_step_name):
             if not metrics_left:
                 break
 
@@ -600,7 +612,8 @@ class NotebookProcessor:
             anc_source = '\n'.join(anc_step.source)
             # get all the marshal candidates from father's source and intersect
             # with the metrics that have not been matched yet
-            marshal_candidates = astutils.get_marshal_candidates(anc_source)
+            marshal_candidates = self._analyze(
+                anc_source).marshal_candidates
             assigned_metrics = metrics_left.intersection(marshal_candidates)
             # Remove the metrics that have already been assigned.
             metrics_left.difference_update(assigned_metrics)
@@ -630,15 +643,26 @@ class NotebookProcessor:
          call these functions) - in this action pipeline parameters are taken
          into consideration.
         4. Get all the function that `step` calls
-        5. For every `step`'s ancestor `anc` do
-            - Get all the potential names (objects, functions, ...) of `anc`
-             that could be marshalled (saved)
-            - Intersect this with the `step`'s `ins` (from action 2) and add
-             the result to `anc`'s `outs`.
+        5. Merge the definitions that reach `step` from its parents, i.e., the
+         nearest ancestor that defines or modifies every name and the
+         nearest ancestor that defines every function (see
+         `graphutils.get_reaching_definitions`). Then:
+            - Add each of `step`'s `ins` (from action 2) to the `outs` of the
+             ancestor that defines it.
             - for every `step`'s function call (action 4), check if this
-             function was defined in `anc` and if it has free variables
-             (action 3). If so, add to `step`'s `ins` and to `anc`'s `outs`
-             these free variables.
+             function was defined in an ancestor and if it has free variables
+             (action 3). If so, add to `step`'s `ins` and to that ancestor's
+             `outs` these free variables.
+        6. Record the names that `step` defines or modifies and the
+         functions it defines, for its descendants
+
+        This is a single forward pass over the graph, so every step is
+        analyzed once, regardless of its number of ancestors.
+
+        Steps that only read a variable (e.g., to inspect a DataFrame) do not
+        define it: their descendants load the variable from the step that
+        last modified it, so it is not saved again unchanged (see
+        `symbolutils.SymbolTable.mutated`).
 
         Args:
             imports_and_functions: Multiline Python source that is prepended to
@@ -646,6 +670,12 @@ class NotebookProcessor:
 
         Returns: annotated graph
         """
+        # The names that every visited step defines or modifies, the functions
+        # it defines and the definitions of both that reach it
+        vars_defined = dict()
+        fns_defined = dict()
+        reaching_vars = dict()
+        reaching_fns = dict()
         # resolve the data dependencies between steps, looping through the
         # graph
         for step in self.pipeline.steps:
@@ -663,79 +693,78 @@ class NotebookProcessor:
             # Get all the function calls. This will be used below to check if
             # any of the ancestors declare any of these functions. Is that is
             # so, the free variables of those functions will have to be loaded.
-            fn_calls = astutils.get_function_calls(step_source)
+            fn_calls = set(self._analyze(step_source).calls)
 
             # add OUT dependencies annotations in the PARENT nodes-------------
-            # Intersect the missing names of this father's child with all
-            # the father's names. The intersection is the list of variables
-            # that the father need to serialize
-            # The ancestors are the the nodes that have a path to `step`,
-            # ordered by path length.
-            ins_left = ins.copy()
-            for anc in (graphutils.get_ordered_ancestors(self.pipeline,
-                                                         step.name)):
-                if not ins_left:
-                    # if there are no more variables that need to be
-                    # marshalled, stop the graph traverse
-                    break
-                anc_step = self.pipeline.get_step(anc)
-                anc_source = '\n'.join(anc_step.source)
-                # get all the marshal candidates from father's source and
-                # intersect with the required names of the current node
-                marshal_candidates = astutils.get_marshal_candidates(
-                    anc_source)
-                outs = ins_left.intersection(marshal_candidates)
-                # Remove the ins that have already been assigned to an ancestor
-                ins_left.difference_update(outs)
+            # The nearest ancestor that defines or modifies a name the current
+            # node is missing needs to serialize it. Ancestors are ordered by
+            # path length, as in `graphutils.get_ordered_ancestors`.
+            var_defs = graphutils.get_reaching_definitions(
+                self.pipeline, step.name, vars_defined, reaching_vars)
+            fn_defs = graphutils.get_reaching_definitions(
+                self.pipeline, step.name, fns_defined, reaching_fns)
+            for name in ins:
+                if name in var_defs:
+                    self.pipeline.get_step(
+                        var_defs[name].ancestor).outs.add(name)
+            # Functions are served by the ancestors up to the farthest one
+            # that serves the ins, or by any ancestor if some of the ins are
+            # defined by none. A step without ins loads no free variables.
+            if not ins:
+                fn_calls = set()
+            last_def = None
+            if ins and ins.issubset(var_defs):
+                last_def = max(var_defs[name] for name in ins)
+            fns_mutated = set()
+            for fn_call in sorted(fn_calls):
+                if fn_call not in fn_defs:
+                    continue
+                if last_def is not None and fn_defs[fn_call] > last_def:
+                    continue
+                anc_step = self.pipeline.get_step(fn_defs[fn_call].ancestor)
                 # Include free variables
-                to_remove = set()
-                for fn_call in fn_calls:
-                    anc_fns_free_vars = anc_step.fns_free_variables
-                    if fn_call in anc_fns_free_vars.keys():
-                        # the current step needs to load these variables
-                        fn_free_vars, used_params = anc_fns_free_vars[fn_call]
-                        # search if this function calls other functions (i.e.
-                        # if its free variables are found in the free variables
-                        # dict)
-                        _left = list(fn_free_vars)
-                        while _left:
-                            _cur = _left.pop(0)
-                            # if the free var is itself a fn with free vars
-                            if _cur in anc_fns_free_vars:
-                                fn_free_vars.update(anc_fns_free_vars[_cur][0])
-                                _left = _left + list(
-                                    anc_fns_free_vars[_cur][0])
-                        ins.update(fn_free_vars)
-                        # the current ancestor needs to save these variables
-                        outs.update(fn_free_vars)
-                        # add the parameters used by the function to the list
-                        # of pipeline parameters used by the step
-                        _pps = self.pipeline.pipeline_parameters
-                        for param in used_params:
-                            parameters[param] = _pps[param]
-
-                        # Remove this function as it has been served. We don't
-                        # want other ancestors to save free variables for this
-                        # function. Using the helper to_remove because the set
-                        # can not be resized during iteration.
-                        to_remove.add(fn_call)
-                        # add the function and its free variables to the
-                        # current step as well. This is useful in case
-                        # *another* function will call this one (`fn_call`) in
-                        # a child step. In this way we can track the calls up
-                        # to the last free variable. (refer to test
-                        # `test_dependencies_detection_recursive`)
-                        fns_free_variables[fn_call] = anc_fns_free_vars[
-                            fn_call]
-                fn_calls.difference_update(to_remove)
-                # Add to ancestor the new outs annotations. First merge the
-                # current outs present in the anc with the new ones
-                anc_step.outs.update(outs)
+                anc_fns_free_vars = anc_step.fns_free_variables
+                # the current step needs to load these variables
+                fn_free_vars, used_params = anc_fns_free_vars[fn_call]
+                # search if this function calls other functions (i.e.
+                # if its free variables are found in the free variables
+                # dict)
+                _left = list(fn_free_vars)
+                while _left:
+                    _cur = _left.pop(0)
+                    # if the free var is itself a fn with free vars
+                    if _cur in anc_fns_free_vars:
+                        fn_free_vars.update(anc_fns_free_vars[_cur][0])
+                        _left = _left + list(anc_fns_free_vars[_cur][0])
+                ins.update(fn_free_vars)
+                # the function might modify them
+                fns_mutated.update(fn_free_vars)
+                # the ancestor needs to save these variables
+                anc_step.outs.update(fn_free_vars)
+                # add the parameters used by the function to the list
+                # of pipeline parameters used by the step
+                _pps = self.pipeline.pipeline_parameters
+                for param in used_params:
+                    parameters[param] = _pps[param]
+                # add the function and its free variables to the
+                # current step as well. This is useful in case
+                # *another* function will call this one (`fn_call`) in
+                # a child step. In this way we can track the calls up
+                # to the last free variable. (refer to test
+                # `test_dependencies_detection_recursive`)
+                fns_free_variables[fn_call] = anc_fns_free_vars[fn_call]
 
             step.ins = sorted(ins)
             step.parameters = parameters
             step.fns_free_variables = fns_free_variables
 
+            symbols = self._analyze(step_source)
+            vars_defined[step.name] = symbols.marshal_candidates.intersection(
+                symbols.get_mutated(fns_mutated))
+            fns_defined[step.name] = fns_free_variables.keys()
+            reaching_vars[step.name] = var_defs
+            reaching_fns[step.name] = fn_defs
+
     def _detect_in_dependencies(self,
                                 source_code: str,
                                 pipeline_parameters: dict = None):
@@ -745,8 +774,7 @@ class NotebookProcessor:
             source_code: Multiline Python source code
             pipeline_parameters: Pipeline parameters dict
         """
-        commented_source_code = utils.comment_magic_commands(source_code)
-        ins = flakeutils.pyflakes_report(code=commented_source_code)
+        ins = set(self._analyze(source_code).undefined)
 
         # Pipeline parameters will be part of the names that are missing,
         # but of course we don't want to marshal them in as they will be
@@ -780,8 +808,10 @@ class NotebookProcessor:
         In the example above, `x` is a free variable for function `foo`,
         because it is defined outside of the context of `foo`.
 
-        Here we run the PyFlakes report over the function body to get all the
+        Here we run the PyFlakes checker over the function body to get all the
         missing names (i.e. free variables), excluding the function arguments.
+        Both `source_code` and `imports_and_functions` are parsed just once
+        (see `symbolutils.analyze`).
 
         Args:
             source_code: Multiline Python source code
@@ -798,12 +828,11 @@ class NotebookProcessor:
             a list of variables names + consumed pipeline parameters as values.
         """
         fns_free_vars = dict()
-        # now check the functions' bodies for free variables. fns is a
-        # dict function_name -> function_source
-        fns = astutils.parse_functions(source_code)
-        for fn_name, fn in fns.items():
-            code = imports_and_functions + "\n" + fn
-            free_vars = flakeutils.pyflakes_report(code=code)
+        symbols = self._analyze(source_code)
+        prelude = self._analyze(imports_and_functions)
+        # now check the functions' bodies for free variables
+        for fn_name in symbols.functions:
+            free_vars = symbols.get_free_variables(fn_name, prelude)
             # the pipeline parameters that are used in the function
             consumed_params = {}
             if step_parameters:
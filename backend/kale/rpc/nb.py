@@ -168,17 +168,25 @@ def _get_kale_marshal_dir(source_notebook_path):
     return os.path.realpath(os.path.join(nb_dir_name, kale_marshal_dir_name))
 
 
-def unmarshal_data(source_notebook_path):
-    """Unmarshal data from the marshal directory."""
+def unmarshal_data(source_notebook_path, lazy=False):
+    """Unmarshal data from the marshal directory.
+
+    With `lazy`, objects are restored as lazy proxies, which are loaded the
+    first time they are used. Use `kale.marshal.describe` to inspect them
+    without loading them.
+    """
     source_notebook_path = os.path.expanduser(source_notebook_path)
     kale_marshal_dir = _get_kale_marshal_dir(source_notebook_path)
     if not os.path.exists(kale_marshal_dir):
         return {}
 
     marshal.set_data_dir(kale_marshal_dir)
-    return {os.path.splitext(f)[0]:
-            marshal.load(os.path.splitext(f)[0])
-            for f in os.listdir(kale_marshal_dir)}
+    # Hidden entries are used internally by Kale (e.g., the blob store of a
+    # content-addressed data directory) and don't map to any variable
+    names = sorted({os.path.splitext(f)[0]
+                    for f in os.listdir(kale_marshal_dir)
+                    if not f.startswith(".")})
+    return marshal.load_many(names, lazy=lazy)
 
 
 def explore_notebook(request, source_notebook_path):
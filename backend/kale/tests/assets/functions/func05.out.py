@@ -14,7 +14,9 @@ def test():
     # -----------------------DATA SAVING START---------------------------------
     from kale import marshal as _kale_marshal
     _kale_marshal.set_data_dir("/marshal")
-    _kale_marshal.save(v1, "v1")
+    _kale_marshal.save_many({
+        "v1": v1,
+    })
     # -----------------------DATA SAVING END-----------------------------------
     '''
 
@@ -22,6 +24,8 @@ def test():
     from kale.common.jputils import run_code as _kale_run_code
     from kale.common.kfputils import \
         update_uimetadata as _kale_update_uimetadata
+    from kale.marshal import stats as _kale_marshal_stats
+    _kale_marshal_stats.enable()
     _kale_blocks = (
         _kale_block1,
         _kale_block2,
@@ -30,5 +34,9 @@ def test():
     with open("/test.html", "w") as f:
         f.write(_kale_html_artifact)
     _kale_update_uimetadata('test')
+    _kale_marshal_stats.write_report("test", "/marshal")
+    from kale.marshal import history as _kale_marshal_history
+    _kale_marshal_history.record_step("/path/to/.kale/test.marshal_history.jsonl",
+                                      "test", "/marshal")
 
     _kale_mlmdutils.call("mark_execution_complete")
@@ -0,0 +1,45 @@
+def test():
+    # read the inputs while the step initializes and boots the kernel
+    from kale.marshal import prefetch as _kale_marshal_prefetch
+    _kale_marshal_prefetch.start("/marshal", [
+        "v1",
+    ])
+
+    from kale.common import mlmdutils as _kale_mlmdutils
+    _kale_mlmdutils.init_metadata()
+
+    _kale_data_loading_block = '''
+    # -----------------------DATA LOADING START--------------------------------
+    from kale import marshal as _kale_marshal
+    _kale_marshal.set_data_dir("/marshal")
+    _kale_data = _kale_marshal.load_many([
+        "v1",
+    ])
+    v1 = _kale_data["v1"]
+    del _kale_data
+    # -----------------------DATA LOADING END----------------------------------
+    '''
+
+    # run the code blocks inside a jupyter kernel
+    from kale.common.jputils import run_code as _kale_run_code
+    from kale.common.kfputils import \
+        update_uimetadata as _kale_update_uimetadata
+    from kale.marshal import stats as _kale_marshal_stats
+    _kale_marshal_stats.enable()
+    _kale_blocks = (_kale_data_loading_block,
+                    )
+    _kale_html_artifact = _kale_run_code(_kale_blocks)
+    with open("/test.html", "w") as f:
+        f.write(_kale_html_artifact)
+    _kale_update_uimetadata('test')
+    _kale_marshal_stats.write_report("test", "/marshal")
+    from kale.marshal import history as _kale_marshal_history
+    _kale_marshal_history.record_step("/path/to/.kale/test.marshal_history.jsonl",
+                                      "test", "/marshal")
+
+    # after the snapshot, which has to contain the inputs of the step
+    from kale.marshal import gc as _kale_marshal_gc
+    _kale_marshal_gc.release("test", {
+        "v1": ["test"],
+    }, "/marshal")
+    _kale_mlmdutils.call("mark_execution_complete")
@@ -37,7 +37,9 @@ def create_matrix(d1: int, d2: int):
     # -----------------------DATA SAVING START---------------------------------
     from kale import marshal as _kale_marshal
     _kale_marshal.set_data_dir("/marshal")
-    _kale_marshal.save(rnd_matrix, "rnd_matrix")
+    _kale_marshal.save_many({
+        "rnd_matrix": rnd_matrix,
+    })
     # -----------------------DATA SAVING END-----------------------------------
     '''
 
@@ -45,6 +47,8 @@ def create_matrix(d1: int, d2: int):
     from kale.common.jputils import run_code as _kale_run_code
     from kale.common.kfputils import \
         update_uimetadata as _kale_update_uimetadata
+    from kale.marshal import stats as _kale_marshal_stats
+    _kale_marshal_stats.enable()
     _kale_blocks = (_kale_pipeline_parameters_block,
                     _kale_block1,
                     _kale_block2,
@@ -54,11 +58,21 @@ def create_matrix(d1: int, d2: int):
     with open("/create_matrix.html", "w") as f:
         f.write(_kale_html_artifact)
     _kale_update_uimetadata('create_matrix')
+    _kale_marshal_stats.write_report("create_matrix", "/marshal")
+    from kale.marshal import history as _kale_marshal_history
+    _kale_marshal_history.record_step("/kale/.kale/hp-test.marshal_history.jsonl",
+                                      "create_matrix", "/marshal")
 
     _kale_mlmdutils.call("mark_execution_complete")
 
 
 def sum_matrix():
+    # read the inputs while the step initializes and boots the kernel
+    from kale.marshal import prefetch as _kale_marshal_prefetch
+    _kale_marshal_prefetch.start("/marshal", [
+        "rnd_matrix",
+    ])
+
     from kale.common import mlmdutils as _kale_mlmdutils
     _kale_mlmdutils.init_metadata()
 
@@ -66,7 +80,11 @@ def sum_matrix():
     # -----------------------DATA LOADING START--------------------------------
     from kale import marshal as _kale_marshal
     _kale_marshal.set_data_dir("/marshal")
-    rnd_matrix = _kale_marshal.load("rnd_matrix")
+    _kale_data = _kale_marshal.load_many([
+        "rnd_matrix",
+    ])
+    rnd_matrix = _kale_data["rnd_matrix"]
+    del _kale_data
     # -----------------------DATA LOADING END----------------------------------
     '''
 
@@ -90,6 +108,8 @@ def sum_matrix():
     from kale.common.jputils import run_code as _kale_run_code
     from kale.common.kfputils import \
         update_uimetadata as _kale_update_uimetadata
+    from kale.marshal import stats as _kale_marshal_stats
+    _kale_marshal_stats.enable()
     _kale_blocks = (_kale_data_loading_block,
                     _kale_block1,
                     _kale_block2,
@@ -99,6 +119,10 @@ def sum_matrix():
     with open("/sum_matrix.html", "w") as f:
         f.write(_kale_html_artifact)
     _kale_update_uimetadata('sum_matrix')
+    _kale_marshal_stats.write_report("sum_matrix", "/marshal")
+    from kale.marshal import history as _kale_marshal_history
+    _kale_marshal_history.record_step("/kale/.kale/hp-test.marshal_history.jsonl",
+                                      "sum_matrix", "/marshal")
 
     _kale_mlmdutils.call("mark_execution_complete")
 
@@ -138,6 +162,8 @@ def auto_generated_pipeline(booltest='True', d1='5', d2='6', strtest='test'):
     _kale_step_limits = {'nvidia.com/gpu': '2'}
     for _kale_k, _kale_v in _kale_step_limits.items():
         _kale_create_matrix_task.container.add_resource_limit(_kale_k, _kale_v)
+    _kale_create_matrix_task.container.add_env_variable(k8s_client.V1EnvVar(
+        name="KALE_MARSHAL_RUN_ID", value="{{workflow.uid}}"))
     _kale_create_matrix_task.container.working_dir = "/kale"
     _kale_create_matrix_task.container.set_security_context(
         k8s_client.V1SecurityContext(run_as_user=0))
@@ -163,6 +189,8 @@ def auto_generated_pipeline(booltest='True', d1='5', d2='6', strtest='test'):
     _kale_sum_matrix_task = _kale_sum_matrix_op()\
         .add_pvolumes(_kale_pvolumes_dict)\
         .after(_kale_create_matrix_task)
+    _kale_sum_matrix_task.container.add_env_variable(k8s_client.V1EnvVar(
+        name="KALE_MARSHAL_RUN_ID", value="{{workflow.uid}}"))
     _kale_sum_matrix_task.container.working_dir = "/kale"
     _kale_sum_matrix_task.container.set_security_context(
         k8s_client.V1SecurityContext(run_as_user=0))
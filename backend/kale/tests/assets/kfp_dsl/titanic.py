@@ -42,9 +42,11 @@ def loaddata():
     # -----------------------DATA SAVING START---------------------------------
     from kale import marshal as _kale_marshal
     _kale_marshal.set_data_dir("/marshal")
-    _kale_marshal.save(PREDICTION_LABEL, "PREDICTION_LABEL")
-    _kale_marshal.save(test_df, "test_df")
-    _kale_marshal.save(train_df, "train_df")
+    _kale_marshal.save_many({
+        "PREDICTION_LABEL": PREDICTION_LABEL,
+        "test_df": test_df,
+        "train_df": train_df,
+    })
     # -----------------------DATA SAVING END-----------------------------------
     '''
 
@@ -52,6 +54,8 @@ def loaddata():
     from kale.common.jputils import run_code as _kale_run_code
     from kale.common.kfputils import \
         update_uimetadata as _kale_update_uimetadata
+    from kale.marshal import stats as _kale_marshal_stats
+    _kale_marshal_stats.enable()
     _kale_blocks = (
         _kale_block1,
         _kale_block2,
@@ -60,11 +64,22 @@ def loaddata():
     with open("/loaddata.html", "w") as f:
         f.write(_kale_html_artifact)
     _kale_update_uimetadata('loaddata')
+    _kale_marshal_stats.write_report("loaddata", "/marshal")
+    from kale.marshal import history as _kale_marshal_history
+    _kale_marshal_history.record_step("/kale/.kale/titanic-ml.marshal_history.jsonl",
+                                      "loaddata", "/marshal")
 
     _kale_mlmdutils.call("mark_execution_complete")
 
 
 def datapreprocessing():
+    # read the inputs while the step initializes and boots the kernel
+    from kale.marshal import prefetch as _kale_marshal_prefetch
+    _kale_marshal_prefetch.start("/marshal", [
+        "test_df",
+        "train_df",
+    ])
+
     from kale.common import mlmdutils as _kale_mlmdutils
     _kale_mlmdutils.init_metadata()
 
@@ -72,8 +87,13 @@ def datapreprocessing():
     # -----------------------DATA LOADING START--------------------------------
     from kale import marshal as _kale_marshal
     _kale_marshal.set_data_dir("/marshal")
-    test_df = _kale_marshal.load("test_df")
-    train_df = _kale_marshal.load("train_df")
+    _kale_data = _kale_marshal.load_many([
+        "test_df",
+        "train_df",
+    ])
+    test_df = _kale_data["test_df"]
+    train_df = _kale_data["train_df"]
+    del _kale_data
     # -----------------------DATA LOADING END----------------------------------
     '''
 
@@ -164,8 +184,10 @@ def datapreprocessing():
     # -----------------------DATA SAVING START---------------------------------
     from kale import marshal as _kale_marshal
     _kale_marshal.set_data_dir("/marshal")
-    _kale_marshal.save(test_df, "test_df")
-    _kale_marshal.save(train_df, "train_df")
+    _kale_marshal.save_many({
+        "test_df": test_df,
+        "train_df": train_df,
+    })
     # -----------------------DATA SAVING END-----------------------------------
     '''
 
@@ -173,6 +195,8 @@ def datapreprocessing():
     from kale.common.jputils import run_code as _kale_run_code
     from kale.common.kfputils import \
         update_uimetadata as _kale_update_uimetadata
+    from kale.marshal import stats as _kale_marshal_stats
+    _kale_marshal_stats.enable()
     _kale_blocks = (_kale_data_loading_block,
                     _kale_block1,
                     _kale_block2,
@@ -187,11 +211,23 @@ def datapreprocessing():
     with open("/datapreprocessing.html", "w") as f:
         f.write(_kale_html_artifact)
     _kale_update_uimetadata('datapreprocessing')
+    _kale_marshal_stats.write_report("datapreprocessing", "/marshal")
+    from kale.marshal import history as _kale_marshal_history
+    _kale_marshal_history.record_step("/kale/.kale/titanic-ml.marshal_history.jsonl",
+                                      "datapreprocessing", "/marshal")
 
     _kale_mlmdutils.call("mark_execution_complete")
 
 
 def featureengineering():
+    # read the inputs while the step initializes and boots the kernel
+    from kale.marshal import prefetch as _kale_marshal_prefetch
+    _kale_marshal_prefetch.start("/marshal", [
+        "PREDICTION_LABEL",
+        "test_df",
+        "train_df",
+    ])
+
     from kale.common import mlmdutils as _kale_mlmdutils
     _kale_mlmdutils.init_metadata()
 
@@ -199,9 +235,15 @@ def featureengineering():
     # -----------------------DATA LOADING START--------------------------------
     from kale import marshal as _kale_marshal
     _kale_marshal.set_data_dir("/marshal")
-    PREDICTION_LABEL = _kale_marshal.load("PREDICTION_LABEL")
-    test_df = _kale_marshal.load("test_df")
-    train_df = _kale_marshal.load("train_df")
+    _kale_data = _kale_marshal.load_many([
+        "PREDICTION_LABEL",
+        "test_df",
+        "train_df",
+    ])
+    PREDICTION_LABEL = _kale_data["PREDICTION_LABEL"]
+    test_df = _kale_data["test_df"]
+    train_df = _kale_data["train_df"]
+    del _kale_data
     # -----------------------DATA LOADING END----------------------------------
     '''
 
@@ -325,8 +367,10 @@ def featureengineering():
     # -----------------------DATA SAVING START---------------------------------
     from kale import marshal as _kale_marshal
     _kale_marshal.set_data_dir("/marshal")
-    _kale_marshal.save(train_df, "train_df")
-    _kale_marshal.save(train_labels, "train_labels")
+    _kale_marshal.save_many({
+        "train_df": train_df,
+        "train_labels": train_labels,
+    })
     # -----------------------DATA SAVING END-----------------------------------
     '''
 
@@ -334,6 +378,8 @@ def featureengineering():
     from kale.common.jputils import run_code as _kale_run_code
     from kale.common.kfputils import \
         update_uimetadata as _kale_update_uimetadata
+    from kale.marshal import stats as _kale_marshal_stats
+    _kale_marshal_stats.enable()
     _kale_blocks = (_kale_data_loading_block,
                     _kale_block1,
                     _kale_block2,
@@ -351,11 +397,22 @@ def featureengineering():
     with open("/featureengineering.html", "w") as f:
         f.write(_kale_html_artifact)
     _kale_update_uimetadata('featureengineering')
+    _kale_marshal_stats.write_report("featureengineering", "/marshal")
+    from kale.marshal import history as _kale_marshal_history
+    _kale_marshal_history.record_step("/kale/.kale/titanic-ml.marshal_history.jsonl",
+                                      "featureengineering", "/marshal")
 
     _kale_mlmdutils.call("mark_execution_complete")
 
 
 def decisiontree():
+    # read the inputs while the step initializes and boots the kernel
+    from kale.marshal import prefetch as _kale_marshal_prefetch
+    _kale_marshal_prefetch.start("/marshal", [
+        "train_df",
+        "train_labels",
+    ])
+
     from kale.common import mlmdutils as _kale_mlmdutils
     _kale_mlmdutils.init_metadata()
 
@@ -363,8 +420,13 @@ def decisiontree():
     # -----------------------DATA LOADING START--------------------------------
     from kale import marshal as _kale_marshal
     _kale_marshal.set_data_dir("/marshal")
-    train_df = _kale_marshal.load("train_df")
-    train_labels = _kale_marshal.load("train_labels")
+    _kale_data = _kale_marshal.load_many([
+        "train_df",
+        "train_labels",
+    ])
+    train_df = _kale_data["train_df"]
+    train_labels = _kale_data["train_labels"]
+    del _kale_data
     # -----------------------DATA LOADING END----------------------------------
     '''
 
@@ -396,7 +458,9 @@ def decisiontree():
     # -----------------------DATA SAVING START---------------------------------
     from kale import marshal as _kale_marshal
     _kale_marshal.set_data_dir("/marshal")
-    _kale_marshal.save(acc_decision_tree, "acc_decision_tree")
+    _kale_marshal.save_many({
+        "acc_decision_tree": acc_decision_tree,
+    })
     # -----------------------DATA SAVING END-----------------------------------
     '''
 
@@ -404,6 +468,8 @@ def decisiontree():
     from kale.common.jputils import run_code as _kale_run_code
     from kale.common.kfputils import \
         update_uimetadata as _kale_update_uimetadata
+    from kale.marshal import stats as _kale_marshal_stats
+    _kale_marshal_stats.enable()
     _kale_blocks = (_kale_data_loading_block,
                     _kale_block1,
                     _kale_block2,
@@ -412,11 +478,22 @@ def decisiontree():
     with open("/decisiontree.html", "w") as f:
         f.write(_kale_html_artifact)
     _kale_update_uimetadata('decisiontree')
+    _kale_marshal_stats.write_report("decisiontree", "/marshal")
+    from kale.marshal import history as _kale_marshal_history
+    _kale_marshal_history.record_step("/kale/.kale/titanic-ml.marshal_history.jsonl",
+                                      "decisiontree", "/marshal")
 
     _kale_mlmdutils.call("mark_execution_complete")
 
 
 def svm():
+    # read the inputs while the step initializes and boots the kernel
+    from kale.marshal import prefetch as _kale_marshal_prefetch
+    _kale_marshal_prefetch.start("/marshal", [
+        "train_df",
+        "train_labels",
+    ])
+
     from kale.common import mlmdutils as _kale_mlmdutils
     _kale_mlmdutils.init_metadata()
 
@@ -424,8 +501,13 @@ def svm():
     # -----------------------DATA LOADING START--------------------------------
     from kale import marshal as _kale_marshal
     _kale_marshal.set_data_dir("/marshal")
-    train_df = _kale_marshal.load("train_df")
-    train_labels = _kale_marshal.load("train_labels")
+    _kale_data = _kale_marshal.load_many([
+        "train_df",
+        "train_labels",
+    ])
+    train_df = _kale_data["train_df"]
+    train_labels = _kale_data["train_labels"]
+    del _kale_data
     # -----------------------DATA LOADING END----------------------------------
     '''
 
@@ -457,7 +539,9 @@ def svm():
     # -----------------------DATA SAVING START---------------------------------
     from kale import marshal as _kale_marshal
     _kale_marshal.set_data_dir("/marshal")
-    _kale_marshal.save(acc_linear_svc, "acc_linear_svc")
+    _kale_marshal.save_many({
+        "acc_linear_svc": acc_linear_svc,
+    })
     # -----------------------DATA SAVING END-----------------------------------
     '''
 
@@ -465,6 +549,8 @@ def svm():
     from kale.common.jputils import run_code as _kale_run_code
     from kale.common.kfputils import \
         update_uimetadata as _kale_update_uimetadata
+    from kale.marshal import stats as _kale_marshal_stats
+    _kale_marshal_stats.enable()
     _kale_blocks = (_kale_data_loading_block,
                     _kale_block1,
                     _kale_block2,
@@ -473,11 +559,22 @@ def svm():
     with open("/svm.html", "w") as f:
         f.write(_kale_html_artifact)
     _kale_update_uimetadata('svm')
+    _kale_marshal_stats.write_report("svm", "/marshal")
+    from kale.marshal import history as _kale_marshal_history
+    _kale_marshal_history.record_step("/kale/.kale/titanic-ml.marshal_history.jsonl",
+                                      "svm", "/marshal")
 
     _kale_mlmdutils.call("mark_execution_complete")
 
 
 def naivebayes():
+    # read the inputs while the step initializes and boots the kernel
+    from kale.marshal import prefetch as _kale_marshal_prefetch
+    _kale_marshal_prefetch.start("/marshal", [
+        "train_df",
+        "train_labels",
+    ])
+
     from kale.common import mlmdutils as _kale_mlmdutils
     _kale_mlmdutils.init_metadata()
 
@@ -485,8 +582,13 @@ def naivebayes():
     # -----------------------DATA LOADING START--------------------------------
     from kale import marshal as _kale_marshal
     _kale_marshal.set_data_dir("/marshal")
-    train_df = _kale_marshal.load("train_df")
-    train_labels = _kale_marshal.load("train_labels")
+    _kale_data = _kale_marshal.load_many([
+        "train_df",
+        "train_labels",
+    ])
+    train_df = _kale_data["train_df"]
+    train_labels = _kale_data["train_labels"]
+    del _kale_data
     # -----------------------DATA LOADING END----------------------------------
     '''
 
@@ -518,7 +620,9 @@ def naivebayes():
     # -----------------------DATA SAVING START---------------------------------
     from kale import marshal as _kale_marshal
     _kale_marshal.set_data_dir("/marshal")
-    _kale_marshal.save(acc_gaussian, "acc_gaussian")
+    _kale_marshal.save_many({
+        "acc_gaussian": acc_gaussian,
+    })
     # -----------------------DATA SAVING END-----------------------------------
     '''
 
@@ -526,6 +630,8 @@ def naivebayes():
     from kale.common.jputils import run_code as _kale_run_code
     from kale.common.kfputils import \
         update_uimetadata as _kale_update_uimetadata
+    from kale.marshal import stats as _kale_marshal_stats
+    _kale_marshal_stats.enable()
     _kale_blocks = (_kale_data_loading_block,
                     _kale_block1,
                     _kale_block2,
@@ -534,11 +640,22 @@ def naivebayes():
     with open("/naivebayes.html", "w") as f:
         f.write(_kale_html_artifact)
     _kale_update_uimetadata('naivebayes')
+    _kale_marshal_stats.write_report("naivebayes", "/marshal")
+    from kale.marshal import history as _kale_marshal_history
+    _kale_marshal_history.record_step("/kale/.kale/titanic-ml.marshal_history.jsonl",
+                                      "naivebayes", "/marshal")
 
     _kale_mlmdutils.call("mark_execution_complete")
 
 
 def logisticregression():
+    # read the inputs while the step initializes and boots the kernel
+    from kale.marshal import prefetch as _kale_marshal_prefetch
+    _kale_marshal_prefetch.start("/marshal", [
+        "train_df",
+        "train_labels",
+    ])
+
     from kale.common import mlmdutils as _kale_mlmdutils
     _kale_mlmdutils.init_metadata()
 
@@ -546,8 +663,13 @@ def logisticregression():
     # -----------------------DATA LOADING START--------------------------------
     from kale import marshal as _kale_marshal
     _kale_marshal.set_data_dir("/marshal")
-    train_df = _kale_marshal.load("train_df")
-    train_labels = _kale_marshal.load("train_labels")
+    _kale_data = _kale_marshal.load_many([
+        "train_df",
+        "train_labels",
+    ])
+    train_df = _kale_data["train_df"]
+    train_labels = _kale_data["train_labels"]
+    del _kale_data
     # -----------------------DATA LOADING END----------------------------------
     '''
 
@@ -579,7 +701,9 @@ def logisticregression():
     # -----------------------DATA SAVING START---------------------------------
     from kale import marshal as _kale_marshal
     _kale_marshal.set_data_dir("/marshal")
-    _kale_marshal.save(acc_log, "acc_log")
+    _kale_marshal.save_many({
+        "acc_log": acc_log,
+    })
     # -----------------------DATA SAVING END-----------------------------------
     '''
 
@@ -587,6 +711,8 @@ def logisticregression():
     from kale.common.jputils import run_code as _kale_run_code
     from kale.common.kfputils import \
         update_uimetadata as _kale_update_uimetadata
+    from kale.marshal import stats as _kale_marshal_stats
+    _kale_marshal_stats.enable()
     _kale_blocks = (_kale_data_loading_block,
                     _kale_block1,
                     _kale_block2,
@@ -595,11 +721,22 @@ def logisticregression():
     with open("/logisticregression.html", "w") as f:
         f.write(_kale_html_artifact)
     _kale_update_uimetadata('logisticregression')
+    _kale_marshal_stats.write_report("logisticregression", "/marshal")
+    from kale.marshal import history as _kale_marshal_history
+    _kale_marshal_history.record_step("/kale/.kale/titanic-ml.marshal_history.jsonl",
+                                      "logisticregression", "/marshal")
 
     _kale_mlmdutils.call("mark_execution_complete")
 
 
 def randomforest():
+    # read the inputs while the step initializes and boots the kernel
+    from kale.marshal import prefetch as _kale_marshal_prefetch
+    _kale_marshal_prefetch.start("/marshal", [
+        "train_df",
+        "train_labels",
+    ])
+
     from kale.common import mlmdutils as _kale_mlmdutils
     _kale_mlmdutils.init_metadata()
 
@@ -607,8 +744,13 @@ def randomforest():
     # -----------------------DATA LOADING START--------------------------------
     from kale import marshal as _kale_marshal
     _kale_marshal.set_data_dir("/marshal")
-    train_df = _kale_marshal.load("train_df")
-    train_labels = _kale_marshal.load("train_labels")
+    _kale_data = _kale_marshal.load_many([
+        "train_df",
+        "train_labels",
+    ])
+    train_df = _kale_data["train_df"]
+    train_labels = _kale_data["train_labels"]
+    del _kale_data
     # -----------------------DATA LOADING END----------------------------------
     '''
 
@@ -640,7 +782,9 @@ def randomforest():
     # -----------------------DATA SAVING START---------------------------------
     from kale import marshal as _kale_marshal
     _kale_marshal.set_data_dir("/marshal")
-    _kale_marshal.save(acc_random_forest, "acc_random_forest")
+    _kale_marshal.save_many({
+        "acc_random_forest": acc_random_forest,
+    })
     # -----------------------DATA SAVING END-----------------------------------
     '''
 
@@ -648,6 +792,8 @@ def randomforest():
     from kale.common.jputils import run_code as _kale_run_code
     from kale.common.kfputils import \
         update_uimetadata as _kale_update_uimetadata
+    from kale.marshal import stats as _kale_marshal_stats
+    _kale_marshal_stats.enable()
     _kale_blocks = (_kale_data_loading_block,
                     _kale_block1,
                     _kale_block2,
@@ -656,11 +802,25 @@ def randomforest():
     with open("/randomforest.html", "w") as f:
         f.write(_kale_html_artifact)
     _kale_update_uimetadata('randomforest')
+    _kale_marshal_stats.write_report("randomforest", "/marshal")
+    from kale.marshal import history as _kale_marshal_history
+    _kale_marshal_history.record_step("/kale/.kale/titanic-ml.marshal_history.jsonl",
+                                      "randomforest", "/marshal")
 
     _kale_mlmdutils.call("mark_execution_complete")
 
 
 def results():
+    # read the inputs while the step initializes and boots the kernel
+    from kale.marshal import prefetch as _kale_marshal_prefetch
+    _kale_marshal_prefetch.start("/marshal", [
+        "acc_decision_tree",
+        "acc_gaussian",
+        "acc_linear_svc",
+        "acc_log",
+        "acc_random_forest",
+    ])
+
     from kale.common import mlmdutils as _kale_mlmdutils
     _kale_mlmdutils.init_metadata()
 
@@ -668,11 +828,19 @@ def results():
     # -----------------------DATA LOADING START--------------------------------
     from kale import marshal as _kale_marshal
     _kale_marshal.set_data_dir("/marshal")
-    acc_decision_tree = _kale_marshal.load("acc_decision_tree")
-    acc_gaussian = _kale_marshal.load("acc_gaussian")
-    acc_linear_svc = _kale_marshal.load("acc_linear_svc")
-    acc_log = _kale_marshal.load("acc_log")
-    acc_random_forest = _kale_marshal.load("acc_random_forest")
+    _kale_data = _kale_marshal.load_many([
+        "acc_decision_tree",
+        "acc_gaussian",
+        "acc_linear_svc",
+        "acc_log",
+        "acc_random_forest",
+    ])
+    acc_decision_tree = _kale_data["acc_decision_tree"]
+    acc_gaussian = _kale_data["acc_gaussian"]
+    acc_linear_svc = _kale_data["acc_linear_svc"]
+    acc_log = _kale_data["acc_log"]
+    acc_random_forest = _kale_data["acc_random_forest"]
+    del _kale_data
     # -----------------------DATA LOADING END----------------------------------
     '''
 
@@ -709,6 +877,8 @@ def results():
     from kale.common.jputils import run_code as _kale_run_code
     from kale.common.kfputils import \
         update_uimetadata as _kale_update_uimetadata
+    from kale.marshal import stats as _kale_marshal_stats
+    _kale_marshal_stats.enable()
     _kale_blocks = (_kale_data_loading_block,
                     _kale_block1,
                     _kale_block2,
@@ -717,6 +887,10 @@ def results():
     with open("/results.html", "w") as f:
         f.write(_kale_html_artifact)
     _kale_update_uimetadata('results')
+    _kale_marshal_stats.write_report("results", "/marshal")
+    from kale.marshal import history as _kale_marshal_history
+    _kale_marshal_history.record_step("/kale/.kale/titanic-ml.marshal_history.jsonl",
+                                      "results", "/marshal")
 
     _kale_mlmdutils.call("mark_execution_complete")
 
@@ -777,6 +951,8 @@ def auto_generated_pipeline():
     _kale_loaddata_task = _kale_loaddata_op()\
         .add_pvolumes(_kale_pvolumes_dict)\
         .after()
+    _kale_loaddata_task.container.add_env_variable(k8s_client.V1EnvVar(
+        name="KALE_MARSHAL_RUN_ID", value="{{workflow.uid}}"))
     _kale_loaddata_task.container.working_dir = "/kale"
     _kale_loaddata_task.container.set_security_context(
         k8s_client.V1SecurityContext(run_as_user=0))
@@ -799,6 +975,8 @@ def auto_generated_pipeline():
     _kale_datapreprocessing_task = _kale_datapreprocessing_op()\
         .add_pvolumes(_kale_pvolumes_dict)\
         .after(_kale_loaddata_task)
+    _kale_datapreprocessing_task.container.add_env_variable(k8s_client.V1EnvVar(
+        name="KALE_MARSHAL_RUN_ID", value="{{workflow.uid}}"))
     _kale_datapreprocessing_task.container.working_dir = "/kale"
     _kale_datapreprocessing_task.container.set_security_context(
         k8s_client.V1SecurityContext(run_as_user=0))
@@ -823,6 +1001,8 @@ def auto_generated_pipeline():
     _kale_featureengineering_task = _kale_featureengineering_op()\
         .add_pvolumes(_kale_pvolumes_dict)\
         .after(_kale_datapreprocessing_task)
+    _kale_featureengineering_task.container.add_env_variable(k8s_client.V1EnvVar(
+        name="KALE_MARSHAL_RUN_ID", value="{{workflow.uid}}"))
     _kale_featureengineering_task.container.working_dir = "/kale"
     _kale_featureengineering_task.container.set_security_context(
         k8s_client.V1SecurityContext(run_as_user=0))
@@ -847,6 +1027,8 @@ def auto_generated_pipeline():
     _kale_decisiontree_task = _kale_decisiontree_op()\
         .add_pvolumes(_kale_pvolumes_dict)\
         .after(_kale_featureengineering_task)
+    _kale_decisiontree_task.container.add_env_variable(k8s_client.V1EnvVar(
+        name="KALE_MARSHAL_RUN_ID", value="{{workflow.uid}}"))
     _kale_decisiontree_task.container.working_dir = "/kale"
     _kale_decisiontree_task.container.set_security_context(
         k8s_client.V1SecurityContext(run_as_user=0))
@@ -870,6 +1052,8 @@ def auto_generated_pipeline():
     _kale_svm_task = _kale_svm_op()\
         .add_pvolumes(_kale_pvolumes_dict)\
         .after(_kale_featureengineering_task)
+    _kale_svm_task.container.add_env_variable(k8s_client.V1EnvVar(
+        name="KALE_MARSHAL_RUN_ID", value="{{workflow.uid}}"))
     _kale_svm_task.container.working_dir = "/kale"
     _kale_svm_task.container.set_security_context(
         k8s_client.V1SecurityContext(run_as_user=0))
@@ -892,6 +1076,8 @@ def auto_generated_pipeline():
     _kale_naivebayes_task = _kale_naivebayes_op()\
         .add_pvolumes(_kale_pvolumes_dict)\
         .after(_kale_featureengineering_task)
+    _kale_naivebayes_task.container.add_env_variable(k8s_client.V1EnvVar(
+        name="KALE_MARSHAL_RUN_ID", value="{{workflow.uid}}"))
     _kale_naivebayes_task.container.working_dir = "/kale"
     _kale_naivebayes_task.container.set_security_context(
         k8s_client.V1SecurityContext(run_as_user=0))
@@ -914,6 +1100,8 @@ def auto_generated_pipeline():
     _kale_logisticregression_task = _kale_logisticregression_op()\
         .add_pvolumes(_kale_pvolumes_dict)\
         .after(_kale_featureengineering_task)
+    _kale_logisticregression_task.container.add_env_variable(k8s_client.V1EnvVar(
+        name="KALE_MARSHAL_RUN_ID", value="{{workflow.uid}}"))
     _kale_logisticregression_task.container.working_dir = "/kale"
     _kale_logisticregression_task.container.set_security_context(
         k8s_client.V1SecurityContext(run_as_user=0))
@@ -938,6 +1126,8 @@ def auto_generated_pipeline():
     _kale_randomforest_task = _kale_randomforest_op()\
         .add_pvolumes(_kale_pvolumes_dict)\
         .after(_kale_featureengineering_task)
+    _kale_randomforest_task.container.add_env_variable(k8s_client.V1EnvVar(
+        name="KALE_MARSHAL_RUN_ID", value="{{workflow.uid}}"))
     _kale_randomforest_task.container.working_dir = "/kale"
     _kale_randomforest_task.container.set_security_context(
         k8s_client.V1SecurityContext(run_as_user=0))
@@ -961,6 +1151,8 @@ def auto_generated_pipeline():
     _kale_results_task = _kale_results_op()\
         .add_pvolumes(_kale_pvolumes_dict)\
         .after(_kale_randomforest_task, _kale_logisticregression_task, _kale_naivebayes_task, _kale_svm_task, _kale_decisiontree_task)
+    _kale_results_task.container.add_env_variable(k8s_client.V1EnvVar(
+        name="KALE_MARSHAL_RUN_ID", value="{{workflow.uid}}"))
     _kale_results_task.container.working_dir = "/kale"
     _kale_results_task.container.set_security_context(
         k8s_client.V1SecurityContext(run_as_user=0))
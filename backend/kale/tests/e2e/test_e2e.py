@@ -18,6 +18,7 @@ import pytest
 from unittest import mock
 
 from kale import Compiler, NotebookProcessor
+from kale.common import symbolutils
 
 THIS_DIR = os.path.dirname(os.path.abspath(__file__))
 EXAMPLES_DIR = os.path.join(THIS_DIR, "../../../../examples/")
@@ -32,9 +33,11 @@ EXAMPLES_DIR = os.path.join(THIS_DIR, "../../../../examples/")
                   "pipeline_parameters_and_metrics.py")),
 ])
 @mock.patch("kale.common.utils.random_string")
-def test_notebook_to_dsl(random_string, notebook_path, dsl_path):
+def test_notebook_to_dsl(random_string, notebook_path, dsl_path, monkeypatch):
     """Test code generation end to end from notebook to DSL."""
     random_string.return_value = "rnd"
+    # Do not write analysis caches next to the example notebooks
+    monkeypatch.setenv(symbolutils.CACHE_ENV, "false")
 
     overrides = {"abs_working_dir": "/kale"}
     pipeline = NotebookProcessor(notebook_path, overrides).to_pipeline()
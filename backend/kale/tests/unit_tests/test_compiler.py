@@ -44,7 +44,29 @@ DUMMY_NB_CONFIG = {
     ('test', ['print("hello")'], {}, {}, dict(), 'func06.out.py'),
     # ---
     ('final_auto_snapshot', [], {}, {},
-     {'autosnapshot': True}, 'func07.out.py')
+     {'autosnapshot': True}, 'func07.out.py'),
+    # ---
+    ('test', ['v1 = "Hello"', 'print(v1)'], {}, {'v1'},
+     {'marshal_content_addressed': True}, 'func08.out.py'),
+    # ---
+    ('test', [], {'v1', 'v2'}, {},
+     {'marshal_mmap_mode': 'c', 'marshal_mmap_variables': {'v2': 'r'}},
+     'func09.out.py'),
+    # ---
+    ('test', ['v1 = "Hello"', 'v2 = "World"'], {}, {'v1', 'v2'},
+     {'marshal_codec': 'zstd', 'marshal_codec_variables': {'v2': 'gzip'}},
+     'func10.out.py'),
+    # ---
+    ('test', [], {'v1'}, {}, {'marshal_lazy_load': True}, 'func11.out.py'),
+    # ---
+    ('test', [], {'v1'}, {}, {'marshal_keep_artifacts': False},
+     'func12.out.py'),
+    # ---
+    ('test', ['v1 = "Hello"', 'print(v1)'], {}, {'v1'},
+     {'marshal_summaries': True}, 'func13.out.py'),
+    # ---
+    ('test', ['v1 = "Hello"', 'print(v1)'], {}, {'v1'},
+     {'marshal_delta': True}, 'func14.out.py')
 ])
 def test_generate_function(config_mock, step_name, source, ins, outs, metadata,
                            target):
@@ -55,3 +77,18 @@ def test_generate_function(config_mock, step_name, source, ins, outs, metadata,
     res = compiler.generate_lightweight_component(step)
     target = open(os.path.join(THIS_DIR, "../assets/functions", target)).read()
     assert res.strip() == target.strip()
+
+
+@mock.patch.object(NotebookConfig, "_randomize_pipeline_name")
+def test_marshal_volume_size(_config_mock, tmpdir):
+    """Test that the marshal volume is sized from the history of runs."""
+    config = {**DUMMY_NB_CONFIG,
+              "marshal_history_path": str(tmpdir.join("history.jsonl"))}
+    compiler = Compiler(Pipeline(NotebookConfig(**config)))
+    assert compiler._get_marshal_volume_size() == "1Gi"
+    tmpdir.join("history.jsonl").write(
+        '{"run": "run", "step": "test", "data_dir_size": 1, "objects": {}}')
+    assert compiler._get_marshal_volume_size() == "128Mi"
+    compiler = Compiler(Pipeline(NotebookConfig(
+        **config, marshal_volume_size="5Gi")))
+    assert compiler._get_marshal_volume_size() == "5Gi"
@@ -12,10 +12,14 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import ast
 import pytest
 
+from unittest import mock
+
 import kale.common.flakeutils
 from kale import Pipeline, Step
+from kale.common import astutils, symbolutils
 
 
 @pytest.mark.parametrize("code,target", [
@@ -62,6 +66,154 @@ def foo():
     )
 
 
+def test_symbol_table():
+    """Test that every query is answered by parsing the code once."""
+    code = """
+%matplotlib inline
+import os
+x = 5
+def foo(a):
+    print(os.path.join(a, x, y))
+foo(x)
+"""
+    symbolutils.analyze.cache_clear()
+    symbolutils.parse.cache_clear()
+    with mock.patch.object(symbolutils.ast, "parse",
+                           wraps=ast.parse) as parse:
+        for _ in range(2):
+            symbols = symbolutils.analyze(code)
+            assert symbols.undefined == {"y"}
+            assert symbols.marshal_candidates == {"os", "x", "foo"}
+            assert symbols.calls == {"foo", "print"}
+            assert list(symbols.functions) == ["foo"]
+            assert symbols.get_free_variables("foo") == {"os", "x", "y"}
+            assert list(astutils.parse_functions(code)) == ["foo"]
+    parse.assert_called_once()
+
+    prelude = symbolutils.analyze("import os\ndef bar():\n    return z")
+    assert symbols.get_free_variables("foo", prelude) == {"x", "y", "z"}
+    prelude = symbolutils.analyze("from os import *")
+    assert symbols.get_free_variables("foo", prelude) == set()
+
+
+def test_symbol_table_disk_cache(tmpdir):
+    """Test that symbol tables are persisted across processes."""
+    code = "import os\nx = y\ndef foo():\n    return os.path.join(x, z)"
+    cache_dir = str(tmpdir.join(symbolutils.CACHE_DIR_NAME))
+    symbolutils.analyze.cache_clear()
+    symbols = symbolutils.analyze(code, cache_dir)
+    assert len(tmpdir.join(symbolutils.CACHE_DIR_NAME).listdir()) == 1
+
+    # A new process reads the symbol table instead of parsing the code
+    symbolutils.analyze.cache_clear()
+    symbolutils.parse.cache_clear()
+    with mock.patch.object(symbolutils.ast, "parse",
+                           wraps=ast.parse) as parse:
+        cached = symbolutils.analyze(code, cache_dir)
+        parse.assert_not_called()
+        assert cached.to_dict() == symbols.to_dict()
+        assert cached.get_free_variables("foo") == {"os", "x", "z"}
+
+        # Editing the code invalidates its entry
+        symbolutils.analyze(code + "\nw = 1", cache_dir)
+        parse.assert_called_once()
+
+    symbolutils.prune_cache(cache_dir, max_entries=1)
+    assert len(tmpdir.join(symbolutils.CACHE_DIR_NAME).listdir()) == 1
+
+
+@pytest.mark.parametrize("code,target", [
+    ('print(df.shape, len(df), df["a"])', set()),
+    ("x = df", {"x"}),
+    ("df += 1", {"df"}),
+    ("df.a = 1", {"df"}),
+    ('df["a"][0] = 1', {"df"}),
+    ('del df["a"]', {"df"}),
+    ("df.dropna(inplace=True)", {"df"}),
+    ('df["a"].fillna(0, inplace=True)', {"df"}),
+    ("np.random.shuffle(df)", {"np", "df"}),
+    ("foo(*df)", {"df"}),
+    ("def foo():\n    df.pop()\nfoo()", {"foo", "df"}),
+    ("def foo():\n    df.pop()", {"foo"}),
+    # modifications through aliases
+    ("data = [train_df, test_df]\n"
+     "for dataset in data:\n"
+     "    dataset['Fare'] = dataset['Fare'].fillna(0)",
+     {"data", "dataset", "train_df", "test_df"}),
+    ("df2 = df\ndf2['x'] = 1", {"df", "df2"}),
+    ("a = df.values\na[0] = 0", {"a", "df"}),
+    ("for i, d in enumerate(dfs):\n    d.fillna(0, inplace=True)",
+     {"d", "dfs", "i"}),
+    ("d = {}\nd['k'] = df\nd['k']['x'] = 1", {"d", "df"}),
+    ("df2 = df\nprint(df2)", {"df2"}),
+    ("n = len(df)\nn += 1", {"n"}),
+])
+def test_mutated_names(code, target):
+    """Test the detection of the names that the code might modify."""
+    assert symbolutils.analyze(code).mutated == target
+
+
+def test_mutated_names_functions():
+    """Test that modifications by functions follow the aliases."""
+    symbols = symbolutils.analyze("data = [train_df, test_df]\nclean()")
+    assert symbols.mutated == {"data"}
+    assert symbols.get_mutated({"data"}) == {"data", "train_df", "test_df"}
+
+
+def test_dependencies_detection_read_only(notebook_processor,
+                                          dummy_nb_config):
+    """Test that steps that only read a variable do not save it again."""
+    pipeline = Pipeline(dummy_nb_config)
+    pipeline.add_step(Step(name="step1", source=["df = [1, 2]"]))
+    pipeline.add_step(Step(name="step2", source=["print(len(df))"]))
+    pipeline.add_step(Step(name="step3", source=["df.append(3)"]))
+    pipeline.add_step(Step(name="step4", source=["print(df)"]))
+    pipeline.add_edge("step1", "step2")
+    pipeline.add_edge("step2", "step3")
+    pipeline.add_edge("step3", "step4")
+
+    notebook_processor.pipeline = pipeline
+    notebook_processor.dependencies_detection()
+    assert pipeline.get_step("step1").outs == {"df"}
+    assert pipeline.get_step("step2").outs == set()
+    assert pipeline.get_step("step3").ins == ["df"]
+    assert pipeline.get_step("step3").outs == {"df"}
+    assert pipeline.get_step("step4").ins == ["df"]
+
+
+def test_dependencies_detection_syntax_error(notebook_processor,
+                                             dummy_nb_config):
+    """Test that steps that cannot be parsed raise a RuntimeError."""
+    pipeline = Pipeline(dummy_nb_config)
+    pipeline.add_step(Step(name="step1", source=["x = (1"]))
+
+    notebook_processor.pipeline = pipeline
+    with pytest.raises(RuntimeError, match="Flakes reported"):
+        notebook_processor.dependencies_detection()
+
+
+def test_dependencies_detection_aliases(notebook_processor,
+                                        dummy_nb_config):
+    """Test that steps that modify a variable through an alias save it."""
+    pipeline = Pipeline(dummy_nb_config)
+    pipeline.add_step(Step(name="step1", source=[
+        "train_df = {'Fare': None}",
+        "test_df = {'Fare': None}"]))
+    pipeline.add_step(Step(name="step2", source=[
+        "data = [train_df, test_df]",
+        "for dataset in data:",
+        "    dataset['Fare'] = 0"]))
+    pipeline.add_step(Step(name="step3", source=["print(train_df)"]))
+    pipeline.add_edge("step1", "step2")
+    pipeline.add_edge("step2", "step3")
+
+    notebook_processor.pipeline = pipeline
+    notebook_processor.dependencies_detection()
+    assert pipeline.get_step("step1").outs == {"train_df", "test_df"}
+    assert pipeline.get_step("step2").outs == {"train_df"}
+    assert pipeline.get_step("step3").ins == ["train_df"]
+
+
 def _prepend_to_source(source, prefix):
     return [prefix + "\n" + "\n".join(source)]
 
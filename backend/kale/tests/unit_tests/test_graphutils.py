@@ -14,6 +14,7 @@
 
 import networkx as nx
 
+from kale import Pipeline, Step
 from kale.common import graphutils
 
 
@@ -39,3 +40,67 @@ def test_get_ordered_ancestors():
 
     ancs = ["C", "D", "E", "B", "A"]
     assert graphutils.get_ordered_ancestors(g, "R") == ancs
+
+
+def test_get_reaching_definitions():
+    """Test that the nearest definitions follow the order of ancestors."""
+    g = nx.DiGraph()
+    g.add_edge("A", "B")
+    g.add_edge("B", "C")
+    g.add_edge("B", "D")
+    g.add_edge("B", "E")
+    g.add_edge("E", "F")
+    g.add_edge("C", "R")
+    g.add_edge("D", "R")
+    g.add_edge("F", "R")
+    defined = {"A": ["x", "y", "z"], "B": ["y"], "C": [], "D": ["x"],
+               "E": ["w", "x"], "F": [], "R": []}
+
+    reaching = dict()
+    for node in nx.topological_sort(g):
+        reaching[node] = graphutils.get_reaching_definitions(
+            g, node, defined, reaching)
+    assert {name: d.ancestor for name, d in reaching["R"].items()} == {
+        "w": "E", "x": "D", "y": "B", "z": "A"}
+    # The same as the first ancestor defining the name
+    ancs = graphutils.get_ordered_ancestors(g, "R")
+    for name, definition in reaching["R"].items():
+        assert definition.ancestor == next(
+            anc for anc in ancs if name in defined[anc])
+    assert reaching["A"] == {}
+
+
+def test_graph_index():
+    """Test the orderings computed by the graph index."""
+    g = nx.DiGraph()
+    g.add_edge("A", "B")
+    g.add_edge("B", "C")
+    g.add_edge("B", "D")
+    g.add_edge("C", "R")
+    g.add_edge("D", "R")
+    g.add_edge("A", "R")
+    index = graphutils.GraphIndex(g)
+    assert index.order == list(nx.topological_sort(g))
+    assert index.get_ordered_ancestors("R") == ["A", "C", "D", "B"]
+    assert index.get_ordered_ancestors("A") == []
+
+
+def test_pipeline_graph_index(dummy_nb_config):
+    """Test that the graph index is rebuilt only when the graph changes."""
+    pipeline = Pipeline(dummy_nb_config)
+    pipeline.add_step(Step(name="b", source=[]))
+    pipeline.add_step(Step(name="a", source=[]))
+    pipeline.add_edge("b", "a")
+    index = pipeline.get_graph_index()
+    assert pipeline.steps_names == ["b", "a"]
+    assert [s.name for s in pipeline.get_ordered_ancestors("a")] == ["b"]
+    assert pipeline.get_graph_index() is index
+
+    pipeline.add_step(Step(name="c", source=[]))
+    pipeline.add_edges_from([("a", "c")])
+    assert pipeline.get_graph_index() is not index
+    assert pipeline.steps_names == ["b", "a", "c"]
+    assert [s.name for s in pipeline.get_ordered_ancestors("c")] == ["a", "b"]
+    pipeline.remove_node("a")
+    assert pipeline.steps_names in (["b", "c"], ["c", "b"])
+    assert list(pipeline.get_ordered_ancestors("c")) == []
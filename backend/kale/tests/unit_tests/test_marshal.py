@@ -0,0 +1,1149 @@
+#  Copyright 2020 The Kale Authors
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import os
+import sys
+import json
+import pytest
+import threading
+
+from unittest import mock
+
+from kale import marshal
+from kale.marshal import (benchmark, buffers, cas, codecs, gc, history,
+                          prefetch, stats, summary)
+
+
+@pytest.fixture
+def data_dir(tmpdir):
+    """Set the marshal data directory to a temporary folder."""
+    prev_data_dir = marshal.get_data_dir()
+    marshal.set_data_dir(str(tmpdir))
+    yield str(tmpdir)
+    marshal.set_data_dir(prev_data_dir)
+
+
+@pytest.fixture
+def content_addressed(data_dir):
+    """Enable the content-addressed layout."""
+    marshal.set_content_addressed(True)
+    yield data_dir
+    marshal.set_content_addressed(False)
+
+
+def _ls(data_dir):
+    return sorted(f for f in os.listdir(data_dir) if not f.startswith("."))
+
+
+def _blobs(data_dir):
+    return sorted(os.listdir(cas.get_blobs_dir(data_dir)))
+
+
+def test_save_load(data_dir):
+    """Test that objects are saved to plain files by default."""
+    path = marshal.save({"a": 1}, "obj")
+    assert os.path.isfile(path) and not os.path.islink(path)
+    assert marshal.load("obj") == {"a": 1}
+
+
+def test_content_addressed_dedup(content_addressed):
+    """Test that saving the same object twice stores a single blob."""
+    path_a = marshal.save([1, 2, 3], "a")
+    path_b = marshal.save([1, 2, 3], "b")
+    assert os.path.islink(path_a) and os.path.islink(path_b)
+    assert os.path.realpath(path_a) == os.path.realpath(path_b)
+    assert len(_blobs(content_addressed)) == 1
+    assert marshal.load("a") == marshal.load("b") == [1, 2, 3]
+
+
+def test_content_addressed_overwrite(content_addressed):
+    """Test that saving a new object under the same name moves the pointer."""
+    marshal.save([1, 2, 3], "a")
+    marshal.save([4, 5, 6], "a")
+    assert len(_blobs(content_addressed)) == 2
+    assert marshal.load("a") == [4, 5, 6]
+
+
+@mock.patch("kale.marshal.cas.hash_object", return_value=None)
+def test_content_addressed_hash_on_disk(_hash_object, content_addressed):
+    """Test that objects that cannot be hashed in memory are hashed on disk."""
+    marshal.save([1, 2, 3], "a")
+    marshal.save([1, 2, 3], "b")
+    blobs = _blobs(content_addressed)
+    assert len(blobs) == 1 and not blobs[0].startswith("tmp-")
+    assert marshal.load("b") == [1, 2, 3]
+
+
+def test_hash_object_out_of_band():
+    """Test that the data of arrays is hashed without pickling it in-band."""
+    np = pytest.importorskip("numpy")
+    pd = pytest.importorskip("pandas")
+    if not buffers.IS_SUPPORTED:
+        pytest.skip("Pickle protocol 5 is not available")
+    written = []
+    write = cas._HashWriter.write
+
+    def _write(self, data):
+        written.append(len(data))
+        return write(self, data)
+
+    with mock.patch.object(cas._HashWriter, "write", _write):
+        for obj in (np.zeros(1 << 17), {"a": np.zeros(1 << 17)},
+                    pd.DataFrame({"a": np.zeros(1 << 17)})):
+            written.clear()
+            assert cas.hash_object(obj) is not None
+            assert sum(written) < 1 << 12
+    assert cas.hash_object(np.zeros(1 << 17)) != cas.hash_object(
+        np.ones(1 << 17))
+
+
+@pytest.fixture
+def numpy_backend():
+    """Get the Numpy backend, restoring its mmap mode afterwards."""
+    backend = marshal.get_backend_by_name("NumpyBackend")
+    yield backend
+    backend.mmap_mode = None
+
+
+@pytest.mark.parametrize("mmap_mode,per_variable,is_memmap", [
+    (None, None, False),
+    ("c", None, True),
+    (None, "r", True),
+    ("c", "", False),
+])
+def test_numpy_mmap(data_dir, numpy_backend, mmap_mode, per_variable,
+                    is_memmap):
+    """Test memory-mapped loading of Numpy arrays."""
+    np = pytest.importorskip("numpy")
+    numpy_backend.mmap_mode = mmap_mode
+    marshal.save(np.arange(10), "arr")
+    arr = marshal.load("arr", mmap_mode=per_variable)
+    assert isinstance(arr, np.memmap) == is_memmap
+    assert (arr == np.arange(10)).all()
+
+
+def test_numpy_mmap_copy_on_write(data_dir, numpy_backend):
+    """Test that writing to a copy-on-write array leaves the file intact."""
+    np = pytest.importorskip("numpy")
+    marshal.save(np.zeros(10), "arr")
+    arr = marshal.load("arr", mmap_mode="c")
+    arr[0] = 1
+    assert arr[0] == 1
+    assert marshal.load("arr")[0] == 0
+
+
+def test_load_unsupported_option(data_dir):
+    """Test that unsupported load options are ignored."""
+    marshal.save({"a": 1}, "obj")
+    assert marshal.load("obj", mmap_mode="r") == {"a": 1}
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_save_load_many(data_dir, max_workers):
+    """Test saving and loading multiple objects concurrently."""
+    objs = {"obj%d" % i: list(range(i)) for i in range(10)}
+    paths = marshal.save_many(objs, max_workers=max_workers)
+    assert sorted(paths.keys()) == sorted(objs.keys())
+    assert all(os.path.isfile(p) for p in paths.values())
+    assert marshal.load_many(objs.keys(), max_workers=max_workers) == objs
+
+
+def test_load_many_options(data_dir, numpy_backend):
+    """Test that per-object load options are forwarded to the backends."""
+    np = pytest.importorskip("numpy")
+    marshal.save_many({"a": np.arange(3), "b": np.arange(3)})
+    objs = marshal.load_many(["a", "b"], options={"b": {"mmap_mode": "r"}})
+    assert not isinstance(objs["a"], np.memmap)
+    assert isinstance(objs["b"], np.memmap)
+
+
+def test_load_many_missing(data_dir):
+    """Test that loading a missing object exits the process."""
+    marshal.save(1, "a")
+    with pytest.raises(SystemExit):
+        marshal.load_many(["a", "b"])
+
+
+@pytest.fixture
+def default_codec():
+    """Restore the default codec after the test."""
+    yield
+    marshal.set_codec("none")
+
+
+def _read_codec(data_dir, filename):
+    return codecs.read_codec(os.path.join(data_dir, filename))
+
+
+def test_codec_per_object(data_dir):
+    """Test that a compressed object is decoded transparently."""
+    obj = {"a": "a" * 10000}
+    path = marshal.save(obj, "obj", codec="gzip")
+    assert _read_codec(data_dir, "obj.dillpkl") == "gzip"
+    assert os.path.getsize(path) < 1000
+    assert marshal.load("obj") == obj
+    # overwriting without codec removes the codec annotation
+    marshal.save(obj, "obj")
+    assert _read_codec(data_dir, "obj.dillpkl") == "none"
+    assert marshal.load("obj") == obj
+
+
+def test_codec_precedence(data_dir, numpy_backend, default_codec):
+    """Test object codec > backend codec > default codec."""
+    np = pytest.importorskip("numpy")
+    marshal.set_codec("gzip")
+    numpy_backend.codec = "none"
+    try:
+        marshal.save_many({"a": [1], "b": np.arange(3), "c": np.arange(3)},
+                          options={"c": {"codec": "gzip"}})
+    finally:
+        numpy_backend.codec = None
+    assert _read_codec(data_dir, "a.dillpkl") == "gzip"
+    assert _read_codec(data_dir, "b.npy") == "none"
+    assert _read_codec(data_dir, "c.npy") == "gzip"
+    objs = marshal.load_many(["a", "b", "c"])
+    assert objs["a"] == [1]
+    assert (objs["c"] == np.arange(3)).all()
+
+
+def test_codec_not_installed(data_dir):
+    """Test that a missing codec library falls back to no compression."""
+    with mock.patch.object(codecs.get_codec("zstd"), "check_available",
+                           side_effect=ImportError):
+        marshal.save([1], "obj", codec="zstd")
+    assert _read_codec(data_dir, "obj.dillpkl") == "none"
+    assert marshal.load("obj") == [1]
+
+
+def test_codec_content_addressed(content_addressed):
+    """Test that compressed blobs are deduplicated as well."""
+    marshal.save_many({"a": [1], "b": [1]},
+                      options={"a": {"codec": "gzip"},
+                               "b": {"codec": "gzip"}})
+    assert [b.endswith(".dillpkl.gz") for b in _blobs(content_addressed)] \
+        == [True]
+    assert marshal.load_many(["a", "b"]) == {"a": [1], "b": [1]}
+
+
+@pytest.fixture
+def pandas_objs():
+    """Get a DataFrame and a Series that can be converted to Arrow."""
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+    df = pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]},
+                      index=[10, 20, 30])
+    return df, pd.Series([1.0, 2.0], name=None)
+
+
+def test_pandas_arrow(data_dir, pandas_objs):
+    """Test that Pandas objects are saved in the Arrow format."""
+    df, series = pandas_objs
+    paths = marshal.save_many({"df": df, "series": series})
+    assert all(p.endswith(".feather") for p in paths.values())
+    objs = marshal.load_many(["df", "series"])
+    assert objs["df"].equals(df) and list(objs["df"].index) == [10, 20, 30]
+    assert objs["series"].equals(series) and objs["series"].name is None
+
+
+def test_pandas_arrow_columns(data_dir, pandas_objs):
+    """Test loading a subset of the columns of a DataFrame."""
+    df, _ = pandas_objs
+    marshal.save(df, "df")
+    assert list(marshal.load("df", columns=["a"]).columns) == ["a"]
+
+
+def test_pandas_arrow_fallback(data_dir, pandas_objs):
+    """Test that objects that Arrow cannot convert are pickled."""
+    pd = pytest.importorskip("pandas")
+    df = pd.DataFrame({"a": [1, "x", 2.0]})
+    path = marshal.save(df, "df")
+    assert path.endswith(".pdpkl")
+    assert marshal.load("df").equals(df)
+    # column names of mixed types do not round-trip through Arrow
+    df = pd.DataFrame({"a": [1], 1: [2]})
+    path = marshal.save(df, "df")
+    assert path.endswith(".pdpkl")
+    assert marshal.load("df").equals(df)
+    # neither do nested objects, nor object columns of numbers
+    df = pd.DataFrame({"a": [[1, 2], [3]], "b": [{"x": 1}, {"y": 2}],
+                       "c": pd.Series([1, 2], dtype=object)})
+    for name in df.columns:
+        path = marshal.save(df[[name]], "df")
+        assert path.endswith(".pdpkl")
+        obj = marshal.load("df")
+        assert obj[name].tolist() == df[name].tolist()
+        assert obj[name].dtype == object
+
+
+def test_save_removes_stale_entries(data_dir, pandas_objs):
+    """Test that saving with a different backend removes the older file."""
+    df, _ = pandas_objs
+    marshal.save([1, 2], "obj", codec="gzip")
+    marshal.save(df, "obj")
+    assert _ls(data_dir) == ["obj.feather"]
+    assert marshal.load("obj").equals(df)
+
+
+def test_lazy_load(data_dir):
+    """Test that lazy proxies load the object on first use."""
+    marshal.save([1, 2, 3], "obj")
+    with mock.patch.object(marshal.MarshalBackend, "wrapped_load",
+                           autospec=True,
+                           side_effect=marshal.MarshalBackend.wrapped_load
+                           ) as wrapped_load:
+        obj = marshal.load("obj", lazy=True)
+        assert not marshal.is_loaded(obj)
+        wrapped_load.assert_not_called()
+        assert len(obj) == 3 and isinstance(obj, list)
+        assert obj + [4] == [1, 2, 3, 4]
+        assert marshal.is_loaded(obj)
+        wrapped_load.assert_called_once()
+
+
+def test_lazy_load_many(data_dir):
+    """Test lazy loading of multiple objects and saving of proxies."""
+    np = pytest.importorskip("numpy")
+    marshal.save_many({"a": np.arange(3), "b": {"k": "v"}})
+    objs = marshal.load_many(["a", "b"], lazy=True)
+    assert not any(marshal.is_loaded(o) for o in objs.values())
+    assert (objs["a"] * 2 == np.arange(3) * 2).all()
+    assert not marshal.is_loaded(objs["b"])
+    # saving a proxy saves the wrapped object
+    path = marshal.save(objs["b"], "c")
+    assert path.endswith(".dillpkl")
+    assert marshal.load("c") == {"k": "v"}
+
+
+def test_lazy_load_missing(data_dir):
+    """Test that missing objects are reported when the proxy is created."""
+    with pytest.raises(SystemExit):
+        marshal.load("missing", lazy=True)
+
+
+@pytest.fixture
+def summaries(data_dir):
+    """Enable the summaries of the marshalled objects."""
+    marshal.set_summaries(True)
+    yield data_dir
+    marshal.set_summaries(False)
+
+
+def test_summary(summaries, pandas_objs):
+    """Test that lazy proxies are described without loading them."""
+    df, _ = pandas_objs
+    marshal.save_many({"df": df, "obj": [1, 2, 3]})
+    assert os.path.exists(
+        summary.get_summary_file(os.path.join(summaries, "df.feather")))
+    with mock.patch.object(marshal.MarshalBackend, "wrapped_load",
+                           autospec=True) as wrapped_load:
+        objs = marshal.load_many(["df", "obj"], lazy=True)
+        df_summary = marshal.describe(objs["df"])
+        obj_summary = marshal.describe(objs["obj"])
+    wrapped_load.assert_not_called()
+    assert df_summary["type"].endswith(".DataFrame")
+    assert df_summary["shape"] == [3, 2]
+    assert df_summary["dtype"] == {"a": "int64", "b": str(df["b"].dtype)}
+    assert obj_summary == {"type": "list", "size": sys.getsizeof([1, 2, 3]),
+                           "length": 3, "repr": "[1, 2, 3]"}
+    # loaded objects are described from memory
+    assert marshal.describe(marshal.load("obj"))["length"] == 3
+
+    # saving with a different backend, or without summaries, removes it
+    marshal.save(df, "obj")
+    assert not os.path.exists(
+        summary.get_summary_file(os.path.join(summaries, "obj.dillpkl")))
+    marshal.set_summaries(False)
+    marshal.save(df, "df")
+    # proxies without a summary are loaded to be described
+    obj = marshal.load("df", lazy=True)
+    assert marshal.describe(obj)["shape"] == [3, 2]
+    assert marshal.is_loaded(obj)
+    assert sorted(f for f in os.listdir(summaries)
+                  if f.endswith(summary.SUMMARY_SUFFIX)) == [
+        ".obj.feather" + summary.SUMMARY_SUFFIX]
+
+
+class _Base:
+    pass
+
+
+class _Child(_Base):
+    pass
+
+
+class _GrandChild(_Child):
+    pass
+
+
+class _BaseBackend(marshal.MarshalBackend):
+    file_type = "base"
+    obj_type_regex = r".*test_marshal\._Base$"
+
+
+class _ChildBackend(marshal.MarshalBackend):
+    file_type = "child"
+    obj_type_regex = r".*test_marshal\._Child$"
+
+
+class _PriorityBackend(marshal.MarshalBackend):
+    file_type = "prio"
+    obj_type_regex = r".*test_marshal\._Child$"
+    priority = 10
+
+
+@pytest.fixture
+def dispatcher():
+    """Get a new Dispatcher with no registered backends."""
+    from kale.marshal.backend import Dispatcher
+    _dispatcher = Dispatcher()
+    _dispatcher._entry_points_loaded = True
+    return _dispatcher
+
+
+def test_dispatch_mro(dispatcher):
+    """Test that the backend of the closest class in the MRO wins."""
+    dispatcher.register(_BaseBackend)
+    assert isinstance(dispatcher.get_backend(_GrandChild()), _BaseBackend)
+    dispatcher.register(_ChildBackend)
+    assert isinstance(dispatcher.get_backend(_GrandChild()), _ChildBackend)
+    assert isinstance(dispatcher.get_backend(_Base()), _BaseBackend)
+    assert type(dispatcher.get_backend(object())) is marshal.MarshalBackend
+
+
+def test_dispatch_priority(dispatcher):
+    """Test that priorities resolve conflicts between backends."""
+    dispatcher.register(_ChildBackend)
+    dispatcher.register(_BaseBackend)
+    dispatcher.register(_PriorityBackend)
+    assert isinstance(dispatcher.get_backend(_Child()), _PriorityBackend)
+
+
+def test_dispatch_conflict(dispatcher):
+    """Test that backends matching the same class must have priorities."""
+    class _OtherChildBackend(_ChildBackend):
+        file_type = "other"
+
+    dispatcher.register(_ChildBackend)
+    dispatcher.register(_OtherChildBackend)
+    with pytest.raises(RuntimeError):
+        dispatcher.get_backend(_Child())
+
+
+def test_dispatch_memoized(dispatcher):
+    """Test that dispatch results are memoized per type."""
+    dispatcher.register(_BaseBackend)
+    with mock.patch.object(dispatcher, "_match_type",
+                           wraps=dispatcher._match_type) as match_type:
+        for _ in range(3):
+            dispatcher.get_backend(_Child())
+        match_type.assert_called_once_with(_Child)
+    # registering a new backend invalidates the memoized results
+    dispatcher.register(_ChildBackend)
+    assert isinstance(dispatcher.get_backend(_Child()), _ChildBackend)
+
+
+def test_dispatch_entry_points(dispatcher):
+    """Test that backends are registered from entry points on demand."""
+    entry_point = mock.Mock()
+    entry_point.load.return_value = _ChildBackend
+    broken_entry_point = mock.Mock()
+    broken_entry_point.load.side_effect = ImportError
+    dispatcher._entry_points_loaded = False
+    with mock.patch("kale.marshal.backend._iter_entry_points",
+                    return_value=[broken_entry_point, entry_point]):
+        assert isinstance(dispatcher.get_backend(_Child()), _ChildBackend)
+        assert isinstance(dispatcher._dispatch_file_type("obj.child"),
+                          _ChildBackend)
+
+
+def test_dispatch_object(dispatcher):
+    """Test that objects of unmatched types are offered to `match_object`."""
+    class _ListBackend(marshal.MarshalBackend):
+        file_type = "list"
+
+        def match_object(self, obj):
+            return isinstance(obj, list) and len(obj) == 2
+
+    dispatcher.register(_ListBackend)
+    assert isinstance(dispatcher.get_backend([1, 2]), _ListBackend)
+    assert type(dispatcher.get_backend([1])) is marshal.MarshalBackend
+
+
+def test_manifest(data_dir):
+    """Test that loads are resolved through the manifest."""
+    from kale.marshal import manifest
+    marshal.save_many({"a": [1], "b": [2]})
+    marshal.save([3], "b")
+    entries = manifest.read(data_dir)
+    assert sorted(entries.keys()) == ["a", "b"]
+    assert entries["a"]["file"] == "a.dillpkl"
+    assert entries["a"]["backend"] == "MarshalBackend"
+    assert entries["a"]["size"] == os.path.getsize(
+        os.path.join(data_dir, "a.dillpkl"))
+    with mock.patch("os.listdir") as listdir:
+        assert marshal.load_many(["a", "b"]) == {"a": [1], "b": [3]}
+        listdir.assert_not_called()
+
+
+def test_manifest_checksum(content_addressed):
+    """Test that content-addressed objects record their digest."""
+    from kale.marshal import manifest
+    marshal.save([1], "a")
+    checksum = manifest.read(content_addressed)["a"]["checksum"]
+    assert _blobs(content_addressed) == [checksum + ".dillpkl"]
+
+
+def test_manifest_fallback(data_dir):
+    """Test that objects missing from the manifest are found by scanning."""
+    from kale.marshal import manifest
+    # legacy data dir
+    marshal.save([1], "a")
+    os.remove(manifest.get_manifest_path(data_dir))
+    assert marshal.load("a") == [1]
+    # object missing from the manifest, malformed record
+    marshal.save([2], "b")
+    with open(manifest.get_manifest_path(data_dir), "a") as f:
+        f.write('{"name": "c", "fi')
+    assert marshal.load_many(["a", "b"]) == {"a": [1], "b": [2]}
+
+
+def test_manifest_compaction(data_dir):
+    """Test that superseded records are eventually removed."""
+    from kale.marshal import manifest
+    with mock.patch.object(manifest, "COMPACTION_THRESHOLD", 3):
+        for i in range(4):
+            marshal.save(i, "a")
+        assert marshal.load("a") == 3
+    with open(manifest.get_manifest_path(data_dir)) as f:
+        assert len(f.readlines()) == 1
+
+
+def test_arrow(data_dir):
+    """Test saving Arrow tables and record batches."""
+    pa = pytest.importorskip("pyarrow")
+    table = pa.table({"a": [1, 2, 3]})
+    batch = table.to_batches()[0]
+    objs = marshal.load_many(marshal.save_many({"t": table, "b": batch}))
+    assert objs["t"].equals(table)
+    assert isinstance(objs["b"], pa.RecordBatch) and objs["b"].equals(batch)
+
+
+@pytest.mark.parametrize("fmt", ["csr", "csc", "coo", "bsr", "dia", "lil"])
+def test_scipy_sparse(data_dir, fmt):
+    """Test saving SciPy sparse matrices as memory-mappable components."""
+    pytest.importorskip("numpy")
+    sparse = pytest.importorskip("scipy.sparse")
+    matrix = sparse.random(20, 10, density=0.2, format=fmt, random_state=0)
+    path = marshal.save(matrix, "matrix")
+    assert path.endswith(".sparse") and os.path.isdir(path)
+    obj = marshal.load("matrix", mmap_mode="r")
+    assert type(obj) is type(matrix) and obj.format == fmt
+    assert (obj.toarray() == matrix.toarray()).all()
+    if fmt == "csr":
+        # SciPy may wrap the memory-mapped arrays in plain ndarray views
+        assert not obj.data.flags.owndata and not obj.data.flags.writeable
+
+
+def test_scipy_sparse_array(data_dir):
+    """Test that sparse arrays are not restored as sparse matrices."""
+    np = pytest.importorskip("numpy")
+    sparse = pytest.importorskip("scipy.sparse")
+    if not hasattr(sparse, "csr_array"):
+        pytest.skip("SciPy does not support sparse arrays")
+    array = sparse.csr_array(np.eye(3))
+    marshal.save(array, "array")
+    obj = marshal.load("array")
+    assert type(obj) is sparse.csr_array
+    assert (obj.toarray() == np.eye(3)).all()
+
+
+def test_scipy_sparse_overwrite(data_dir):
+    """Test saving a sparse matrix again under the same name."""
+    sparse = pytest.importorskip("scipy.sparse")
+    marshal.save(sparse.random(5, 5, density=0.5, format="coo"), "matrix")
+    matrix = sparse.random(5, 5, density=0.5, format="csr", random_state=0)
+    path = marshal.save(matrix, "matrix")
+    assert sorted(os.listdir(path)) == ["data.npy", "indices.npy",
+                                        "indptr.npy", "sparse.json"]
+    assert (marshal.load("matrix").toarray() == matrix.toarray()).all()
+    assert _ls(data_dir) == ["matrix.sparse"]
+
+
+def test_polars(data_dir):
+    """Test saving Polars DataFrames and Series."""
+    pl = pytest.importorskip("polars")
+    df = pl.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]})
+    paths = marshal.save_many({"df": df, "series": df["b"]})
+    assert paths["df"].endswith(".plipc")
+    assert paths["series"].endswith(".plseries")
+    objs = marshal.load_many(["df", "series"])
+    assert objs["df"].equals(df)
+    assert objs["series"].equals(df["b"]) and objs["series"].name == "b"
+    assert marshal.load("df", columns=["b"]).columns == ["b"]
+
+
+@pytest.fixture
+def delta(data_dir):
+    """Enable delta marshalling."""
+    marshal.set_delta(True)
+    yield data_dir
+    marshal.set_delta(False)
+
+
+def _delta_columns(data_dir, name):
+    """Get the columns written by the latest delta of an object."""
+    pa = pytest.importorskip("pyarrow")
+    path = os.path.join(data_dir, name + ".delta", "columns.arrow")
+    return pa.ipc.open_file(pa.memory_map(path)).schema.names
+
+
+def test_delta(delta, pandas_objs):
+    """Test that only the new and changed columns are written."""
+    df, _ = pandas_objs
+    assert marshal.save(df, "df").endswith(".delta")
+    df = marshal.load("df")
+    df["c"] = df["a"] * 2
+    marshal.save(df, "df")
+    assert _delta_columns(delta, "df") == ["c"]
+    df = marshal.load("df")
+    df["a"] = df["a"] + 1
+    df = df.rename(columns={"b": "renamed"})
+    marshal.save(df, "df")
+    assert _delta_columns(delta, "df") == ["a"]
+    assert _ls(delta) == ["df.delta"]
+
+    obj = marshal.load("df")
+    assert obj.equals(df) and list(obj.index) == [10, 20, 30]
+    obj = marshal.load("df", columns=["c"])
+    assert list(obj.columns) == ["c"] and list(obj.index) == [10, 20, 30]
+    # the previous versions are removed along with the object
+    marshal.delete("df")
+    assert os.listdir(os.path.join(delta, ".kale.delta")) == []
+
+
+def test_delta_arrow(delta):
+    """Test deltas of Arrow tables and their fallbacks."""
+    pa = pytest.importorskip("pyarrow")
+    table = pa.table({"a": [1, 2, 3], "b": [4, 5, 6]})
+    marshal.save(table, "t")
+    table = table.append_column("c", pa.array([7, 8, 9]))
+    marshal.save(table, "t")
+    assert _delta_columns(delta, "t") == ["c"]
+    assert marshal.load("t").equals(table)
+    # compressed objects are saved in full
+    path = marshal.save(table, "t", codec="gzip")
+    assert path.endswith(".arrow") and _ls(delta) == ["t.arrow"]
+    assert os.listdir(os.path.join(delta, ".kale.delta")) == []
+
+
+def test_stream(data_dir):
+    """Test that generators are saved chunk by chunk and loaded lazily."""
+    def chunks():
+        for i in range(3):
+            yield [i] * 2
+
+    path = marshal.save(chunks(), "s")
+    assert path.endswith(".stream") and os.path.isdir(path)
+    stream = marshal.load("s")
+    assert len(stream) == 3
+    with mock.patch.object(marshal.MarshalBackend, "_load", autospec=True,
+                           side_effect=marshal.MarshalBackend._load) as load:
+        it = iter(stream)
+        assert next(it) == [0, 0]
+        assert load.call_count == 1
+        assert list(it) == [[1, 1], [2, 2]]
+    # streams can be iterated again
+    assert list(stream) == [[0, 0], [1, 1], [2, 2]]
+
+
+def test_stream_chunk_backends(data_dir):
+    """Test that chunks are saved with the backends of their types."""
+    np = pytest.importorskip("numpy")
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+    df = pd.DataFrame({"a": [1, 2]})
+    marshal.save((chunk for chunk in [np.arange(3), df, {"k": "v"}]), "s")
+    files = sorted(os.listdir(os.path.join(data_dir, "s.stream")))
+    assert files == ["chunk-000000.npy", "chunk-000001.feather",
+                     "chunk-000002.dillpkl", "index.json"]
+    arr, _df, obj = marshal.load("s")
+    assert (arr == np.arange(3)).all() and _df.equals(df)
+    assert obj == {"k": "v"}
+
+
+def test_stream_protocol(data_dir):
+    """Test saving objects implementing the chunk protocol."""
+    class Dataset:
+        def __kale_chunks__(self):
+            return iter([[1], [2]])
+
+    marshal.save(Dataset(), "ds")
+    stream = marshal.load("ds")
+    assert list(stream) == [[1], [2]]
+    # a loaded stream can be saved again, even under the same name
+    marshal.save(stream, "ds")
+    assert list(marshal.load("ds")) == [[1], [2]]
+
+
+def test_stream_failure(data_dir):
+    """Test that a failing stream leaves the previous version in place."""
+    def chunks():
+        yield [1]
+        raise ValueError
+
+    marshal.save((chunk for chunk in [[0]]), "s")
+    with pytest.raises(SystemExit):
+        marshal.save(chunks(), "s")
+    assert list(marshal.load("s")) == [[0]]
+    assert not [f for f in os.listdir(data_dir) if ".tmp-" in f]
+
+
+def test_stream_builtin_iterators(data_dir):
+    """Test that builtin iterators are pickled and keep their type."""
+    for obj in (iter([1, 2]), map(abs, [1, 2]), filter(None, [1, 2]),
+                zip([1, 2], [1, 2]), enumerate([1, 2]), iter(range(2))):
+        assert marshal.save(obj, "it").endswith(".dillpkl")
+        loaded = marshal.load("it")
+        assert type(loaded) is type(obj)
+        assert list(loaded) == list(obj)
+
+
+def test_stream_infinite(data_dir):
+    """Test that infinite iterators are not saved chunk by chunk."""
+    import itertools
+    for obj in (itertools.count(), itertools.cycle([1]),
+                itertools.repeat(1)):
+        assert marshal.save(obj, "it").endswith(".dillpkl")
+        assert next(marshal.load("it")) == next(obj)
+
+    def chunks():
+        while True:
+            yield [1]
+
+    with mock.patch.object(marshal.get_backend_by_name("StreamBackend"),
+                           "max_chunks", 3):
+        with pytest.raises(SystemExit):
+            marshal.save(chunks(), "s")
+    assert not os.path.exists(os.path.join(data_dir, "s.stream"))
+
+
+def test_out_of_band_buffers(data_dir):
+    """Test that large buffers are written out-of-band and memory-mapped."""
+    from kale.marshal import buffers
+    np = pytest.importorskip("numpy")
+    if not buffers.IS_SUPPORTED:
+        pytest.skip("Pickle protocol 5 is not supported")
+    obj = {"big": np.arange(1 << 16, dtype="int64"), "small": np.arange(3),
+           "str": "kale"}
+    path = marshal.save(obj, "obj")
+    assert buffers.is_buffered_file(path)
+    restored = marshal.load("obj")
+    assert restored["str"] == "kale"
+    assert (restored["small"] == obj["small"]).all()
+    assert (restored["big"] == obj["big"]).all()
+    # the big array is a view over the memory-mapped file
+    base = restored["big"]
+    while isinstance(base, np.ndarray):
+        base = base.base
+    assert isinstance(base, memoryview)
+    # which is copy-on-write
+    restored["big"][0] = -1
+    assert marshal.load("obj")["big"][0] == 0
+
+
+def test_legacy_pickle(data_dir):
+    """Test loading plain dill pickles."""
+    import dill
+    with open(os.path.join(data_dir, "obj.dillpkl"), "wb") as f:
+        dill.dump({"a": 1}, f)
+    assert marshal.load("obj") == {"a": 1}
+
+
+@pytest.fixture
+def stats_path(tmpdir, monkeypatch):
+    """Record the marshal statistics to a temporary file."""
+    path = os.path.join(str(tmpdir), "stats.jsonl")
+    monkeypatch.delenv(stats.STATS_PATH_ENV, raising=False)
+    stats.enable(path)
+    yield path
+    monkeypatch.delenv(stats.STATS_PATH_ENV)
+
+
+def test_stats(data_dir, stats_path):
+    """Test that saves and loads record their statistics."""
+    marshal.save({"a": "a" * 1000}, "obj", codec="gzip")
+    marshal.load("obj")
+    records = stats.read(stats_path)
+    assert [(r["operation"], r["name"], r["backend"], r["codec"])
+            for r in records] == [("save", "obj", "MarshalBackend", "gzip"),
+                                  ("load", "obj", "MarshalBackend", "gzip")]
+    size = os.path.getsize(os.path.join(data_dir, "obj.dillpkl"))
+    assert all(r["size"] == size for r in records)
+    assert records[-1] in stats.get_records()
+    totals = stats.summarize(records)
+    assert totals["save"]["count"] == totals["load"]["count"] == 1
+    assert totals["save"]["size"] == size
+
+
+def test_stats_max_records(monkeypatch):
+    """Test that only the latest records are kept in memory."""
+    monkeypatch.setattr(stats, "_records", [])
+    monkeypatch.setattr(stats, "MAX_RECORDS", 2)
+    monkeypatch.delenv(stats.STATS_PATH_ENV, raising=False)
+    for name in ("a", "b", "c"):
+        stats.record("save", name, "MarshalBackend", "none", 1, 1.0)
+    assert [r["name"] for r in stats.get_records()] == ["b", "c"]
+
+
+@mock.patch("kale.common.kfputils.append_uimetadata_outputs")
+def test_stats_report(append_uimetadata_outputs, data_dir, stats_path):
+    """Test the JSON report and the ui-metadata table of a step."""
+    marshal.save_many({"a": [1], "b": [2]})
+    stats.write_report("step", data_dir, stats_path)
+    with open(os.path.join(data_dir, ".kale.stats", "step.json")) as f:
+        report = json.load(f)
+    assert report["step"] == "step"
+    assert sorted(r["name"] for r in report["objects"]) == ["a", "b"]
+    assert report["totals"]["save"]["count"] == 2
+    table, = append_uimetadata_outputs.call_args[0][0]
+    assert table["type"] == "table"
+    rows = [row.split(",") for row in table["source"].split("\n")]
+    assert len(rows) == 3 and rows[-1][:2] == ["save", "TOTAL"]
+    assert all(len(row) == len(table["header"]) for row in rows)
+
+
+@pytest.fixture
+def bucket(data_dir, monkeypatch):
+    """Store the marshalled objects in a mocked S3 bucket."""
+    moto = pytest.importorskip("moto")
+    boto3 = pytest.importorskip("boto3")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with moto.mock_aws():
+        client = boto3.client("s3")
+        client.create_bucket(Bucket="kale")
+        marshal.set_storage("s3://kale/run")
+        yield client
+        marshal.set_storage(None)
+
+
+def _keys(client):
+    objs = client.list_objects_v2(Bucket="kale").get("Contents", [])
+    return sorted(obj["Key"] for obj in objs)
+
+
+def test_storage(bucket, data_dir, tmpdir_factory):
+    """Test that objects are exchanged through the bucket."""
+    marshal.save({"a": 1}, "obj", codec="gzip")
+    assert _keys(bucket) == ["run/.obj.dillpkl.codec", "run/obj.dillpkl"]
+    # Another step, with an empty staging directory
+    marshal.set_data_dir(str(tmpdir_factory.mktemp("step")))
+    assert marshal.load("obj") == {"a": 1}
+    with pytest.raises(SystemExit):
+        marshal.load("missing")
+
+
+def test_storage_stale_keys(bucket, data_dir, pandas_objs):
+    """Test that saving an object removes its other versions."""
+    marshal.save(pandas_objs[0], "obj")
+    assert _keys(bucket) == ["run/obj.feather"]
+    marshal.save((chunk for chunk in [[1], [2]]), "obj")
+    assert _keys(bucket) == ["run/obj.stream/chunk-000000.dillpkl",
+                             "run/obj.stream/chunk-000001.dillpkl",
+                             "run/obj.stream/index.json"]
+    marshal.set_data_dir(data_dir + "-step")
+    assert list(marshal.load("obj")) == [[1], [2]]
+
+
+def test_storage_multipart(bucket, data_dir):
+    """Test that large files are uploaded and downloaded in parts."""
+    np = pytest.importorskip("numpy")
+    marshal.get_storage().part_size = 5 << 20  # the minimum of S3
+    arr = np.arange(12 << 17, dtype=np.float64)  # 12MiB
+    marshal.save(arr, "arr")
+    head = bucket.head_object(Bucket="kale", Key="run/arr.npy")
+    assert head["ETag"].strip('"').endswith("-3")
+    marshal.set_data_dir(data_dir + "-step")
+    assert (marshal.load("arr") == arr).all()
+
+
+def test_delete(content_addressed):
+    """Test that deleting an object keeps the blobs still pointed to."""
+    marshal.save([1, 2, 3], "a", codec="gzip")
+    marshal.save([1, 2, 3], "b", codec="gzip")
+    marshal.delete("a")
+    assert _ls(content_addressed) == ["b.dillpkl"]
+    assert not os.path.exists(os.path.join(content_addressed,
+                                           ".a.dillpkl.codec"))
+    assert len(_blobs(content_addressed)) == 1
+    marshal.delete("b")
+    assert _ls(content_addressed) == [] and _blobs(content_addressed) == []
+
+
+def test_gc_release(data_dir, monkeypatch):
+    """Test that objects are deleted once all their consumers complete."""
+    monkeypatch.setenv(gc.RUN_ID_ENV, "run")
+    marshal.save_many({"a": 1, "b": 2})
+    consumers = {"a": ["step1", "step2"], "b": ["step2"]}
+    gc.release("step1", {"a": consumers["a"]}, data_dir)
+    assert _ls(data_dir) == ["a.dillpkl", "b.dillpkl"]
+    assert os.listdir(os.path.join(data_dir, ".kale.gc", "run", "a")) == [
+        "step1"]
+    gc.release("step2", consumers, data_dir)
+    assert _ls(data_dir) == []
+    assert os.listdir(os.path.join(data_dir, ".kale.gc", "run")) == []
+
+
+def test_gc_release_storage(bucket, data_dir):
+    """Test that released objects are deleted from the bucket."""
+    marshal.save_many({"a": 1, "b": 2})
+    gc.release("step1", {"a": ["step1", "step2"], "b": ["step1"]}, data_dir)
+    assert _keys(bucket) == ["run/.kale.gc/local/a/step1", "run/a.dillpkl"]
+    gc.release("step2", {"a": ["step1", "step2"]}, data_dir)
+    assert _keys(bucket) == []
+
+
+@pytest.fixture
+def torch():
+    """Import torch, if available."""
+    pytest.importorskip("safetensors")
+    return pytest.importorskip("torch")
+
+
+def test_torch_module(data_dir, torch):
+    """Test that modules are saved as their class and state."""
+    module = torch.nn.Sequential(torch.nn.Linear(4, 4),
+                                 torch.nn.BatchNorm1d(4))
+    module.shared = module[0]
+    module.eval()
+    path = marshal.save(module, "module")
+    assert sorted(os.listdir(path)) == ["module.pkl", "tensors.safetensors"]
+    restored = marshal.load("module")
+    assert type(restored) is torch.nn.Sequential
+    assert restored.shared is restored[0]
+    assert isinstance(restored[0].weight, torch.nn.Parameter)
+    x = torch.randn(2, 4)
+    assert torch.equal(restored(x), module(x))
+
+
+def test_torch_tensors(data_dir, torch):
+    """Test that tensors and state dicts are saved with safetensors."""
+    tensor = torch.arange(10.)[::2].requires_grad_(True)
+    state_dict = torch.nn.Linear(2, 2).state_dict()
+    marshal.save_many({"tensor": tensor, "state_dict": state_dict,
+                       "shared": {"b": tensor, "a": tensor.detach()[1:]}})
+    assert _ls(data_dir) == ["shared.safetensors", "state_dict.safetensors",
+                             "tensor.safetensors"]
+    restored = marshal.load("tensor")
+    assert restored.requires_grad and torch.equal(restored, tensor)
+    restored = marshal.load("state_dict")
+    assert type(restored) is type(state_dict)
+    assert list(restored) == list(state_dict)
+    assert restored._metadata == state_dict._metadata
+    restored = marshal.load("shared")
+    assert list(restored) == ["b", "a"]
+    assert torch.equal(restored["a"], tensor.detach()[1:])
+
+
+def test_torch_script(data_dir, torch):
+    """Test that TorchScript is used only for scripted modules."""
+    module = torch.jit.script(torch.nn.Linear(2, 2))
+    marshal.save(module, "module")
+    assert _ls(data_dir) == ["module.pt"]
+    assert isinstance(marshal.load("module"), torch.jit.ScriptModule)
+
+
+def test_history(data_dir, stats_path, tmpdir, monkeypatch):
+    """Test that steps record the marshalled data of every run."""
+    history_path = str(tmpdir.join(".kale", "test.marshal_history.jsonl"))
+    for run in ("run1", "run2"):
+        monkeypatch.setenv(gc.RUN_ID_ENV, run)
+        stats.enable(stats_path)
+        marshal.save_many({"a": "a" * 1000, "b": "b" * 2000})
+        history.record_step(history_path, "step", data_dir, stats_path)
+    runs = history.read(history_path)
+    assert [[entry["run"] for entry in run] for run in runs] == [["run1"],
+                                                                 ["run2"]]
+    entry = runs[-1][0]
+    assert sorted(entry["objects"]) == ["a", "b"]
+    assert entry["data_dir_size"] >= sum(entry["objects"].values())
+
+
+def test_history_storage(bucket, data_dir, stats_path, monkeypatch):
+    """Test that steps record the history in the object storage."""
+    history_url = "s3://kale/.kale/test.marshal_history"
+    monkeypatch.setattr(history, "MAX_RUNS", 1)
+    for run in ("run1", "run2", "run3"):
+        monkeypatch.setenv(gc.RUN_ID_ENV, run)
+        stats.enable(stats_path)
+        marshal.save_many({"a": "a" * 1000})
+        history.record_step(history_url, "step", data_dir, stats_path)
+    runs = history.read(history_url)
+    assert [[entry["run"] for entry in run] for run in runs] == [["run3"]]
+    assert runs[0][0]["objects"] == {"a": mock.ANY}
+    # More than 2 * MAX_RUNS runs were recorded, so the oldest are removed
+    assert [k for k in _keys(bucket) if k.startswith(".kale/")] == [
+        ".kale/test.marshal_history/run3-step.json"]
+    assert history.read("s3://missing/history") == []
+
+
+def test_history_estimate(tmpdir, monkeypatch):
+    """Test that volumes are sized from the observed and implied peaks."""
+    from kale import Step
+    history_path = str(tmpdir.join("history.jsonl"))
+    steps = [Step(name="s1", source=[], outs={"a"}),
+             Step(name="s2", source=[], ins={"a"}, outs={"b"}),
+             Step(name="s3", source=[], ins={"b"})]
+    assert history.estimate_volume_size(history_path, steps) is None
+    monkeypatch.setattr(history, "MIN_VOLUME_SIZE", 0)
+    mib = 1 << 20
+    with open(history_path, "w") as f:
+        for step, objects in [("s1", {"a": 100 * mib}),
+                              ("s2", {"b": 200 * mib})]:
+            f.write(json.dumps({"run": "run", "step": step,
+                                "data_dir_size": 50 * mib,
+                                "objects": objects}) + "\n")
+    # a and b are both on the volume when s2 completes
+    assert history.estimate_volume_size(history_path, steps) == "450Mi"
+    steps[2].ins.add("a")
+    assert history.estimate_volume_size(history_path, steps) == "450Mi"
+    assert history.estimate_volume_size(history_path, steps[1:]) == "300Mi"
+
+
+def test_prefetch(data_dir):
+    """Test that prefetching reads the inputs and never fails the step."""
+    marshal.save_many({"a": [1, 2, 3],
+                       "b": (chunk for chunk in [[1], [2]])})
+    with mock.patch.object(prefetch, "_read_file",
+                           wraps=prefetch._read_file) as read_file:
+        prefetch.start(data_dir, ["a", "b", "missing"]).join()
+    assert sorted(os.path.relpath(args[0], data_dir)
+                  for args, _ in read_file.call_args_list) == [
+        "a.dillpkl", os.path.join("b.stream", "chunk-000000.dillpkl"),
+        os.path.join("b.stream", "chunk-000001.dillpkl"),
+        os.path.join("b.stream", "index.json")]
+    prefetch.prefetch(data_dir + "-missing", ["a"])
+
+
+def test_prefetch_storage(bucket, data_dir, tmpdir_factory):
+    """Test that loading skips the files that were prefetched."""
+    marshal.save({"a": 1}, "obj")
+    step_dir = str(tmpdir_factory.mktemp("step"))
+    prefetch.prefetch(step_dir, ["obj"])
+    assert _ls(step_dir) == ["obj.dillpkl"]
+    marshal.set_data_dir(step_dir)
+    storage = marshal.get_storage()
+    with mock.patch.object(storage, "_download_file") as download_file:
+        assert marshal.load("obj") == {"a": 1}
+    download_file.assert_not_called()
+
+
+def test_prefetch_storage_concurrent(bucket, data_dir, tmpdir_factory):
+    """Test that loading waits for the prefetching of the same object."""
+    marshal.save({"a": 1}, "obj")
+    step_dir = str(tmpdir_factory.mktemp("step"))
+    storage = marshal.get_storage()
+    started, resume = threading.Event(), threading.Event()
+    download_file = storage._download_file
+
+    def _download_file(key, path):
+        started.set()
+        resume.wait(5)
+        download_file(key, path)
+
+    with mock.patch.object(storage, "_download_file",
+                           side_effect=_download_file) as mock_download:
+        thread = prefetch.start(step_dir, ["obj"])
+        assert started.wait(5)
+        marshal.set_data_dir(step_dir)
+        timer = threading.Timer(0.2, resume.set)
+        timer.start()
+        assert marshal.load("obj") == {"a": 1}
+        thread.join()
+        timer.join()
+    assert mock_download.call_count == 1
+
+
+def test_prefetch_storage_stale(bucket, data_dir, tmpdir_factory):
+    """Test that loading replaces stale files of the same size."""
+    marshal.save([1, 2, 3], "obj")
+    step_dir = str(tmpdir_factory.mktemp("step"))
+    prefetch.prefetch(step_dir, ["obj"])
+    marshal.save([4, 5, 6], "obj")
+    marshal.set_data_dir(step_dir)
+    assert marshal.load("obj") == [4, 5, 6]
+
+
+def test_storage_etag(bucket, data_dir, tmpdir):
+    """Test that the ETags of local files match the ones of S3."""
+    storage = marshal.get_storage()
+    storage.part_size = 5 << 20  # the minimum of S3
+    for size in (1 << 10, 12 << 20):
+        path = str(tmpdir.join("file"))
+        with open(path, "wb") as f:
+            f.write(os.urandom(size))
+        storage.upload(str(tmpdir), "file")
+        obj, = storage._list_objects("file")
+        assert storage._is_downloaded(path, obj)
+
+
+def test_benchmark(data_dir, tmpdir):
+    """Test that the benchmark measures every backend of the workloads."""
+    pytest.importorskip("numpy")
+    output_path = str(tmpdir.join("results.json"))
+    benchmark.main(["--workloads", "numpy,function", "--sizes", "64Ki",
+                    "--codecs", "none,gzip", "--repeat", "1",
+                    "--output", output_path])
+    with open(output_path) as f:
+        output = json.load(f)
+    assert sorted({(r["workload"], r["backend"], r["codec"])
+                   for r in output["results"]}) == [
+        ("function", "FunctionBackend", "gzip"),
+        ("function", "FunctionBackend", "none"),
+        ("function", "MarshalBackend", "gzip"),
+        ("function", "MarshalBackend", "none"),
+        ("numpy", "MarshalBackend", "gzip"),
+        ("numpy", "MarshalBackend", "none"),
+        ("numpy", "NumpyBackend", "gzip"),
+        ("numpy", "NumpyBackend", "none")]
+    result = output["results"][0]
+    assert result["disk_bytes"] >= 64 << 10
+    assert result["save_throughput"] > 0 and result["load_throughput"] > 0
+    # Throughputs are computed from the size in memory, not on disk
+    for r in output["results"]:
+        assert r["object_bytes"] == 64 << 10
+        for operation in ("save", "load"):
+            assert r[operation + "_throughput"] == pytest.approx(
+                r["object_bytes"] / 1e6 / r[operation + "_seconds"])
+    # The benchmark does not change the marshal settings
+    assert marshal.get_data_dir() == data_dir
+
+    assert benchmark.compare(output, output) == []
+    baseline = json.loads(json.dumps(output))
+    baseline["results"][0]["load_throughput"] *= 2
+    assert [(r["backend"], r["operation"])
+            for r in benchmark.compare(baseline, output, threshold=0)] == [
+        ("NumpyBackend", "load")]
+    with pytest.raises(SystemExit):
+        benchmark.main(["--workloads", "numpy", "--sizes", "64Ki",
+                        "--repeat", "1", "--compare", output_path,
+                        "--threshold", "-1"])
+
+
+def test_benchmark_arrow_memory():
+    """Test that the peak memory includes the allocations of Arrow."""
+    pa = pytest.importorskip("pyarrow")
+    result = benchmark._measure(lambda: pa.allocate_buffer(16 << 20), 1)
+    assert result["peak_memory"] >= 16 << 20
@@ -16,6 +16,7 @@ import os
 import pytest
 import nbformat
 
+from kale import marshal
 from kale.rpc import nb
 
 
@@ -89,3 +90,19 @@ def test_get_pipeline_metrics(tmpdir, _rpc_request):
     nbformat.write(notebook, notebook_path, nbformat.NO_CONVERT)
     target = {"metric-1": "metric_1", "metric-2": "metric_2"}
     assert nb.get_pipeline_metrics(_rpc_request, notebook_path) == target
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_unmarshal_data(tmpdir, lazy):
+    """Test that snapshots are restored eagerly, unless lazy is set."""
+    notebook_path = os.path.join(tmpdir, "test.ipynb")
+    prev_data_dir = marshal.get_data_dir()
+    marshal.set_data_dir(nb._get_kale_marshal_dir(notebook_path))
+    try:
+        marshal.save([1, 2], "a")
+        objs = nb.unmarshal_data(notebook_path, lazy=lazy)
+        assert list(objs) == ["a"]
+        assert isinstance(objs["a"], marshal.LazyProxy) == lazy
+        assert objs["a"] == [1, 2]
+    finally:
+        marshal.set_data_dir(prev_data_dir)
@@ -60,8 +60,12 @@ setup(
             'testfixtures',
             'pytest-cov',
             'flake8',
-            'flake8-docstrings'
-        ]
+            'flake8-docstrings',
+            # moto 5 requires Python >= 3.8. The S3 tests skip without it
+            'moto >= 5.0; python_version >= "3.8"'
+        ],
+        # Store marshalled objects in S3-compatible object storage
+        's3': ['boto3']
     },
     entry_points={'console_scripts':
                   ['kale=kale.cli:main',